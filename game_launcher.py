@@ -1,12 +1,27 @@
+import argparse
 import othello_game
 
+# Board sizes the game can be played on (even, so the 4 starting disks are in the middle)
+MIN_BOARD_SIZE = 4
+MAX_BOARD_SIZE = 32
+
 def main():
+    parser = argparse.ArgumentParser(description="Othello game")
+    parser.add_argument("--size", type=int, default=8,
+                        help="number of rows and columns of the board (even, %d to %d)" % (MIN_BOARD_SIZE,
+                                                                                            MAX_BOARD_SIZE))
+    arguments = parser.parse_args()
+    if arguments.size % 2 or not MIN_BOARD_SIZE <= arguments.size <= MAX_BOARD_SIZE:
+        parser.error("the board size must be an even number from %d to %d" % (MIN_BOARD_SIZE, MAX_BOARD_SIZE))
+
     # Phases:
     
     # Phase 1: Initialize the game
-    game = othello_game.Game()
+    game = othello_game.Game(arguments.size, arguments.size)
     
     # Phase 2: Draw the board
     game.run()
 
-main()
\ No newline at end of file
+# The worker processes of the parallel search import the main module again, so they must not start a game
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+import numpy as np
+from othello_engine import get_board_geometry
+from othello_evaluation import get_weight_classes, MOBILITY_WEIGHT, FRONTIER_WEIGHT
+
+####################################################################################################################
+# Module description: Batched version of the engine for self-play and bulk analysis: thousands of positions are
+#                     processed by each call with NumPy, instead of one Position at a time.
+#                     A batch is an (N, 2) uint64 array: boards[i, 0] is the bitboard of the player to move in
+#                     position i and boards[i, 1] the bitboard of the opponent (same bit numbering as the engine,
+#                     row * board_size_n + col, so boards up to 8x8 fit in 64 bits). Applying a move swaps the two
+#                     columns, so every position of the batch always has its player to move in column 0.
+#                     The rules are the ones of othello_engine (legal_moves_bitboard, flip_mask_bitboard): the
+#                     directional fills run a fixed number of steps on the whole batch at once instead of looping
+#                     while a run continues, and the evaluation is othello_evaluation.evaluate_bitboards.
+
+# Square index given to apply_moves() for a pass
+PASS_SQUARE = -1
+
+# Cached NumPy masks per board size
+_batch_geometries = {}
+
+####################################################################################################################
+# Class description: The masks of a BoardGeometry converted to NumPy uint64 scalars.
+class BatchGeometry:
+
+    def __init__(self, board_size_n):
+        if board_size_n > 8:
+            raise ValueError("Batches are stored in uint64: the board can have at most 8 rows and columns")
+        geometry = get_board_geometry(board_size_n)
+        self.board_size_n = board_size_n
+        self.num_squares = geometry.num_squares
+        self.full_mask = np.uint64(geometry.full_mask)
+        self.left_shift_directions = [(np.uint64(shift), np.uint64(mask))
+                                      for shift, mask in geometry.left_shift_directions]
+        self.right_shift_directions = [(np.uint64(shift), np.uint64(mask))
+                                       for shift, mask in geometry.right_shift_directions]
+        self.not_first_col_mask = np.uint64(geometry.not_first_col_mask)
+        self.not_last_col_mask = np.uint64(geometry.not_last_col_mask)
+        self.row_shift = np.uint64(board_size_n)
+        self.weight_classes = [(weight, np.uint64(mask)) for weight, mask in get_weight_classes(geometry)]
+        self.square_bits = np.array([1 << square for square in range(self.num_squares)], dtype=np.uint64)
+        # Runs of opponent disks have at most board_size_n - 2 cells
+        self.fill_steps = max(board_size_n - 2, 0)
+
+def get_batch_geometry(board_size_n=8):
+    if board_size_n not in _batch_geometries:
+        _batch_geometries[board_size_n] = BatchGeometry(board_size_n)
+    return _batch_geometries[board_size_n]
+
+# Number of set bits of every byte value, for NumPy versions without np.bitwise_count
+_BYTE_POPCOUNTS = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+####################################################################################################################
+# Method description: Number of set bits of every uint64 of an array.
+# Parameters: bitboards: uint64 array of any shape
+# Returns: An array of the same shape with the counts.
+if hasattr(np, "bitwise_count"):
+    def popcount_array(bitboards):
+        return np.bitwise_count(bitboards).astype(np.int64)
+else:
+    def popcount_array(bitboards):
+        bitboards = np.ascontiguousarray(bitboards, dtype=np.uint64)
+        byte_counts = _BYTE_POPCOUNTS[bitboards.view(np.uint8)]
+        return byte_counts.reshape(bitboards.shape + (8,)).sum(axis=-1, dtype=np.int64)
+
+####################################################################################################################
+# Method description: Builds a batch from engine positions.
+# Parameters: positions: List of othello_engine.Position (all with the same board size)
+# Returns: The (N, 2) uint64 array of the positions, player to move first.
+def boards_from_positions(positions):
+    boards = np.zeros((len(positions), 2), dtype=np.uint64)
+    for index, position in enumerate(positions):
+        boards[index, 0] = position.bitboards[position.current_player]
+        boards[index, 1] = position.bitboards[3 - position.current_player]
+    return boards
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(N)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Builds a batch from board cells, like the ones of Position.copy_board_cell_states().
+# Parameters: cells: (N, n, n) array with 0 (or None) for empty cells, 1 and 2 for the disks of each player
+#             current_players: (N,) array with the player to move in each position
+# Returns: The (N, 2) uint64 array of the positions, player to move first.
+def boards_from_cells(cells, current_players):
+    cells = np.asarray(cells)
+    if cells.dtype == object:
+        cells = np.where(cells == None, 0, cells).astype(np.uint8)  # noqa: E711 (element-wise comparison)
+    number_of_positions = cells.shape[0]
+    flat_cells = cells.reshape(number_of_positions, -1)
+    square_bits = get_batch_geometry(cells.shape[1]).square_bits
+    current_players = np.asarray(current_players).reshape(-1, 1)
+    boards = np.zeros((number_of_positions, 2), dtype=np.uint64)
+    boards[:, 0] = np.bitwise_or.reduce(np.where(flat_cells == current_players, square_bits, np.uint64(0)), axis=1)
+    boards[:, 1] = np.bitwise_or.reduce(np.where((flat_cells != 0) & (flat_cells != current_players), square_bits,
+                                                 np.uint64(0)), axis=1)
+    return boards
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(N * n^2), vectorised
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Legal moves of the player to move of every position of the batch.
+# Parameters: boards: (N, 2) uint64 array
+#             board_size_n: The number of rows and columns of the boards
+# Returns: (N,) uint64 array with a bit set per legal move.
+def legal_moves(boards, board_size_n=8):
+    batch_geometry = get_batch_geometry(board_size_n)
+    own = boards[:, 0]
+    opponent = boards[:, 1]
+    empty = ~(own | opponent) & batch_geometry.full_mask
+    moves = np.zeros(len(boards), dtype=np.uint64)
+    for shift, mask in batch_geometry.left_shift_directions:
+        traversable = opponent & mask
+        run = (own << shift) & traversable
+        for _ in range(batch_geometry.fill_steps - 1):
+            run |= (run << shift) & traversable
+        moves |= (run << shift) & empty & mask
+    for shift, mask in batch_geometry.right_shift_directions:
+        traversable = opponent & mask
+        run = (own >> shift) & traversable
+        for _ in range(batch_geometry.fill_steps - 1):
+            run |= (run >> shift) & traversable
+        moves |= (run >> shift) & empty & mask
+    return moves
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(N * n), 8 directions of n - 2 vectorised steps
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Disks flipped by one move in every position of the batch.
+# Parameters: boards: (N, 2) uint64 array
+#             squares: (N,) array with the move square of each position (PASS_SQUARE for none)
+#             board_size_n: The number of rows and columns of the boards
+# Returns: (N,) uint64 array of the flipped disks (0 where the move is not legal).
+def flip_masks(boards, squares, board_size_n=8):
+    batch_geometry = get_batch_geometry(board_size_n)
+    own = boards[:, 0]
+    opponent = boards[:, 1]
+    squares = np.asarray(squares)
+    move_bits = np.where(squares >= 0, batch_geometry.square_bits[np.maximum(squares, 0)], np.uint64(0))
+    flipped = np.zeros(len(boards), dtype=np.uint64)
+    for shift, mask in batch_geometry.left_shift_directions:
+        traversable = opponent & mask
+        run = (move_bits << shift) & traversable
+        for _ in range(batch_geometry.fill_steps - 1):
+            run |= (run << shift) & traversable
+        # The run flips only if it ends on an own disk
+        flipped |= np.where((run << shift) & mask & own, run, np.uint64(0))
+    for shift, mask in batch_geometry.right_shift_directions:
+        traversable = opponent & mask
+        run = (move_bits >> shift) & traversable
+        for _ in range(batch_geometry.fill_steps - 1):
+            run |= (run >> shift) & traversable
+        flipped |= np.where((run >> shift) & mask & own, run, np.uint64(0))
+    return flipped
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(N * n)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Plays one move in every position of the batch. Positions given PASS_SQUARE only change
+#                     their player to move. The moves must be legal (see legal_moves()).
+# Parameters: boards: (N, 2) uint64 array
+#             squares: (N,) array with the move square of each position, or PASS_SQUARE
+#             board_size_n: The number of rows and columns of the boards
+# Returns: The new (N, 2) uint64 array, with the opponent to move.
+def apply_moves(boards, squares, board_size_n=8):
+    batch_geometry = get_batch_geometry(board_size_n)
+    squares = np.asarray(squares)
+    flipped = flip_masks(boards, squares, board_size_n)
+    move_bits = np.where(squares >= 0, batch_geometry.square_bits[np.maximum(squares, 0)], np.uint64(0))
+    next_boards = np.empty_like(boards)
+    next_boards[:, 0] = boards[:, 1] & ~flipped
+    next_boards[:, 1] = boards[:, 0] | flipped | move_bits
+    return next_boards
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(N * n)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Heuristic score of every position of the batch for its player to move, the same as
+#                     othello_evaluation.evaluate_bitboards().
+# Parameters: boards: (N, 2) uint64 array
+#             board_size_n: The number of rows and columns of the boards
+# Returns: (N,) int64 array of scores.
+def evaluate(boards, board_size_n=8):
+    batch_geometry = get_batch_geometry(board_size_n)
+    own = boards[:, 0]
+    opponent = boards[:, 1]
+    scores = np.zeros(len(boards), dtype=np.int64)
+    for weight, mask in batch_geometry.weight_classes:
+        scores += weight * (popcount_array(own & mask) - popcount_array(opponent & mask))
+
+    empty = ~(own | opponent) & batch_geometry.full_mask
+    scores += MOBILITY_WEIGHT * (popcount_array(empty & neighbours(opponent, batch_geometry)) -
+                                 popcount_array(empty & neighbours(own, batch_geometry)))
+    next_to_empty = neighbours(empty, batch_geometry)
+    scores -= FRONTIER_WEIGHT * (popcount_array(own & next_to_empty) - popcount_array(opponent & next_to_empty))
+    return scores
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(N), vectorised
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Cells next to the cells of every bitboard of an array (see othello_evaluation).
+# Parameters: bitboards: uint64 array
+#             batch_geometry: BatchGeometry of the boards
+# Returns: uint64 array of the neighbour cells, including the cells themselves.
+def neighbours(bitboards, batch_geometry):
+    row_neighbours = (bitboards | ((bitboards << np.uint64(1)) & batch_geometry.not_first_col_mask) |
+                      ((bitboards >> np.uint64(1)) & batch_geometry.not_last_col_mask))
+    return (row_neighbours | (row_neighbours << batch_geometry.row_shift) |
+            (row_neighbours >> batch_geometry.row_shift)) & batch_geometry.full_mask
+
+####################################################################################################################
+# Method description: Disk difference (player to move minus opponent) of every position of the batch.
+# Parameters: boards: (N, 2) uint64 array
+# Returns: (N,) int64 array.
+def disk_differences(boards):
+    return popcount_array(boards[:, 0]) - popcount_array(boards[:, 1])
+
+####################################################################################################################
+# Method description: Chooses one random legal move per position.
+# Parameters: moves: (N,) uint64 array of legal moves (from legal_moves())
+#             rng: numpy.random.Generator
+#             board_size_n: The number of rows and columns of the boards
+# Returns: (N,) int64 array of squares, PASS_SQUARE where there is no legal move.
+def choose_random_moves(moves, rng, board_size_n=8):
+    batch_geometry = get_batch_geometry(board_size_n)
+    move_counts = popcount_array(moves)
+    # Index of the chosen move among the legal moves of each position
+    chosen_indexes = (rng.random(len(moves)) * move_counts).astype(np.int64)
+    squares = np.full(len(moves), PASS_SQUARE, dtype=np.int64)
+    seen_moves = np.zeros(len(moves), dtype=np.int64)
+    for square in range(batch_geometry.num_squares):
+        is_move = (moves & batch_geometry.square_bits[square]) != 0
+        squares[is_move & (seen_moves == chosen_indexes)] = square
+        seen_moves += is_move
+    return squares
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(N * n^2), vectorised over N
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Chooses, in every position, the legal move with the best evaluation after it (1-ply greedy).
+# Parameters: boards: (N, 2) uint64 array
+#             moves: (N,) uint64 array of legal moves (from legal_moves())
+#             board_size_n: The number of rows and columns of the boards
+# Returns: (N,) int64 array of squares, PASS_SQUARE where there is no legal move.
+def choose_greedy_moves(boards, moves, board_size_n=8):
+    batch_geometry = get_batch_geometry(board_size_n)
+    squares = np.full(len(boards), PASS_SQUARE, dtype=np.int64)
+    best_scores = np.full(len(boards), np.iinfo(np.int64).min, dtype=np.int64)
+    for square in range(batch_geometry.num_squares):
+        is_move = (moves & batch_geometry.square_bits[square]) != 0
+        if not is_move.any():
+            continue
+        candidates = np.flatnonzero(is_move)
+        # After the move the opponent is to move, so the score of the mover is the negated evaluation
+        scores = -evaluate(apply_moves(boards[candidates], np.full(len(candidates), square), board_size_n),
+                           board_size_n)
+        better = scores > best_scores[candidates]
+        squares[candidates[better]] = square
+        best_scores[candidates[better]] = scores[better]
+    return squares
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(N * n^2), one vectorised apply and evaluation per square
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Plays many games in lockstep from the starting position: at every step, all the games still
+#                     running play one move (or pass) together.
+# Parameters: number_of_games: How many games to play
+#             strategies: Dictionary {1: strategy, 2: strategy} where a strategy is "random" or "greedy"
+#             seed: Seed of the random moves
+#             board_size_n: The number of rows and columns of the boards
+#             random_opening_plies: Random moves played by both players before the strategies take over
+# Returns: (number_of_games,) int64 array with the final disk difference (player 1 minus player 2) of each game.
+def play_games(number_of_games, strategies, seed=None, board_size_n=8, random_opening_plies=0):
+    rng = np.random.default_rng(seed)
+    low_center = board_size_n // 2 - 1
+    high_center = board_size_n // 2
+    square = lambda row, col: row * board_size_n + col
+    # Starting position of othello_engine.Position.reset(), player 1 to move
+    player_1_start = (1 << square(low_center, high_center)) | (1 << square(high_center, low_center))
+    player_2_start = (1 << square(low_center, low_center)) | (1 << square(high_center, high_center))
+    boards = np.zeros((number_of_games, 2), dtype=np.uint64)
+    boards[:, 0] = player_1_start
+    boards[:, 1] = player_2_start
+
+    player_to_move = 1
+    consecutive_passes = np.zeros(number_of_games, dtype=np.int64)
+    running = np.ones(number_of_games, dtype=bool)
+    ply = 0
+    while running.any():
+        moves = legal_moves(boards, board_size_n)
+        if ply < random_opening_plies or strategies[player_to_move] == "random":
+            squares = choose_random_moves(moves, rng, board_size_n)
+        else:
+            squares = choose_greedy_moves(boards, moves, board_size_n)
+        squares[~running] = PASS_SQUARE
+
+        consecutive_passes = np.where(squares == PASS_SQUARE, consecutive_passes + 1, 0)
+        boards = apply_moves(boards, squares, board_size_n)
+        # A game is over after two passes in a row (or when the board is full, which leads there)
+        running &= consecutive_passes < 2
+        player_to_move = 3 - player_to_move
+        ply += 1
+
+    # Column 0 is the player to move: player 1 after an even number of plies
+    differences = disk_differences(boards)
+    return differences if player_to_move == 1 else -differences
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(G * P * n^2) element operations, G games and P plies, vectorised over G
+    ####################################################################################################################
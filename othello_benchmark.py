@@ -0,0 +1,663 @@
+import argparse
+import json
+import random
+import sys
+import time
+import othello_batch
+import othello_endgame
+import othello_engine
+import othello_evaluation
+import othello_parallel
+import othello_patterns
+import othello_search
+import othello_transposition
+
+####################################################################################################################
+# Module description: Benchmarks of the headless Othello engine. Run it from a terminal:
+#                         python othello_benchmark.py
+#                     It compares the bitboard move generation of othello_engine.Position against the cell by cell
+#                     scans of the frontier cells (othello_engine.MailboxPosition) on the same positions, and the
+#                     alpha-beta search of othello_search against the original minimax of the Hard difficulty.
+#                     With --suite it runs the regression suite instead: the speed of the engine on fixed opening,
+#                     midgame and endgame positions, saved to (--save-baseline) or compared with (--baseline) a
+#                     JSON file, so a slower engine is caught before it ships:
+#                         python othello_benchmark.py --suite --save-baseline benchmark_baseline.json
+#                         python othello_benchmark.py --suite --baseline benchmark_baseline.json --threshold 0.1
+#                     The command exits with status 1 when a result is worse than the baseline by more than the
+#                     threshold.
+#                     With --scaling it measures how the cost of the engine grows with the board size instead:
+#                         python othello_benchmark.py --scaling --scaling-sizes 8,16,24,32
+
+# Phases of the game of the suite corpus, by number of disks on the board (8x8 values: 4 to 64 disks)
+OPENING_PHASE = "opening"
+MIDGAME_PHASE = "midgame"
+ENDGAME_PHASE = "endgame"
+OPENING_MAX_DISKS_FRACTION = 20 / 64
+ENDGAME_MIN_DISKS_FRACTION = 46 / 64
+
+# Version of the format of the baseline files
+BASELINE_FORMAT_VERSION = 1
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+# Board sizes of the scaling benchmark, and depth of its searches (large boards have many moves per node)
+DEFAULT_SCALING_SIZES = "8,10,12,16,24,32"
+SCALING_SEARCH_DEPTH = 2
+
+####################################################################################################################
+# Class description: Position that counts the nodes visited by the original minimax (one per simulated move).
+class NodeCountingPosition(othello_engine.Position):
+
+    nodes_searched = 0
+
+    def evaluate_move_minimax(self, move, current_depth=0, max_depth=3):
+        self.nodes_searched += 1
+        return super().evaluate_move_minimax(move, current_depth, max_depth)
+
+####################################################################################################################
+# Method description: Builds a reproducible set of positions by playing random games from the starting position,
+#                     keeping every position where the player to move has at least one legal move.
+# Parameters: number_of_positions: How many positions to collect
+#             seed: Seed of the random generator, so every run benchmarks the same positions
+#             board_size_n: The number of rows and columns of the board
+# Returns: A list of (board_cell_states, current_player) tuples.
+def build_position_corpus(number_of_positions, seed=2023, board_size_n=8):
+    rng = random.Random(seed)
+    corpus = []
+    while len(corpus) < number_of_positions:
+        position = othello_engine.Position(board_size_n)
+        while len(corpus) < number_of_positions:
+            possible_moves = position.get_possible_moves_by_current_player()
+            if not possible_moves:
+                position.current_player = 3 - position.current_player
+                if not position.current_player_can_move():
+                    break  # Game over, start a new game
+                continue
+            corpus.append((position.copy_board_cell_states(), position.current_player))
+            position.make_move(rng.choice(possible_moves))
+            position.current_player = 3 - position.current_player
+    return corpus
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(P), P being the number of positions
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Loads every position of the corpus in a new position object of the given class.
+# Parameters: position_class: Position or MailboxPosition
+#             corpus: List of (board_cell_states, current_player) tuples
+# Returns: A list of position objects.
+def load_corpus(position_class, corpus):
+    positions = []
+    for board_cell_states, current_player in corpus:
+        position = position_class(len(board_cell_states))
+        position.load_board_cell_states(board_cell_states, current_player)
+        positions.append(position)
+    return positions
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(P * N^2)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Runs an operation over all the positions again and again for at least min_seconds.
+# Parameters: operation: Function called with one position as argument
+#             positions: List of position objects
+#             min_seconds: Minimum measuring time
+# Returns: Operations per second.
+def measure_operations_per_second(operation, positions, min_seconds):
+    number_of_operations = 0
+    start_time = time.perf_counter()
+    elapsed_time = 0.0
+    while elapsed_time < min_seconds:
+        for position in positions:
+            operation(position)
+        number_of_operations += len(positions)
+        elapsed_time = time.perf_counter() - start_time
+    return number_of_operations / elapsed_time
+
+    # Time Complexity:
+    # Proportional to min_seconds
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Scans all the cells with move_has_disk_to_flip(), like the UI did to validate clicks.
+# Parameters: position: The position to scan
+# Returns: None
+def check_every_cell(position):
+    for row in range(position.board_size_n):
+        for col in range(position.board_size_n):
+            position.move_has_disk_to_flip((row, col), position.current_player)
+
+####################################################################################################################
+# Method description: Compares the move generation of the mailbox scans and the bitboards, printing
+#                     the operations per second of each method and the speedup.
+# Parameters: corpus: List of (board_cell_states, current_player) tuples
+#             min_seconds: Minimum measuring time of each operation
+# Returns: None
+def benchmark_move_generation(corpus, min_seconds):
+    mailbox_positions = load_corpus(othello_engine.MailboxPosition, corpus)
+    bitboard_positions = load_corpus(othello_engine.Position, corpus)
+
+    # Both representations must agree before comparing their speed
+    for mailbox_position, bitboard_position in zip(mailbox_positions, bitboard_positions):
+        if mailbox_position.get_possible_moves_by_current_player() != \
+           bitboard_position.get_possible_moves_by_current_player():
+            raise AssertionError("Bitboard and mailbox move generation disagree")
+
+    operations = [
+        ("get_possible_moves_by_current_player", lambda position: position.get_possible_moves_by_current_player()),
+        ("player_can_move (both players)", lambda position: (position.player_can_move(1), position.player_can_move(2))),
+        ("move_has_disk_to_flip (every cell)", check_every_cell),
+    ]
+
+    print("Move generation over %d positions (operations/second)" % len(corpus))
+    print("%-40s %14s %14s %10s" % ("Operation", "Mailbox", "Bitboard", "Speedup"))
+    for name, operation in operations:
+        mailbox_speed = measure_operations_per_second(operation, mailbox_positions, min_seconds)
+        bitboard_speed = measure_operations_per_second(operation, bitboard_positions, min_seconds)
+        print("%-40s %14.0f %14.0f %9.1fx" % (name, mailbox_speed, bitboard_speed, bitboard_speed / mailbox_speed))
+
+    legal_moves_speed = measure_operations_per_second(
+        lambda position: position.legal_moves_mask(position.current_player), bitboard_positions, min_seconds)
+    print("%-40s %14s %14.0f" % ("legal_moves_mask (bitboard only)", "-", legal_moves_speed))
+
+    # Time Complexity:
+    # Proportional to min_seconds
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Compares the cost of one leaf evaluation: the original evaluation (three scans of the board
+#                     with lists of cells), the bitboard evaluation of the Hard search (square weights, mobility
+#                     and frontier) and, when its weights are available, the pattern evaluation. The patterns move
+#                     part of the cost to the moves (their indices are updated there), so the cost of a move and
+#                     its undo is measured with and without them.
+# Parameters: corpus: List of (board_cell_states, current_player) tuples
+#             min_seconds: Minimum measuring time of each evaluation
+# Returns: None
+def benchmark_evaluation(corpus, min_seconds):
+    # The original evaluation compares the board before and after a move, so one move is played on each position
+    mailbox_positions = load_corpus(othello_engine.MailboxPosition, corpus)
+    mailbox_leaves = []
+    for position in mailbox_positions:
+        original_board = position.copy_board_cell_states()
+        original_number_of_disks = position.num_disks_dictionary[2]
+        position.make_move(position.get_possible_moves_by_current_player()[0])
+        mailbox_leaves.append((position, original_number_of_disks, original_board))
+    bitboard_positions = load_corpus(othello_engine.Position, corpus)
+
+    original_speed = measure_operations_per_second(
+        lambda leaf: leaf[0].evaluate_board_state(leaf[1], leaf[2], leaf[0].cells), mailbox_leaves, min_seconds)
+    bitboard_speed = measure_operations_per_second(
+        lambda position: othello_evaluation.evaluate_bitboards(position.bitboards[position.current_player],
+                                                               position.bitboards[3 - position.current_player],
+                                                               position.geometry), bitboard_positions, min_seconds)
+
+    print("Leaf evaluation over %d positions" % len(corpus))
+    print("%-40s %14s %14s" % ("Evaluation", "Evals/second", "Cost (us)"))
+    print("%-40s %14.0f %14.2f" % ("Original (board scans, lists)", original_speed, 1e6 / original_speed))
+    print("%-40s %14.0f %14.2f" % ("Weights + mobility + frontier", bitboard_speed, 1e6 / bitboard_speed))
+    print("%-40s %13.1fx" % ("Speedup", bitboard_speed / original_speed))
+
+    pattern_evaluator = othello_patterns.get_pattern_evaluator(bitboard_positions[0].board_size_n)
+    if pattern_evaluator is None:
+        print("No pattern weights for this board size, pattern evaluation not measured")
+        return
+    pattern_positions = load_corpus(othello_engine.Position, corpus)
+    for position in pattern_positions:
+        position.attach_pattern_evaluator(pattern_evaluator)
+    pattern_speed = measure_operations_per_second(
+        lambda position: othello_search.evaluate_position(position, position.current_player), pattern_positions,
+        min_seconds)
+    pattern_name = "Patterns (%d table reads)" % len(pattern_evaluator.instances)
+    print("%-40s %14.0f %14.2f" % (pattern_name, pattern_speed, 1e6 / pattern_speed))
+
+    def first_moves(positions):
+        moves = []
+        for position in positions:
+            move = position.get_possible_moves_by_current_player()[0]
+            moves.append((position, position.square_of(move),
+                          position.flip_mask_for_move(move, position.current_player)))
+        return moves
+
+    def make_and_undo_move(move):
+        move[0].apply_move(move[1], move[2])
+        move[0].undo_last_move()
+
+    print("%-40s %14s %14s" % ("Move + undo", "Moves/second", "Cost (us)"))
+    for name, positions in (("Without patterns", bitboard_positions), ("With pattern indices", pattern_positions)):
+        move_speed = measure_operations_per_second(make_and_undo_move, first_moves(positions), min_seconds)
+        print("%-40s %14.0f %14.2f" % (name, move_speed, 1e6 / move_speed))
+
+    # Time Complexity:
+    # Proportional to min_seconds
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Compares one position at a time (othello_engine) with whole batches (othello_batch) for move
+#                     generation and evaluation, and measures the lockstep self-play of othello_batch.
+# Parameters: corpus: List of (board_cell_states, current_player) tuples
+#             min_seconds: Minimum measuring time of each operation
+#             number_of_games: Games played in lockstep by each self-play run
+# Returns: None
+def benchmark_batch(corpus, min_seconds, number_of_games):
+    positions = load_corpus(othello_engine.Position, corpus)
+    boards = othello_batch.boards_from_positions(positions)
+
+    print("Batched NumPy engine over %d positions (positions/second)" % len(corpus))
+    print("%-40s %14s %14s %10s" % ("Operation", "One by one", "Batch", "Speedup"))
+    operations = [
+        ("legal moves",
+         lambda position: position.legal_moves_mask(position.current_player),
+         lambda batch: othello_batch.legal_moves(batch)),
+        ("evaluation",
+         lambda position: othello_evaluation.evaluate_bitboards(position.bitboards[position.current_player],
+                                                                position.bitboards[3 - position.current_player],
+                                                                position.geometry),
+         lambda batch: othello_batch.evaluate(batch)),
+    ]
+    for name, position_operation, batch_operation in operations:
+        position_speed = measure_operations_per_second(position_operation, positions, min_seconds)
+        # The whole corpus is one batch: each call processes len(corpus) positions
+        batch_speed = measure_operations_per_second(batch_operation, [boards], min_seconds) * len(corpus)
+        print("%-40s %14.0f %14.0f %9.1fx" % (name, position_speed, batch_speed, batch_speed / position_speed))
+
+    for strategies in ({1: "random", 2: "random"}, {1: "random", 2: "greedy"}):
+        start_time = time.perf_counter()
+        disk_differences = othello_batch.play_games(number_of_games, strategies, seed=0)
+        elapsed_time = time.perf_counter() - start_time
+        print("Lockstep self-play, %s vs %s: %d games in %.2f s (%.0f games/second), player 1 won %.1f%%" % (
+            strategies[1], strategies[2], number_of_games, elapsed_time, number_of_games / elapsed_time,
+            100 * (disk_differences > 0).mean()))
+
+    # Time Complexity:
+    # Proportional to min_seconds and to the number of games
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Compares the original minimax (fixed depth, no pruning) with the alpha-beta negamax. The
+#                     negamax gets the same wall-clock time the minimax took on each position, and the deepest
+#                     iteration it completes in that time is reported with its number of nodes.
+# Parameters: corpus: List of (board_cell_states, current_player) tuples
+#             max_depth: Deepest iteration tried for the negamax
+#             transposition_table: TranspositionTable used for an extra run of the Hard default depth
+#             number_of_workers: Worker processes of an extra root-parallel run, 0 to skip it
+# Returns: None
+def benchmark_search(corpus, max_depth, transposition_table, number_of_workers=0):
+    minimax_positions = load_corpus(NodeCountingPosition, corpus)
+    negamax_positions = load_corpus(othello_engine.Position, corpus)
+    search_engine = othello_search.SearchEngine()
+
+    print("Hard difficulty search over %d positions (averages per position)" % len(corpus))
+    total_minimax_time = total_minimax_nodes = 0
+    total_negamax_depth = total_negamax_nodes = total_negamax_time = 0
+    for minimax_position, negamax_position in zip(minimax_positions, negamax_positions):
+        start_time = time.perf_counter()
+        minimax_position.find_best_move("H")
+        minimax_time = time.perf_counter() - start_time
+        total_minimax_time += minimax_time
+        total_minimax_nodes += minimax_position.nodes_searched
+
+        # Each depth is searched from scratch, the deepest one finished within the minimax time counts
+        depth = nodes = negamax_time = 0
+        for next_depth in range(1, max_depth + 1):
+            start_time = time.perf_counter()
+            search_engine.find_best_move(negamax_position, next_depth)
+            elapsed_time = time.perf_counter() - start_time
+            if elapsed_time > minimax_time and next_depth > 1:
+                break
+            depth, nodes, negamax_time = next_depth, search_engine.nodes_searched, elapsed_time
+        total_negamax_depth += depth
+        total_negamax_nodes += nodes
+        total_negamax_time += negamax_time
+
+    # Nodes and time of the default Hard difficulty depth
+    total_hard_nodes = total_hard_time = 0
+    for negamax_position in negamax_positions:
+        start_time = time.perf_counter()
+        search_engine.find_best_move(negamax_position)
+        total_hard_time += time.perf_counter() - start_time
+        total_hard_nodes += search_engine.nodes_searched
+
+    # Same search with the transposition table (kept between positions, as between the moves of a game)
+    table_search_engine = othello_search.SearchEngine(transposition_table)
+    total_table_nodes = total_table_time = 0
+    transposition_table.reset_statistics()
+    for negamax_position in negamax_positions:
+        start_time = time.perf_counter()
+        table_search_engine.find_best_move(negamax_position)
+        total_table_time += time.perf_counter() - start_time
+        total_table_nodes += table_search_engine.nodes_searched
+
+    # Same search with the root moves spread over worker processes (each one with its own table)
+    total_parallel_nodes = total_parallel_time = 0
+    if number_of_workers > 0:
+        parallel_search_engine = othello_parallel.ParallelSearchEngine(
+            number_of_workers, transposition_table.size_in_bytes() / (1024 * 1024))
+        parallel_search_engine.find_best_move(negamax_positions[0], 1)  # Starts the worker processes
+        for negamax_position in negamax_positions:
+            start_time = time.perf_counter()
+            parallel_search_engine.find_best_move(negamax_position)
+            total_parallel_time += time.perf_counter() - start_time
+            total_parallel_nodes += parallel_search_engine.nodes_searched
+        parallel_search_engine.close()
+
+    number_of_positions = len(corpus)
+    print("%-40s %10s %12s %12s" % ("Search", "Depth", "Nodes", "Time (ms)"))
+    print("%-40s %10d %12.0f %12.1f" % ("Minimax (evaluate_move_minimax)", 4, total_minimax_nodes / number_of_positions,
+                                        1000 * total_minimax_time / number_of_positions))
+    print("%-40s %10.1f %12.0f %12.1f" % ("Alpha-beta negamax (same time)", total_negamax_depth / number_of_positions,
+                                          total_negamax_nodes / number_of_positions,
+                                          1000 * total_negamax_time / number_of_positions))
+    print("%-40s %10d %12.0f %12.1f" % ("Alpha-beta negamax (Hard default)", othello_search.HARD_SEARCH_DEPTH,
+                                        total_hard_nodes / number_of_positions,
+                                        1000 * total_hard_time / number_of_positions))
+    print("%-40s %10d %12.0f %12.1f" % ("  + transposition table", othello_search.HARD_SEARCH_DEPTH,
+                                        total_table_nodes / number_of_positions,
+                                        1000 * total_table_time / number_of_positions))
+    if number_of_workers > 0:
+        print("%-40s %10d %12.0f %12.1f" % ("  + root-parallel (%d workers)" % number_of_workers,
+                                            othello_search.HARD_SEARCH_DEPTH, total_parallel_nodes / number_of_positions,
+                                            1000 * total_parallel_time / number_of_positions))
+    print("Transposition table: %d entries (%.1f MB, %s replacement), hit rate %.1f%%, %d overwrites" % (
+        transposition_table.number_of_entries, transposition_table.size_in_bytes() / (1024 * 1024),
+        transposition_table.replacement_policy, 100 * transposition_table.hit_rate(), transposition_table.overwrites))
+
+    # Time Complexity:
+    # Proportional to the time of the minimax on every position
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Gives the phase of the game of a position from the number of disks on the board.
+# Parameters: number_of_disks: Disks of both players on the board
+#             board_size_n: The number of rows and columns of the board
+# Returns: OPENING_PHASE, MIDGAME_PHASE or ENDGAME_PHASE
+def game_phase(number_of_disks, board_size_n):
+    number_of_squares = board_size_n * board_size_n
+    if number_of_disks <= OPENING_MAX_DISKS_FRACTION * number_of_squares:
+        return OPENING_PHASE
+    if number_of_disks >= ENDGAME_MIN_DISKS_FRACTION * number_of_squares:
+        return ENDGAME_PHASE
+    return MIDGAME_PHASE
+
+####################################################################################################################
+# Method description: Builds a reproducible corpus with the same number of positions of each phase of the game,
+#                     from the positions of random games.
+# Parameters: positions_per_phase: How many positions of each phase to collect
+#             seed: Seed of the random generator, so every run benchmarks the same positions
+#             board_size_n: The number of rows and columns of the board
+# Returns: A dictionary {phase: list of (board_cell_states, current_player) tuples}.
+def build_phase_corpus(positions_per_phase, seed=2023, board_size_n=8):
+    corpus_by_phase = {OPENING_PHASE: [], MIDGAME_PHASE: [], ENDGAME_PHASE: []}
+    # A position every few moves, so the positions of a phase come from many different games
+    for board_cell_states, current_player in build_position_corpus(60 * positions_per_phase, seed, board_size_n)[::7]:
+        number_of_disks = sum(cell is not None for row in board_cell_states for cell in row)
+        phase_corpus = corpus_by_phase[game_phase(number_of_disks, board_size_n)]
+        if len(phase_corpus) < positions_per_phase:
+            phase_corpus.append((board_cell_states, current_player))
+    return corpus_by_phase
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(P), P being the number of positions per phase
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Measures an operation several times and keeps the fastest run, the one least disturbed by
+#                     the other programs of the machine.
+# Parameters: operation: Function called with one position as argument
+#             positions: List of position objects
+#             min_seconds: Minimum measuring time of each run
+#             repeats: Number of runs
+# Returns: Operations per second of the fastest run.
+def best_operations_per_second(operation, positions, min_seconds, repeats):
+    return max(measure_operations_per_second(operation, positions, min_seconds) for _ in range(repeats))
+
+####################################################################################################################
+# Method description: Percentile of a list of values (nearest rank method).
+# Parameters: values: The values
+#             percent: The percentile, from 0 to 100
+# Returns: The smallest value with at least percent % of the values less than or equal to it.
+def percentile(values, percent):
+    sorted_values = sorted(values)
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(V log V)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Plays and undoes every move of the current player (the work of a search node).
+# Parameters: position: The position
+# Returns: None
+def make_and_undo_every_move(position):
+    for move in position.get_possible_moves_by_current_player():
+        position.make_move(move)
+        position.undo_last_move()
+
+####################################################################################################################
+# Method description: Runs the regression suite: move generation, make/undo, evaluation and Hard search speed on
+#                     the positions of every phase, and the latency of the Hard search (what the player waits).
+# Parameters: corpus_by_phase: Dictionary {phase: list of (board_cell_states, current_player) tuples}
+#             min_seconds: Minimum measuring time of each run of an operation
+#             repeats: Runs of each operation, the fastest one counts
+#             search_positions: Number of positions of each phase that are searched
+#             search_depth: Depth of the Hard searches
+# Returns: A dictionary {metric name: value}, e.g. "midgame.search_nodes_per_second". Metrics ending in
+#          "_per_second" are better when higher, and metrics ending in "_ms" when lower.
+def run_benchmark_suite(corpus_by_phase, min_seconds, repeats, search_positions, search_depth):
+    metrics = {}
+    for phase, corpus in corpus_by_phase.items():
+        positions = load_corpus(othello_engine.Position, corpus)
+        metrics[phase + ".move_generation_per_second"] = best_operations_per_second(
+            lambda position: position.get_possible_moves_by_current_player(), positions, min_seconds, repeats)
+        # Every position has at least one move, so this counts positions (each with all its moves played)
+        metrics[phase + ".make_undo_all_moves_per_second"] = best_operations_per_second(
+            make_and_undo_every_move, positions, min_seconds, repeats)
+        metrics[phase + ".evaluations_per_second"] = best_operations_per_second(
+            lambda position: othello_evaluation.evaluate_bitboards(position.bitboards[position.current_player],
+                                                                   position.bitboards[3 - position.current_player],
+                                                                   position.geometry), positions, min_seconds, repeats)
+
+        # Hard search as in the game (fresh table per position, so the positions do not help each other)
+        latencies = []
+        total_nodes = 0
+        for position in positions[:search_positions]:
+            search_engine = othello_search.SearchEngine(othello_transposition.TranspositionTable(),
+                                                        othello_endgame.EndgameSolver())
+            start_time = time.perf_counter()
+            search_engine.find_best_move(position, search_depth)
+            latencies.append(time.perf_counter() - start_time)
+            total_nodes += search_engine.nodes_searched
+        metrics[phase + ".search_nodes_per_second"] = total_nodes / sum(latencies)
+        for percent in (50, 95, 99):
+            metrics["%s.search_latency_p%d_ms" % (phase, percent)] = 1000 * percentile(latencies, percent)
+    return metrics
+
+    # Time Complexity:
+    # Proportional to min_seconds and to the time of the searches
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Measures how the cost of the engine grows with the board size: move generation (bitboards
+#                     and mailbox scans), make/undo of every move, evaluation and a fixed depth search, on positions
+#                     spread over whole random games of every size.
+# Parameters: board_sizes: List of board sizes
+#             number_of_positions: Number of positions per board size
+#             min_seconds: Minimum measuring time of each operation
+#             search_positions: Number of positions searched per board size
+#             search_depth: Depth of the searches
+#             seed: Seed of the random games
+# Returns: None
+def benchmark_scaling(board_sizes, number_of_positions, min_seconds, search_positions, search_depth, seed=2023):
+    print("Engine cost by board size (%d positions per size, searches to depth %d)" % (number_of_positions,
+                                                                                        search_depth))
+    print("%6s %8s %14s %14s %14s %14s %12s %12s" % ("Size", "Moves", "Mailbox gen/s", "Bitboard gen/s",
+                                                     "Make/undo/s", "Evals/s", "Nodes/s", "Search ms"))
+    for board_size_n in board_sizes:
+        # Two whole games of positions, sampled evenly, so every size gets openings, midgames and endgames
+        plies_of_two_games = 2 * (board_size_n * board_size_n - 4)
+        corpus = build_position_corpus(plies_of_two_games, seed, board_size_n)
+        corpus = corpus[::max(1, len(corpus) // number_of_positions)][:number_of_positions]
+        mailbox_positions = load_corpus(othello_engine.MailboxPosition, corpus)
+        positions = load_corpus(othello_engine.Position, corpus)
+        average_moves = sum(len(position.get_possible_moves_by_current_player()) for position in positions) / \
+            len(positions)
+
+        mailbox_speed = measure_operations_per_second(
+            lambda position: position.get_possible_moves_by_current_player(), mailbox_positions, min_seconds)
+        bitboard_speed = measure_operations_per_second(
+            lambda position: position.get_possible_moves_by_current_player(), positions, min_seconds)
+        make_undo_speed = measure_operations_per_second(make_and_undo_every_move, positions, min_seconds)
+        evaluation_speed = measure_operations_per_second(
+            lambda position: othello_evaluation.evaluate_bitboards(position.bitboards[position.current_player],
+                                                                   position.bitboards[3 - position.current_player],
+                                                                   position.geometry), positions, min_seconds)
+
+        search_time = 0.0
+        total_nodes = 0
+        searched_positions = positions[::max(1, len(positions) // search_positions)][:search_positions]
+        for position in searched_positions:
+            search_engine = othello_search.SearchEngine(othello_transposition.TranspositionTable())
+            start_time = time.perf_counter()
+            search_engine.find_best_move(position, search_depth)
+            search_time += time.perf_counter() - start_time
+            total_nodes += search_engine.nodes_searched
+
+        print("%6s %8.1f %14.0f %14.0f %14.0f %14.0f %12.0f %12.2f" % (
+            "%dx%d" % (board_size_n, board_size_n), average_moves, mailbox_speed, bitboard_speed, make_undo_speed,
+            evaluation_speed, total_nodes / search_time, 1000 * search_time / len(searched_positions)))
+
+    # Time Complexity:
+    # Proportional to min_seconds and to the time of the searches, for every board size
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Prints the results of the suite, next to the baseline results when there is a baseline.
+# Parameters: metrics: Dictionary {metric name: value} of this run
+#             baseline_metrics: Dictionary {metric name: value} of the baseline, or None
+#             threshold: Allowed fraction of slowdown before a metric counts as a regression
+# Returns: A list with the names of the metrics that regressed.
+def compare_with_baseline(metrics, baseline_metrics, threshold):
+    regressions = []
+    print("%-46s %14s %14s %9s" % ("Metric", "This run", "Baseline", "Change"))
+    for name, value in metrics.items():
+        if baseline_metrics is None or name not in baseline_metrics:
+            print("%-46s %14.2f" % (name, value))
+            continue
+        baseline_value = baseline_metrics[name]
+        change = value / baseline_value - 1 if baseline_value else 0.0
+        # Throughput must not drop, latency must not grow
+        regressed = change < -threshold if name.endswith("_per_second") else change > threshold
+        if regressed:
+            regressions.append(name)
+        print("%-46s %14.2f %14.2f %+8.1f%%%s" % (name, value, baseline_value, 100 * change,
+                                                  "  REGRESSION" if regressed else ""))
+    return regressions
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(M), M being the number of metrics
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Runs the regression suite, saves the results as a baseline and/or compares them with one.
+# Parameters: arguments: Parsed command line arguments
+# Returns: The exit status of the command: 1 if a metric regressed beyond the threshold, else 0.
+def main_suite(arguments):
+    settings = {
+        "positions_per_phase": arguments.positions,
+        "search_positions": arguments.search_positions,
+        "search_depth": arguments.search_depth,
+        "seed": arguments.seed,
+    }
+    baseline_metrics = None
+    if arguments.baseline is not None:
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("version") != BASELINE_FORMAT_VERSION:
+            print("Unsupported baseline file: %s" % arguments.baseline)
+            return 2
+        if baseline["settings"] != settings:
+            print("Warning: the baseline was measured with other settings: %s" % baseline["settings"])
+        baseline_metrics = baseline["metrics"]
+
+    corpus_by_phase = build_phase_corpus(arguments.positions, arguments.seed)
+    print("Regression suite: %s positions, %d searched per phase at depth %d" % (
+        ", ".join("%d %s" % (len(corpus), phase) for phase, corpus in corpus_by_phase.items()),
+        arguments.search_positions, arguments.search_depth))
+    metrics = run_benchmark_suite(corpus_by_phase, arguments.seconds, arguments.repeats, arguments.search_positions,
+                                  arguments.search_depth)
+    regressions = compare_with_baseline(metrics, baseline_metrics, arguments.threshold)
+
+    if arguments.save_baseline is not None:
+        with open(arguments.save_baseline, "w") as baseline_file:
+            json.dump({"version": BASELINE_FORMAT_VERSION, "settings": settings, "metrics": metrics},
+                      baseline_file, indent=2, sort_keys=True)
+        print("Baseline saved to %s" % arguments.save_baseline)
+    if regressions:
+        print("%d metrics regressed by more than %.0f%%" % (len(regressions), 100 * arguments.threshold))
+        return 1
+    return 0
+
+    # Time Complexity: Inherits from run_benchmark_suite
+    ####################################################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description="Othello engine benchmarks")
+    parser.add_argument("--positions", type=int, default=200,
+                        help="number of positions to benchmark (per phase of the game with --suite)")
+    parser.add_argument("--seconds", type=float, default=1.0, help="minimum measuring time per operation")
+    parser.add_argument("--seed", type=int, default=2023, help="seed of the random games building the positions")
+    parser.add_argument("--search-positions", type=int, default=20, help="number of positions to search")
+    parser.add_argument("--max-depth", type=int, default=12, help="deepest negamax iteration tried")
+    parser.add_argument("--tt-entries", type=int, default=None, help="transposition table size in entries")
+    parser.add_argument("--tt-mb", type=float, default=othello_transposition.DEFAULT_SIZE_IN_MB,
+                        help="transposition table size in MB (if --tt-entries is not given)")
+    parser.add_argument("--tt-policy", default=othello_transposition.REPLACE_DEPTH_PREFERRED,
+                        choices=[othello_transposition.REPLACE_DEPTH_PREFERRED, othello_transposition.REPLACE_ALWAYS],
+                        help="transposition table replacement policy")
+    parser.add_argument("--batch-games", type=int, default=1000, help="games played in lockstep by the batch self-play")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="worker processes of the root-parallel search (0 to skip it)")
+    parser.add_argument("--suite", action="store_true", help="run the regression suite instead of the comparisons")
+    parser.add_argument("--search-depth", type=int, default=othello_search.HARD_SEARCH_DEPTH,
+                        help="depth of the Hard searches of the suite")
+    parser.add_argument("--repeats", type=int, default=3, help="runs of each suite operation, the fastest one counts")
+    parser.add_argument("--baseline", default=None, help="JSON baseline the suite results are compared with")
+    parser.add_argument("--save-baseline", default=None, help="JSON file where the suite results are saved")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="allowed slowdown (fraction) against the baseline")
+    parser.add_argument("--scaling", action="store_true",
+                        help="measure the cost of the engine by board size instead of the comparisons")
+    parser.add_argument("--scaling-sizes", default=DEFAULT_SCALING_SIZES,
+                        help="comma separated board sizes of --scaling (even, 4 to 32)")
+    arguments = parser.parse_args()
+
+    if arguments.suite:
+        sys.exit(main_suite(arguments))
+    if arguments.scaling:
+        try:
+            board_sizes = [int(size) for size in arguments.scaling_sizes.split(",")]
+        except ValueError:
+            parser.error("--scaling-sizes must be comma separated numbers, e.g. 8,16,32")
+        if any(size % 2 or not 4 <= size <= 32 for size in board_sizes):
+            parser.error("the board sizes must be even numbers from 4 to 32")
+        benchmark_scaling(board_sizes, arguments.positions, arguments.seconds, arguments.search_positions,
+                          SCALING_SEARCH_DEPTH, arguments.seed)
+        return
+
+    corpus = build_position_corpus(arguments.positions, arguments.seed)
+    benchmark_move_generation(corpus, arguments.seconds)
+    print()
+    benchmark_evaluation(corpus, arguments.seconds)
+    print()
+    benchmark_batch(corpus, arguments.seconds, arguments.batch_games)
+    print()
+    # Positions spread over the whole corpus, so opening, midgame and endgame positions are searched
+    search_step = max(1, len(corpus) // arguments.search_positions)
+    transposition_table = othello_transposition.TranspositionTable(arguments.tt_entries, arguments.tt_mb,
+                                                                   arguments.tt_policy)
+    benchmark_search(corpus[::search_step][:arguments.search_positions], arguments.max_depth, transposition_table,
+                     arguments.workers)
+
+if __name__ == "__main__":
+    main()
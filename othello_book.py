@@ -0,0 +1,214 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+import othello_engine
+import othello_search
+import othello_transposition
+
+####################################################################################################################
+# Module description: Opening book of the Hard difficulty. Every game starts from the same position, so the best
+#                     moves of the first plies are searched once, deeply and offline, and stored in a binary file:
+#                         header:  magic (8 bytes), board size (uint16), evaluation (uint32), record count (uint32)
+#                         records: Zobrist key (uint64), move square (int16), score (int16), depth (uint16)
+#                     The records are sorted by key, so the file is opened with mmap (nothing is read into memory
+#                     until it is used) and queried by binary search. The keys do not change between runs because
+#                     the Zobrist keys come from a fixed seed (othello_engine.ZOBRIST_SEED).
+#                     The moves and scores come from the evaluation of the search that built the book, so the header
+#                     keeps its identifier (othello_search.evaluation_id()) and a book built with another evaluation
+#                     (e.g. before the pattern weights were learned again) is not used; it must be built again.
+#                     Build the book from a terminal:
+#                         python othello_book.py --plies 6 --depth 8
+
+BOOK_MAGIC = b"OTHBOOK2"
+HEADER_STRUCT = struct.Struct("<8sHII")
+RECORD_STRUCT = struct.Struct("<QhhH")
+KEY_STRUCT = struct.Struct("<Q")
+
+# Book file of the game, next to the modules
+DEFAULT_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "othello_book.bin")
+
+####################################################################################################################
+# Class description: Read-only opening book stored in a memory-mapped file.
+class OpeningBook:
+
+    ################################################################################################################################
+    # Method description: Opens a book file. Raises ValueError if it is not a book file, or if it was built with
+    #                     another evaluation.
+    # Parameters: (self is implicit)
+    #              path: Path of the book file
+    #              pattern_evaluation: True if the search using the book evaluates with the pattern weights when they
+    #                                  are available (as othello_search.SearchEngine)
+    def __init__(self, path=DEFAULT_BOOK_PATH, pattern_evaluation=True):
+        with open(path, "rb") as book_file:
+            self.memory = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.memory) < HEADER_STRUCT.size:
+            self.memory.close()
+            raise ValueError("Not an opening book file: %s" % path)
+        magic, self.board_size_n, self.evaluation_id, self.number_of_records = HEADER_STRUCT.unpack_from(self.memory, 0)
+        if magic != BOOK_MAGIC or len(self.memory) != HEADER_STRUCT.size + self.number_of_records * RECORD_STRUCT.size:
+            self.memory.close()
+            raise ValueError("Not an opening book file: %s" % path)
+        if self.evaluation_id != othello_search.evaluation_id(self.board_size_n, pattern_evaluation):
+            self.memory.close()
+            raise ValueError("The opening book %s was built with another evaluation" % path)
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1), the records are only read when they are looked up
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Unmaps the book file.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def close(self):
+        self.memory.close()
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Looks for a position by binary search on the sorted keys.
+    # Parameters: (self is implicit)
+    #              key: The 64-bit Zobrist key of the position (Position.hash_key())
+    # Returns: A (square, score, depth) tuple, or None if the position is not in the book.
+    def lookup(self, key):
+        low = 0
+        high = self.number_of_records
+        while low < high:
+            middle = (low + high) // 2
+            if KEY_STRUCT.unpack_from(self.memory, HEADER_STRUCT.size + middle * RECORD_STRUCT.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.number_of_records:
+            record_key, square, score, depth = RECORD_STRUCT.unpack_from(
+                self.memory, HEADER_STRUCT.size + low * RECORD_STRUCT.size)
+            if record_key == key:
+                return (square, score, depth)
+        return None
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(log R), R being the number of records
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Gives the book move of the current player of a position.
+    # Parameters: (self is implicit)
+    #              position: The engine Position
+    # Returns: The (row, col) book move, or None if the position is not in the book.
+    def find_best_move(self, position):
+        if position.board_size_n != self.board_size_n:
+            return None
+        record = self.lookup(position.hash_key())
+        if record is None:
+            return None
+        square = record[0]
+        # A legal move also protects against a (very unlikely) key collision
+        if not position.legal_moves_mask(position.current_player) >> square & 1:
+            return None
+        return position.move_of(square)
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(log R)
+        ################################################################################################################################
+
+####################################################################################################################
+# Method description: Opens the opening book of the game, if there is one for the evaluation of the search.
+# Parameters: path: Path of the book file
+#             pattern_evaluation: True if the search evaluates with the pattern weights when they are available
+# Returns: The OpeningBook, or None if the file does not exist or was built with another evaluation.
+def get_opening_book(path=DEFAULT_BOOK_PATH, pattern_evaluation=True):
+    if not os.path.exists(path):
+        return None
+    try:
+        return OpeningBook(path, pattern_evaluation)
+    except ValueError as error:
+        print("%s: the game is played without it" % error)
+        return None
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(1)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Writes a book file with the records sorted by key.
+# Parameters: path: Path of the book file
+#             board_size_n: The number of rows and columns of the board
+#             records: Dictionary {key: (square, score, depth)}
+#             evaluation_id: Identifier of the evaluation of the searches (othello_search.evaluation_id())
+# Returns: None
+def write_book(path, board_size_n, records, evaluation_id):
+    with open(path, "wb") as book_file:
+        book_file.write(HEADER_STRUCT.pack(BOOK_MAGIC, board_size_n, evaluation_id, len(records)))
+        for key in sorted(records):
+            square, score, depth = records[key]
+            book_file.write(RECORD_STRUCT.pack(key, square, score, depth))
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(R log R)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Fills a book with the best move of every position reachable in the first plies of the game,
+#                     each one found by a deep search. Positions reached by different move orders are searched once.
+# Parameters: board_size_n: The number of rows and columns of the board
+#             plies: Positions after at most this number of moves are added
+#             search_depth: Depth of the search of every position
+#             transposition_table_size_mb: Memory of the transposition table of the searches
+#             report: Function called with a progress message after every position, or None
+# Returns: Dictionary {key: (square, score, depth)}
+def build_book(board_size_n, plies, search_depth, transposition_table_size_mb=othello_transposition.DEFAULT_SIZE_IN_MB,
+               report=None):
+    search_engine = othello_search.SearchEngine(
+        othello_transposition.TranspositionTable(size_in_mb=transposition_table_size_mb))
+    records = {}
+    positions = [othello_engine.Position(board_size_n)]
+    for ply in range(plies + 1):
+        next_positions = []
+        for position in positions:
+            key = position.hash_key()
+            if key in records:
+                continue
+            if not position.current_player_can_move():
+                position.current_player = 3 - position.current_player  # Pass
+                key = position.hash_key()
+                if key in records or not position.current_player_can_move():
+                    continue
+            best_move = search_engine.find_best_move(position, search_depth)
+            records[key] = (position.square_of(best_move), search_engine.best_score, search_engine.depth_reached)
+            if report is not None:
+                report("ply %d: %d positions, last searched in %.2f s" % (ply, len(records), search_engine.search_time))
+
+            if ply < plies:
+                for move in position.get_possible_moves_by_current_player():
+                    next_position = position.copy()
+                    next_position.make_move(move)
+                    next_position.current_player = 3 - next_position.current_player
+                    next_positions.append(next_position)
+        positions = next_positions
+    return records
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(P * S), P being the number of positions in the first plies and S the time of
+    # a search
+    ####################################################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds the opening book of the Hard difficulty")
+    parser.add_argument("--output", default=DEFAULT_BOOK_PATH, help="path of the book file")
+    parser.add_argument("--plies", type=int, default=6, help="positions after at most this number of moves are added")
+    parser.add_argument("--depth", type=int, default=8, help="search depth of every position")
+    parser.add_argument("--size", type=int, default=8, help="number of rows and columns of the board")
+    parser.add_argument("--tt-mb", type=float, default=othello_transposition.DEFAULT_SIZE_IN_MB,
+                        help="transposition table size in MB")
+    arguments = parser.parse_args()
+
+    start_time = time.perf_counter()
+    records = build_book(arguments.size, arguments.plies, arguments.depth, arguments.tt_mb,
+                         lambda message: print(message, end="\r"))
+    write_book(arguments.output, arguments.size, records, othello_search.evaluation_id(arguments.size))
+    print()
+    print("%d positions written to %s in %.0f s" % (len(records), arguments.output, time.perf_counter() - start_time))
+
+if __name__ == "__main__":
+    main()
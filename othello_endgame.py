@@ -0,0 +1,464 @@
+import bisect
+import time
+from othello_engine import popcount, iterate_squares, legal_moves_bitboard, flip_mask_bitboard
+from othello_search import SearchTimeout, INFINITE_SCORE, DEADLINE_CHECK_INTERVAL
+from othello_transposition import EXACT_BOUND, LOWER_BOUND, UPPER_BOUND
+
+####################################################################################################################
+# Module description: Endgame solver. With few empty cells left, the game tree is small enough to be searched to
+#                     the end, so the result is known instead of guessed by the heuristics: the exact final disk
+#                     difference, or only win/loss/draw (WLD), which is faster to prove. It works directly on the
+#                     two bitboards (no Position, no transposition table) and orders the moves with:
+#                       - fastest-first: moves leaving the opponent the fewest replies are tried first, which
+#                         finds the cutoffs early when many cells are empty,
+#                       - parity: near the end, moves in quadrants with an odd number of empty cells first
+#                         (the player moving there usually also gets the last move of the quadrant).
+#                     The last 1, 2 and 3 empty cells have their own routines, without move generation.
+#                     The empty cells are kept in a linked list, updated when a move is made and undone, with the
+#                     parity of every quadrant as the bits of an int: the parity ordering walks the few empty cells
+#                     left instead of counting the empty cells of a quadrant for every move.
+#                     Passes are handled at every node: a player without moves passes, and when neither player can
+#                     move the game is over.
+
+# Empty cells at or below which the Hard difficulty solves the position exactly, or only as win/loss/draw
+EXACT_SOLVE_EMPTIES = 12
+WLD_SOLVE_EMPTIES = 14
+
+# Below this number of empty cells, the moves are only ordered by parity (fastest-first costs more than it saves)
+FASTEST_FIRST_EMPTIES = 7
+
+# Cached quadrant bits per board size: _quadrant_bits[board_size_n][square] is 1 << (quadrant of the square)
+_quadrant_bits = {}
+
+####################################################################################################################
+# Method description: Gives the quadrant of every square of the board, used for the parity ordering.
+# Parameters: geometry: BoardGeometry of the board
+# Returns: A list with the bit of the quadrant of each square (1, 2, 4 or 8).
+def get_quadrant_bits(geometry):
+    board_size_n = geometry.board_size_n
+    if board_size_n not in _quadrant_bits:
+        half = (board_size_n + 1) // 2
+        _quadrant_bits[board_size_n] = [1 << (2 * (square // board_size_n >= half) + (square % board_size_n >= half))
+                                        for square in range(geometry.num_squares)]
+    return _quadrant_bits[board_size_n]
+
+    # Time Complexity:
+    # Worst case = O(N^2), the first time for a board size
+    # Average and Best case = O(1), cached
+    ####################################################################################################################
+
+####################################################################################################################
+# Class description: Endgame solver by negamax with alpha-beta pruning. Scores are final disk differences
+#                    (disks of the player to move minus disks of the opponent).
+class EndgameSolver:
+
+    ################################################################################################################################
+    # Method description: Creates a solver.
+    # Parameters: (self is implicit)
+    #              exact_empties: Empty cells at or below which the solver gives the exact disk difference
+    #              wld_empties: Empty cells at or below which the solver proves win/loss/draw
+    def __init__(self, exact_empties=EXACT_SOLVE_EMPTIES, wld_empties=WLD_SOLVE_EMPTIES):
+        self.exact_empties = exact_empties
+        self.wld_empties = max(wld_empties, exact_empties)
+        # Statistics of the last search
+        self.nodes_searched = 0
+        self.best_score = 0
+        self.search_time = 0.0
+        self.exact = True
+        self.completed = True
+        # Root moves searched by the last find_best_move(): {square: (score, bound type)}
+        self.root_scores = {}
+        # Board of the running search
+        self.geometry = None
+        self.quadrant_bits = None
+        # Empty cells of the running search: a linked list by square (the list head is the index num_squares),
+        # their number, and the parity of the empty cells of every quadrant (bit set when odd)
+        self.next_empty = None
+        self.previous_empty = None
+        self.number_of_empty_cells = 0
+        self.parity = 0
+        # perf_counter() time when the running search must stop, and threading.Event that cancels it (or None)
+        self.deadline = None
+        self.stop_event = None
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Tells if a position has few enough empty cells to be solved by find_best_move().
+    # Parameters: (self is implicit)
+    #              position: The engine Position
+    # Returns: True if the solver should be used, False if not.
+    def can_solve(self, position):
+        number_of_empty_cells = position.geometry.num_squares - popcount(position.bitboards[1] | position.bitboards[2])
+        return number_of_empty_cells <= self.wld_empties
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Solves a position for its player to move.
+    # Parameters: (self is implicit)
+    #              position: The engine Position (it is not changed)
+    #              exact: True for the exact disk difference, False for win (1), draw (0) or loss (-1)
+    # Returns: The final disk difference, or its sign when exact is False.
+    def solve(self, position, exact=True):
+        self.start_search(position, None, None)
+        player = position.current_player
+        if exact:
+            score = self.solve_bitboards(position.bitboards[player], position.bitboards[3 - player],
+                                         -INFINITE_SCORE, INFINITE_SCORE, False)
+        else:
+            score = self.solve_bitboards(position.bitboards[player], position.bitboards[3 - player], -1, 1, False)
+            score = (score > 0) - (score < 0)
+        self.end_search()
+        return score
+
+        # Time Complexity:
+        # Worst case = O(b^E), E being the number of empty cells
+        # Average and Best case = O(b^(E/2)), with good move ordering
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Finds the best move of the player to move: exact below exact_empties empty cells,
+    #                     otherwise the first winning (or else drawing) move. If the time runs out or the search is
+    #                     stopped, the best move proven so far is returned (completed is then False), or None if
+    #                     not even the first root move was solved, so the caller can search the move instead.
+    #                     The score of every root move searched is kept in root_scores, with its bound type: with
+    #                     multi_pv moves, the root moves are searched against the multi_pv-th best score found so
+    #                     far, so the scores of the multi_pv best moves are exact and the others only bounds.
+    # Parameters: (self is implicit)
+    #              position: The engine Position (it is not changed)
+    #              time_limit: Time budget in seconds, or None
+    #              stop_event: threading.Event that stops the search when it is set, or None
+    #              multi_pv: Number of best moves whose exact score is wanted
+    # Returns: The best (row, col) move, or None if the player to move cannot move or no root move was solved.
+    def find_best_move(self, position, time_limit=None, stop_event=None, multi_pv=1):
+        start_time = time.perf_counter()
+        self.start_search(position, None if time_limit is None else start_time + time_limit, stop_event)
+        player = position.current_player
+        own = position.bitboards[player]
+        opponent = position.bitboards[3 - player]
+        geometry = self.geometry
+
+        self.root_scores = {}
+        root_moves = self.order_moves_fastest_first(own, opponent, legal_moves_bitboard(own, opponent, geometry))
+        if not root_moves:
+            self.end_search()
+            return None
+
+        self.exact = self.number_of_empty_cells <= self.exact_empties
+        alpha, beta = (-INFINITE_SCORE, INFINITE_SCORE) if self.exact else (-1, 1)
+        best_square = root_moves[0]
+        best_score = -INFINITE_SCORE
+        # The multi_pv best scores so far, lowest first
+        best_scores = []
+        self.completed = False
+        try:
+            for square in root_moves:
+                flipped = flip_mask_bitboard(own, opponent, square, geometry)
+                self.remove_empty(square)
+                score = -self.solve_bitboards(opponent ^ flipped, own | flipped | 1 << square, -beta, -alpha, False)
+                self.restore_empty(square)
+                if score <= alpha:
+                    self.root_scores[square] = (score, UPPER_BOUND)
+                else:
+                    self.root_scores[square] = (score, LOWER_BOUND if score >= beta else EXACT_BOUND)
+                if score > best_score:
+                    best_score = score
+                    best_square = square
+                bisect.insort(best_scores, score)
+                if len(best_scores) > multi_pv:
+                    del best_scores[0]
+                if len(best_scores) == multi_pv and best_scores[0] > alpha:
+                    alpha = best_scores[0]
+                    if alpha >= beta:
+                        break  # multi_pv wins are proven, there is nothing better to look for
+            self.completed = True
+        except SearchTimeout:
+            pass
+
+        self.search_time = time.perf_counter() - start_time
+        self.deadline = self.stop_event = None
+        self.end_search()
+        if not self.root_scores:
+            self.best_score = 0  # Stopped before the first root move was solved: nothing is proven
+            return None
+        self.best_score = best_score if self.exact else (best_score > 0) - (best_score < 0)
+        return position.move_of(best_square)
+
+        # Time Complexity: Same as solve()
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Resets the statistics and keeps the board, deadline and stop event of a new search.
+    # Parameters: (self is implicit)
+    #              position: The engine Position to solve
+    #              deadline: perf_counter() time when the search must stop, or None
+    #              stop_event: threading.Event that stops the search when it is set, or None
+    # Returns: None
+    def start_search(self, position, deadline, stop_event):
+        self.nodes_searched = 0
+        self.geometry = position.geometry
+        self.quadrant_bits = get_quadrant_bits(position.geometry)
+        self.deadline = deadline
+        self.stop_event = stop_event
+
+        # The list of empty cells is built again for every search (a timeout leaves it as it was in the search)
+        list_head = position.geometry.num_squares
+        self.next_empty = [list_head] * (list_head + 1)
+        self.previous_empty = [list_head] * (list_head + 1)
+        self.number_of_empty_cells = 0
+        self.parity = 0
+        last_square = list_head
+        for square in iterate_squares(position.geometry.full_mask & ~(position.bitboards[1] | position.bitboards[2])):
+            self.next_empty[last_square] = square
+            self.previous_empty[square] = last_square
+            last_square = square
+            self.number_of_empty_cells += 1
+            self.parity ^= self.quadrant_bits[square]
+        self.next_empty[last_square] = list_head
+        self.previous_empty[list_head] = last_square
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(E), E being the number of empty cells
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Forgets the board of the search that ended.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def end_search(self):
+        self.geometry = self.quadrant_bits = None
+        self.next_empty = self.previous_empty = None
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Takes a square out of the list of empty cells when a move is made on it, and puts it back
+    #                     (at the same place of the list) when the move is undone.
+    # Parameters: (self is implicit)
+    #              square: Index of the move square
+    # Returns: None
+    def remove_empty(self, square):
+        previous_square = self.previous_empty[square]
+        next_square = self.next_empty[square]
+        self.next_empty[previous_square] = next_square
+        self.previous_empty[next_square] = previous_square
+        self.number_of_empty_cells -= 1
+        self.parity ^= self.quadrant_bits[square]
+
+    def restore_empty(self, square):
+        self.next_empty[self.previous_empty[square]] = square
+        self.previous_empty[self.next_empty[square]] = square
+        self.number_of_empty_cells += 1
+        self.parity ^= self.quadrant_bits[square]
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Orders moves by the number of replies they leave to the opponent (fewest first), and by
+    #                     parity when equal.
+    # Parameters: (self is implicit)
+    #              own, opponent: Bitboards of the player to move and of the opponent
+    #              moves: Bitboard of the legal moves
+    # Returns: A list of square indexes.
+    def order_moves_fastest_first(self, own, opponent, moves):
+        geometry = self.geometry
+        parity = self.parity
+        quadrant_bits = self.quadrant_bits
+        keyed_moves = []
+        for square in iterate_squares(moves):
+            flipped = flip_mask_bitboard(own, opponent, square, geometry)
+            replies = popcount(legal_moves_bitboard(opponent ^ flipped, own | flipped | 1 << square, geometry))
+            odd_region = parity & quadrant_bits[square] != 0
+            keyed_moves.append((2 * replies - odd_region, square))
+        keyed_moves.sort()
+        return [square for key, square in keyed_moves]
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(M log M), M being the number of legal moves
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Orders moves by parity: moves in quadrants with an odd number of empty cells first. The
+    #                     moves are found by walking the list of empty cells.
+    # Parameters: (self is implicit)
+    #              moves: Bitboard of the legal moves, or None for all the empty cells
+    # Returns: A list of square indexes.
+    def order_moves_by_parity(self, moves=None):
+        next_empty = self.next_empty
+        list_head = len(next_empty) - 1
+        parity = self.parity
+        quadrant_bits = self.quadrant_bits
+        odd_moves = []
+        even_moves = []
+        square = next_empty[list_head]
+        while square != list_head:
+            if moves is None or moves >> square & 1:
+                if parity & quadrant_bits[square]:
+                    odd_moves.append(square)
+                else:
+                    even_moves.append(square)
+            square = next_empty[square]
+        return odd_moves + even_moves
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(E), E being the number of empty cells
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Negamax with alpha-beta pruning to the end of the game.
+    # Parameters: (self is implicit)
+    #              own, opponent: Bitboards of the player to move and of the opponent
+    #              alpha, beta: Search window, from the point of view of the player to move
+    #              passed: True if the opponent has just passed
+    # Returns: The final disk difference for the player to move (a bound when outside the window).
+    #          Raises SearchTimeout when the deadline of the search is reached or the search is stopped.
+    def solve_bitboards(self, own, opponent, alpha, beta, passed):
+        self.nodes_searched += 1
+        if not self.nodes_searched & DEADLINE_CHECK_INTERVAL:
+            if (self.deadline is not None and time.perf_counter() >= self.deadline) or \
+               (self.stop_event is not None and self.stop_event.is_set()):
+                raise SearchTimeout()
+
+        geometry = self.geometry
+        number_of_empty_cells = self.number_of_empty_cells
+        if number_of_empty_cells <= 3:
+            squares = self.order_moves_by_parity()
+            if number_of_empty_cells == 3:
+                return self.solve_last_3(own, opponent, squares, alpha, beta, passed)
+            if number_of_empty_cells == 2:
+                return self.solve_last_2(own, opponent, squares[0], squares[1], alpha, beta, passed)
+            if number_of_empty_cells == 1:
+                return self.solve_last_1(own, opponent, squares[0])
+            return popcount(own) - popcount(opponent)
+
+        moves = legal_moves_bitboard(own, opponent, geometry)
+        if not moves:
+            if passed:
+                return popcount(own) - popcount(opponent)  # Neither player can move: game over
+            return -self.solve_bitboards(opponent, own, -beta, -alpha, True)
+
+        if number_of_empty_cells >= FASTEST_FIRST_EMPTIES:
+            ordered_moves = self.order_moves_fastest_first(own, opponent, moves)
+        else:
+            ordered_moves = self.order_moves_by_parity(moves)
+
+        # The list of empty cells is updated here rather than with remove_empty() and restore_empty(): this loop
+        # runs at every node of the search
+        next_empty = self.next_empty
+        previous_empty = self.previous_empty
+        quadrant_bits = self.quadrant_bits
+        parity = self.parity
+        self.number_of_empty_cells = number_of_empty_cells - 1
+        best_score = -INFINITE_SCORE
+        for square in ordered_moves:
+            flipped = flip_mask_bitboard(own, opponent, square, geometry)
+            previous_square = previous_empty[square]
+            next_square = next_empty[square]
+            next_empty[previous_square] = next_square
+            previous_empty[next_square] = previous_square
+            self.parity = parity ^ quadrant_bits[square]
+            score = -self.solve_bitboards(opponent ^ flipped, own | flipped | 1 << square, -beta, -alpha, False)
+            next_empty[previous_square] = square
+            previous_empty[next_square] = square
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        self.parity = parity
+        self.number_of_empty_cells = number_of_empty_cells
+        return best_score
+
+        # Time Complexity:
+        # Worst case = O(b^E), E being the number of empty cells
+        # Average and Best case = O(b^(E/2))
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Last 3 empty cells: tries each one (in parity order) and solves the last 2.
+    # Parameters: (self is implicit)
+    #              own, opponent: Bitboards of the player to move and of the opponent
+    #              squares: The 3 empty squares
+    #              alpha, beta: Search window
+    #              passed: True if the opponent has just passed
+    # Returns: The final disk difference for the player to move.
+    def solve_last_3(self, own, opponent, squares, alpha, beta, passed):
+        geometry = self.geometry
+        first, second, third = squares
+        best_score = -INFINITE_SCORE
+        for square, other_1, other_2 in ((first, second, third), (second, first, third), (third, first, second)):
+            flipped = flip_mask_bitboard(own, opponent, square, geometry)
+            if flipped:
+                self.nodes_searched += 1
+                score = -self.solve_last_2(opponent ^ flipped, own | flipped | 1 << square, other_1, other_2,
+                                           -beta, -alpha, False)
+                if score > best_score:
+                    best_score = score
+                    if score > alpha:
+                        alpha = score
+                        if alpha >= beta:
+                            return best_score
+
+        if best_score == -INFINITE_SCORE:
+            if passed:
+                return popcount(own) - popcount(opponent)
+            return -self.solve_last_3(opponent, own, squares, -beta, -alpha, True)
+        return best_score
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1), at most 3 * 2 moves
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Last 2 empty cells: tries each one and solves the last one.
+    # Parameters: (self is implicit)
+    #              own, opponent: Bitboards of the player to move and of the opponent
+    #              first, second: The 2 empty squares
+    #              alpha, beta: Search window
+    #              passed: True if the opponent has just passed
+    # Returns: The final disk difference for the player to move.
+    def solve_last_2(self, own, opponent, first, second, alpha, beta, passed):
+        geometry = self.geometry
+        best_score = -INFINITE_SCORE
+        flipped = flip_mask_bitboard(own, opponent, first, geometry)
+        if flipped:
+            self.nodes_searched += 1
+            best_score = -self.solve_last_1(opponent ^ flipped, own | flipped | 1 << first, second)
+            if best_score >= beta:
+                return best_score
+        flipped = flip_mask_bitboard(own, opponent, second, geometry)
+        if flipped:
+            self.nodes_searched += 1
+            best_score = max(best_score, -self.solve_last_1(opponent ^ flipped, own | flipped | 1 << second, first))
+
+        if best_score == -INFINITE_SCORE:
+            if passed:
+                return popcount(own) - popcount(opponent)
+            return -self.solve_last_2(opponent, own, first, second, -beta, -alpha, True)
+        return best_score
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Last empty cell: the player to move plays it if possible, otherwise the opponent does,
+    #                     otherwise it stays empty.
+    # Parameters: (self is implicit)
+    #              own, opponent: Bitboards of the player to move and of the opponent
+    #              square: The empty square
+    # Returns: The final disk difference for the player to move.
+    def solve_last_1(self, own, opponent, square):
+        disk_difference = popcount(own) - popcount(opponent)
+        flipped = flip_mask_bitboard(own, opponent, square, self.geometry)
+        if flipped:
+            return disk_difference + 2 * popcount(flipped) + 1
+        flipped = flip_mask_bitboard(opponent, own, square, self.geometry)
+        if flipped:
+            return disk_difference - 2 * popcount(flipped) - 1
+        return disk_difference
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
@@ -0,0 +1,1310 @@
+import random
+
+# Seed of the Zobrist keys: they must be the same in every run, so hashes stored in files stay valid
+ZOBRIST_SEED = 20231208
+
+# All the possible move directions a player's move can flip disks
+# from the other player, as constant (0 –> the current row/column,
+# +1 –> the next row/column, -1 –> the previous row/column)
+POSSIBLE_MOVE_DIRECTIONS = [(-1, -1), (-1, 0), (-1, +1),
+                            (0, -1),           (0, +1),
+                            (+1, -1), (+1, 0), (+1, +1)]
+
+# From this board size on, the legal moves are found with log-step (Kogge-Stone) fills: on large boards the runs
+# of disks get long, and a fill that doubles its reach at every step needs fewer steps than one cell per step
+LOG_FILL_MIN_BOARD_SIZE = 22
+
+# Number of set bits of an int (int.bit_count() only exists from Python 3.10)
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:
+    def popcount(bitboard):
+        return bin(bitboard).count("1")
+
+####################################################################################################################
+# Method description: Gives the square indexes (row * board_size_n + col) of the bits set in a bitboard,
+#                     from the lowest to the highest one (that is, in row-major order).
+# Parameters: bitboard: The int whose set bits are wanted
+# Returns: A generator of square indexes.
+def iterate_squares(bitboard):
+    while bitboard:
+        lowest_bit = bitboard & -bitboard
+        yield lowest_bit.bit_length() - 1
+        bitboard ^= lowest_bit
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(K), K being the number of bits set
+    ####################################################################################################################
+
+####################################################################################################################
+# Class description: Precomputed masks for a square board of a given size. A bitboard is a Python int where
+#                    the bit (row * board_size_n + col) is set when the cell has a disk of the player.
+#                    Moving one cell in a direction is a shift of the whole bitboard; the masks remove the bits
+#                    that would wrap from one edge column to the other.
+class BoardGeometry:
+
+    def __init__(self, board_size_n):
+        self.board_size_n = board_size_n
+        self.num_squares = board_size_n * board_size_n
+        self.full_mask = (1 << self.num_squares) - 1
+
+        first_col_mask = 0
+        for row in range(board_size_n):
+            first_col_mask |= 1 << (row * board_size_n)
+        last_col_mask = first_col_mask << (board_size_n - 1)
+        not_first_col_mask = self.full_mask & ~first_col_mask
+        not_last_col_mask = self.full_mask & ~last_col_mask
+        self.not_first_col_mask = not_first_col_mask
+        self.not_last_col_mask = not_last_col_mask
+
+        first_row_mask = (1 << board_size_n) - 1
+        last_row_mask = first_row_mask << (self.num_squares - board_size_n)
+        self.edges_mask = first_col_mask | last_col_mask | first_row_mask | last_row_mask
+        self.corners_mask = (1 | (1 << (board_size_n - 1)) | (1 << (self.num_squares - board_size_n))
+                             | (1 << (self.num_squares - 1)))
+        # X-squares are the cells diagonally next to a corner, they usually give the corner to the opponent
+        self.x_squares_mask = 0
+        if board_size_n >= 4:
+            for row, col in [(1, 1), (1, board_size_n - 2), (board_size_n - 2, 1), (board_size_n - 2, board_size_n - 2)]:
+                self.x_squares_mask |= 1 << (row * board_size_n + col)
+
+        # Zobrist hashing: a random 64-bit key per (player, square), the hash of a position is the XOR of the keys
+        # of its disks, so placing or flipping a disk updates it with one or two XORs
+        zobrist_random = random.Random(ZOBRIST_SEED + board_size_n)
+        self.zobrist_keys = {1: [zobrist_random.getrandbits(64) for _ in range(self.num_squares)],
+                             2: [zobrist_random.getrandbits(64) for _ in range(self.num_squares)]}
+        # Key of a flip (the disk changes from one player to the other) and key of player 2 to move
+        self.zobrist_flip_keys = [self.zobrist_keys[1][square] ^ self.zobrist_keys[2][square]
+                                  for square in range(self.num_squares)]
+        self.zobrist_player_2_key = zobrist_random.getrandbits(64)
+
+        # (shift, mask) per direction: the mask keeps the cells that can be reached after the shift
+        # Left shifts move towards higher squares: East, South-West, South, South-East
+        self.left_shift_directions = [(1, not_first_col_mask),
+                                      (board_size_n - 1, not_last_col_mask),
+                                      (board_size_n, self.full_mask),
+                                      (board_size_n + 1, not_first_col_mask)]
+        # Right shifts move towards lower squares: West, North-East, North, North-West
+        self.right_shift_directions = [(1, not_last_col_mask),
+                                       (board_size_n - 1, not_first_col_mask),
+                                       (board_size_n, self.full_mask),
+                                       (board_size_n + 1, not_last_col_mask)]
+        # Steps of a log-step fill to cover the longest run of disks (board_size_n - 2 cells): 2^steps >= N - 2
+        self.fill_steps = max(1, (board_size_n - 3).bit_length())
+        self.use_log_fill = board_size_n >= LOG_FILL_MIN_BOARD_SIZE
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(N^2), building the masks and the Zobrist keys
+        ################################################################################################################
+
+# Geometries are immutable, so one instance per board size is shared by all the positions
+_board_geometries = {}
+
+def get_board_geometry(board_size_n):
+    if board_size_n not in _board_geometries:
+        _board_geometries[board_size_n] = BoardGeometry(board_size_n)
+    return _board_geometries[board_size_n]
+
+####################################################################################################################
+# Method description: Computes all the legal moves of a player at once with directional fills: in each direction,
+#                     the runs of opponent disks that start next to an own disk are extended one cell per step,
+#                     and the empty cell right after a run is a legal move.
+# Parameters: own: Bitboard of the player to move
+#             opponent: Bitboard of the other player
+#             geometry: BoardGeometry of the board
+# Returns: Bitboard with a bit set per legal move.
+def legal_moves_bitboard(own, opponent, geometry):
+    if geometry.use_log_fill:
+        return legal_moves_bitboard_log_fill(own, opponent, geometry)
+    empty = geometry.full_mask & ~(own | opponent)
+    moves = 0
+    for shift, mask in geometry.left_shift_directions:
+        traversable = opponent & mask
+        targets = empty & mask
+        run = (own << shift) & traversable
+        while run:
+            moves |= (run << shift) & targets
+            run = (run << shift) & traversable
+    for shift, mask in geometry.right_shift_directions:
+        traversable = opponent & mask
+        targets = empty & mask
+        run = (own >> shift) & traversable
+        while run:
+            moves |= (run >> shift) & targets
+            run = (run >> shift) & traversable
+    return moves
+
+    # Time Complexity:
+    # Worst case = O(N) shifts per direction, for runs of disks across the board
+    # Average and Best case = O(1), runs are short, so it is a few dozen integer operations
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Same as legal_moves_bitboard(), with log-step (Kogge-Stone) fills for large boards: the runs
+#                     of opponent disks next to an own disk are extended by 1, 2, 4, ... cells per step, and the
+#                     cells that can be crossed are narrowed the same way, so a direction takes log2(N) steps
+#                     whatever the length of its runs.
+# Parameters: own: Bitboard of the player to move
+#             opponent: Bitboard of the other player
+#             geometry: BoardGeometry of the board
+# Returns: Bitboard with a bit set per legal move.
+def legal_moves_bitboard_log_fill(own, opponent, geometry):
+    empty = geometry.full_mask & ~(own | opponent)
+    moves = 0
+    for shift, mask in geometry.left_shift_directions:
+        traversable = opponent & mask
+        run = (own << shift) & traversable
+        if run:
+            step = shift
+            for _ in range(geometry.fill_steps):
+                run |= traversable & (run << step)
+                traversable &= traversable << step
+                step += step
+            moves |= (run << shift) & empty & mask
+    for shift, mask in geometry.right_shift_directions:
+        traversable = opponent & mask
+        run = (own >> shift) & traversable
+        if run:
+            step = shift
+            for _ in range(geometry.fill_steps):
+                run |= traversable & (run >> step)
+                traversable &= traversable >> step
+                step += step
+            moves |= (run >> shift) & empty & mask
+    return moves
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(log N) shifts per direction
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Computes the opponent disks flipped by a move, walking from the move square in each direction.
+# Parameters: own: Bitboard of the player to move
+#             opponent: Bitboard of the other player
+#             square: Index of the move square (row * board_size_n + col)
+#             geometry: BoardGeometry of the board
+# Returns: Bitboard of the disks to flip (0 if the move does not flip anything, so it is not legal).
+def flip_mask_bitboard(own, opponent, square, geometry):
+    move_bit = 1 << square
+    flipped = 0
+    for shift, mask in geometry.left_shift_directions:
+        line = 0
+        cell = (move_bit << shift) & mask
+        while cell & opponent:
+            line |= cell
+            cell = (cell << shift) & mask
+        if cell & own:
+            flipped |= line
+    for shift, mask in geometry.right_shift_directions:
+        line = 0
+        cell = (move_bit >> shift) & mask
+        while cell & opponent:
+            line |= cell
+            cell = (cell >> shift) & mask
+        if cell & own:
+            flipped |= line
+    return flipped
+
+    # Time Complexity:
+    # Worst case = O(N), if it needs to flip disks across the board
+    # Average and Best case = O(1), few cells per direction
+    ####################################################################################################################
+
+####################################################################################################################
+# Class description: This class holds the state of an Othello position independently of any GUI. It has no
+#                    game2dboard/Tk dependency, so the AI can search on it without repainting the board widget,
+#                    and it can run on headless servers.
+#                    The disks are stored as two bitboards (one int per player), so legal moves and flips are
+#                    computed with shifts and masks instead of scanning every cell in every direction.
+class Position:
+
+    ####################################################################################################################
+    # Method description: The constructor creates a position for a square board and resets it
+    #                     to the starting four disks.
+    # Parameters: (self is implicit)
+    #              board_size_n: The number of rows and columns of the board
+    def __init__(self, board_size_n=8):
+        self.board_size_n = board_size_n
+        self.geometry = get_board_geometry(board_size_n)
+        # Stack of states saved before each move, used to undo moves while searching
+        self.move_history = []
+        # Pattern evaluation of the search (attach_pattern_evaluator()) and the indices of this position
+        self.pattern_evaluator = None
+        self.pattern_indices = None
+        self.reset()
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1), geometries are shared between positions
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Resets the position to the starting one, with the first 4 disks in the middle of the board
+    #                     and player 1 (Human-user) to move.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def reset(self):
+        # Dictionaries indexed by the Player's number (1 or 2), as the number of disks
+        self.bitboards = {1: 0, 2: 0}
+        self.num_disks_dictionary = {1: 0, 2: 0}
+        self.zobrist_hash = 0
+        self.move_history.clear()
+        self.current_player = 1
+
+        if self.board_size_n < 2:
+            return
+
+        coord1 = int(self.board_size_n / 2 - 1)
+        coord2 = int(self.board_size_n / 2)
+        initial_cells = [(coord1, coord2), (coord1, coord1),
+                         (coord2, coord1), (coord2, coord2)]
+        for i in range(len(initial_cells)):
+            color = i % 2
+            self.bitboards[color + 1] |= 1 << self.square_of(initial_cells[i])
+            self.num_disks_dictionary[color + 1] += 1
+        self.zobrist_hash = self.compute_zobrist_hash()
+        self.refresh_pattern_indices()
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Creates an independent copy of the position (without its move history), e.g. to search
+    #                     it while the original one keeps being used.
+    # Parameters: None (self is implicit)
+    # Returns: The new Position.
+    def copy(self):
+        position_copy = type(self).__new__(type(self))
+        position_copy.board_size_n = self.board_size_n
+        position_copy.geometry = self.geometry
+        position_copy.move_history = []
+        position_copy.bitboards = dict(self.bitboards)
+        position_copy.num_disks_dictionary = dict(self.num_disks_dictionary)
+        position_copy.zobrist_hash = self.zobrist_hash
+        position_copy.current_player = self.current_player
+        position_copy.pattern_evaluator = self.pattern_evaluator
+        position_copy.pattern_indices = list(self.pattern_indices) if self.pattern_indices is not None else None
+        return position_copy
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Converts a (row, col) move to its square index in the bitboards, and back.
+    # Parameters: (self is implicit)
+    #              move (tuple) / square (int)
+    # Returns: The square index / the (row, col) tuple.
+    def square_of(self, move):
+        return move[0] * self.board_size_n + move[1]
+
+    def move_of(self, square):
+        return divmod(square, self.board_size_n)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This function verifies if a set of coordinates, given as row and column, are within the bounds of a board.
+    # Parameters: (self is implicit)
+    #              row: The row coordinate to check
+    #              col: The column coordinate to check
+    # Returns: True if row and col are valid, False if not.
+    def coord_is_valid(self, row, col):
+        return 0 <= row < self.board_size_n and 0 <= col < self.board_size_n
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Returns the content of a cell: None if empty, or the number of the player owning the disk.
+    # Parameters: (self is implicit)
+    #              row, col: The coordinates of the cell
+    # Returns: None, 1 or 2
+    def get_cell(self, row, col):
+        square_bit = 1 << (row * self.board_size_n + col)
+        if self.bitboards[1] & square_bit:
+            return 1
+        if self.bitboards[2] & square_bit:
+            return 2
+        return None
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This function creates and returns an independent copy of the current state of all
+    #                     cells in the position, as a matrix (list of rows) with None, 1 or 2 per cell.
+    # Parameters: None (self is implicit)
+    # Returns: A copy of the current state of all cells.
+    def copy_board_cell_states(self):
+        return [[self.get_cell(row, col) for col in range(self.board_size_n)] for row in range(self.board_size_n)]
+
+        # Time Complexity:
+        # Worst, Average, Best = O(N^2), as it reads each cell in the board
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Replaces the whole position with the given cell states, e.g. when the user undoes moves.
+    # Parameters: (self is implicit)
+    #              board_cell_states: Matrix (list of rows) with None, 1 or 2 per cell
+    #              current_player: The player to move in the loaded position
+    # Returns: None
+    def load_board_cell_states(self, board_cell_states, current_player):
+        self.bitboards = {1: 0, 2: 0}
+        for row in range(self.board_size_n):
+            for col in range(self.board_size_n):
+                cell = board_cell_states[row][col]
+                if cell in self.bitboards:
+                    self.bitboards[cell] |= 1 << (row * self.board_size_n + col)
+        self.current_player = current_player
+        self.num_disks_dictionary = self.count_disks()
+        self.zobrist_hash = self.compute_zobrist_hash()
+        self.move_history.clear()
+        self.refresh_pattern_indices()
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(N^2), reading all cells
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Replaces the whole position with the given bitboards, e.g. to search a position sent to
+    #                     another process (two ints are cheaper to send than the cells).
+    # Parameters: (self is implicit)
+    #              player_1_disks, player_2_disks: Bitboards of the disks of each player
+    #              current_player: The player to move in the loaded position
+    # Returns: None
+    def load_bitboards(self, player_1_disks, player_2_disks, current_player):
+        self.bitboards = {1: player_1_disks, 2: player_2_disks}
+        self.current_player = current_player
+        self.num_disks_dictionary = self.count_disks()
+        self.zobrist_hash = self.compute_zobrist_hash()
+        self.move_history.clear()
+        self.refresh_pattern_indices()
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(D), D being the number of disks to hash
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Attaches a pattern evaluation (othello_patterns.PatternEvaluator) to the position: its
+    #                     pattern indices are computed, and from then on apply_move() and undo_last_move() keep them
+    #                     up to date, so the search evaluates a leaf without reading its cells.
+    # Parameters: (self is implicit)
+    #              pattern_evaluator: The PatternEvaluator of the board size, or None to detach it
+    # Returns: None
+    def attach_pattern_evaluator(self, pattern_evaluator):
+        self.pattern_evaluator = pattern_evaluator
+        self.refresh_pattern_indices()
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(D), D being the number of disks
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Computes the pattern indices from scratch, when a whole position is set.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def refresh_pattern_indices(self):
+        if self.pattern_evaluator is None:
+            self.pattern_indices = None
+        else:
+            self.pattern_indices = self.pattern_evaluator.compute_indices(self.bitboards[1], self.bitboards[2])
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(D), D being the number of disks
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This function is used to count the number of disks for each player in the position.
+    # Parameters: None (self is implicit)
+    # Returns: A dictionary with the number of disks for each player.
+    def count_disks(self):
+        return {1: popcount(self.bitboards[1]), 2: popcount(self.bitboards[2])}
+
+        # Time Complexity: O(1), a popcount per player
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Computes the Zobrist hash of the disks from scratch. The position keeps it up to date in
+    #                     self.zobrist_hash while moves are made and undone.
+    # Parameters: None (self is implicit)
+    # Returns: The 64-bit hash of the disks.
+    def compute_zobrist_hash(self):
+        zobrist_hash = 0
+        for player_number in (1, 2):
+            for square in iterate_squares(self.bitboards[player_number]):
+                zobrist_hash ^= self.geometry.zobrist_keys[player_number][square]
+        return zobrist_hash
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(D), D being the number of disks
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Key identifying the position (disks and player to move) in transposition tables and books.
+    # Parameters: None (self is implicit)
+    # Returns: The 64-bit key.
+    def hash_key(self):
+        if self.current_player == 2:
+            return self.zobrist_hash ^ self.geometry.zobrist_player_2_key
+        return self.zobrist_hash
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Computes the bitboard of all the legal moves of a player.
+    # Parameters: (self is implicit)
+    #              player_number: The number of the player to move
+    # Returns: Bitboard with a bit set per legal move.
+    def legal_moves_mask(self, player_number):
+        return legal_moves_bitboard(self.bitboards[player_number], self.bitboards[3 - player_number], self.geometry)
+
+        # Time Complexity: Inherits from legal_moves_bitboard, O(1) on average
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Computes the bitboard of the opponent's disks flipped by a move of a player.
+    # Parameters: (self is implicit)
+    #              move (tuple): The (row, col) coordinate of the move
+    #              player_number: The number of the player making the move
+    # Returns: Bitboard of the flipped disks, 0 if the move is not legal.
+    def flip_mask_for_move(self, move, player_number):
+        if move == () or not self.coord_is_valid(move[0], move[1]):
+            return 0
+        square = self.square_of(move)
+        if (self.bitboards[1] | self.bitboards[2]) >> square & 1:
+            return 0
+        return flip_mask_bitboard(self.bitboards[player_number], self.bitboards[3 - player_number],
+                                  square, self.geometry)
+
+        # Time Complexity: Inherits from flip_mask_bitboard, O(1) on average
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Determines if a player's move is legal, i.e. if it captures any of the opponent's disks.
+    # Parameters: (self is implicit)
+    #              move (tuple): The (row, col) coordinate of where the player can make/try a move
+    #              player_number: The number of the player making the move
+    # Returns: True if the player's move is possible, False if not.
+    def move_has_disk_to_flip(self, move, player_number):
+        return self.flip_mask_for_move(move, player_number) != 0
+
+        # Time Complexity: O(1) on average, a walk of a few cells per direction
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Places a disk of the current player on a square and flips the given disks. Only the square,
+    #                     the flipped mask and the player are recorded, so undo_last_move() can XOR them back.
+    #                     The player to move is not changed, the caller decides whose turn is next.
+    # Parameters: (self is implicit)
+    #              square: Index of the move square (row * board_size_n + col)
+    #              flipped: Bitboard of the disks flipped by the move, as given by flip_mask_for_move()
+    # Returns: None
+    def apply_move(self, square, flipped):
+        player = self.current_player
+        self.move_history.append((square, flipped, player))
+
+        number_of_flipped_disks = popcount(flipped)
+        self.bitboards[player] |= flipped | (1 << square)
+        self.bitboards[3 - player] ^= flipped
+        self.num_disks_dictionary[player] += number_of_flipped_disks + 1
+        self.num_disks_dictionary[3 - player] -= number_of_flipped_disks
+        self.zobrist_hash ^= self.zobrist_delta(square, flipped, player)
+        if self.pattern_evaluator is not None:
+            self.pattern_evaluator.apply_move(self.pattern_indices, square, flipped, player)
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(F), F being the number of flipped disks to hash
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Places a disk for the current player and flips the opponent's disks, if the move is legal.
+    #                     The move can be reverted with undo_last_move().
+    # Parameters: (self is implicit)
+    #              move (tuple): The (row, col) coordinate of where the player makes a move
+    # Returns: The list of (row, col) cells that changed (placed disk first), or an empty list if the move is not legal.
+    def make_move(self, move):
+        flipped = self.flip_mask_for_move(move, self.current_player)
+        if not flipped:
+            return []
+
+        self.apply_move(self.square_of(move), flipped)
+        return [move] + [self.move_of(square) for square in iterate_squares(flipped)]
+
+        # Time Complexity:
+        # Worst, Average and Best case = O(F), F being the number of flipped disks listed as changed cells
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Reverts the last move made with make_move() or apply_move(), XOR-ing the placed disk and the
+    #                     flipped disks back and updating the number of disks of each player.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def undo_last_move(self):
+        if not self.move_history:
+            return
+
+        square, flipped, player = self.move_history.pop()
+
+        number_of_flipped_disks = popcount(flipped)
+        self.bitboards[player] ^= flipped | (1 << square)
+        self.bitboards[3 - player] ^= flipped
+        self.num_disks_dictionary[player] -= number_of_flipped_disks + 1
+        self.num_disks_dictionary[3 - player] += number_of_flipped_disks
+        self.zobrist_hash ^= self.zobrist_delta(square, flipped, player)
+        if self.pattern_evaluator is not None:
+            self.pattern_evaluator.undo_move(self.pattern_indices, square, flipped, player)
+        self.current_player = player
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(F), F being the number of flipped disks to hash
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Change of the Zobrist hash made by a move (the same XOR applies the move and undoes it).
+    # Parameters: (self is implicit)
+    #              square: Index of the move square
+    #              flipped: Bitboard of the flipped disks
+    #              player: The player making the move
+    # Returns: The value to XOR into the hash.
+    def zobrist_delta(self, square, flipped, player):
+        delta = self.geometry.zobrist_keys[player][square]
+        flip_keys = self.geometry.zobrist_flip_keys
+        while flipped:
+            lowest_bit = flipped & -flipped
+            delta ^= flip_keys[lowest_bit.bit_length() - 1]
+            flipped ^= lowest_bit
+        return delta
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(F), F being the number of flipped disks
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This function checks if the player has any possible moves left on the board.
+    # Parameters: (self is implicit)
+    #              player_number: The number of the player making the move
+    # Returns: True if the player has possible moves, False if not.
+    def player_can_move(self, player_number):
+        return self.legal_moves_mask(player_number) != 0
+
+        # Time Complexity: Inherits from legal_moves_mask, O(1) on average
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Same as player_can_move() function but for the current player.
+    # Parameters: None (self is implicit)
+    # Returns: True if the current player has possible moves, False if not.
+    def current_player_can_move(self):
+        return self.player_can_move(self.current_player)
+
+        # Time Complexity: Inherits from player_can_move
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This function generates a list of all valid move coordinates that the current player can make.
+    # Parameters: None (self is implicit)
+    # Returns: A list of possible moves in row-major order. Every move is a tuple of coordinates (row, col).
+    def get_possible_moves_by_current_player(self):
+        return [self.move_of(square) for square in iterate_squares(self.legal_moves_mask(self.current_player))]
+
+        # Time Complexity:
+        # Worst, Average and Best case = O(M), M being the number of legal moves
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Calculates and returns a score after a potential move
+    #                     depending on the changes of the state of the board.
+    #                     This takes into account the number of disks, corners and edges.
+    # Parameters: (self is implicit)
+    #              player_number: The player who made the move (the AI when it searches its move)
+    #              original_number_of_disks: The number of disks of the player before the move
+    #              original_board: Bitboard of the player before the move
+    #              after_move_board: Bitboard of the player after the move
+    # Returns: A score that represents how effective the move was.
+    def evaluate_board_state(self, player_number, original_number_of_disks, original_board, after_move_board):
+        # 1. Number of new disks for the player
+        score = self.num_disks_dictionary[player_number] - original_number_of_disks
+
+        # 2. Control of corners (corners are more valuable)
+        if self.ai_has_new_disk_in_corner(original_board, after_move_board):
+            score += 25
+
+        # 3. Control of edges
+        if self.ai_has_new_disk_on_edge(original_board, after_move_board):
+            score += 10
+
+        return score
+
+        # Time Complexity:
+        # Worst, Average and Best case = O(1), the disks are already counted by the position
+        ################################################################################################################################
+
+    ###################################################################################################################################
+    # Method description: This function checks if the AI move has a new disk in a corner
+    #                     based on the differences between the original board and the board after the move.
+    # Parameters: (self is implicit)
+    #              original_board: Bitboard of the AI player before the move
+    #              after_move_board: Bitboard of the AI player after the move
+    # Returns: True if the AI move has a new disk in a corner, False if not.
+    def ai_has_new_disk_in_corner(self, original_board, after_move_board):
+        new_ai_disks = after_move_board & ~original_board
+        return (new_ai_disks & self.geometry.corners_mask) != 0
+
+        # Time Complexity:
+        # Worst, Average and Best case = O(1), a mask of the corners
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This function checks if the AI move has a new disk in an edge based on the differences between
+    #                     the original board and the board after the move.
+    # Parameters: (self is implicit)
+    #              original_board: Bitboard of the AI player before the move
+    #              after_move_board: Bitboard of the AI player after the move
+    # Returns: True if the AI move has a new disk in an edge, False if not.
+    def ai_has_new_disk_on_edge(self, original_board, after_move_board):
+        new_ai_disks = after_move_board & ~original_board
+        return (new_ai_disks & self.geometry.edges_mask) != 0
+
+        # Time Complexity:
+        # Worst, Average and Best case = O(1), a mask of the edges
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This method simulates a move, analyses its effect, and then returns the position to its initial
+    #                     configuration in order to determine how effective a particular move is.
+    # Parameters: (self is implicit)
+    #              move: The move to evaluate
+    # Returns: A score that represents how effective the move was.
+    def evaluate_move_greedy(self, move):
+        player = self.current_player
+        original_number_of_disks = self.num_disks_dictionary[player]
+        original_board = self.bitboards[player]
+
+        # Make the move (including flips) temporarily to simulate the move
+        self.apply_move(self.square_of(move), self.flip_mask_for_move(move, player))
+        score = self.evaluate_board_state(player, original_number_of_disks, original_board, self.bitboards[player])
+
+        # Revert the move and flips
+        self.undo_last_move()
+        return score
+
+        # Time Complexity:
+        # Worst, Average and Best case = O(1), the move is applied and reverted with its flipped mask
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This function can predict the outcome of a move several turns in advance
+    #                     helping the AI to determine its next move.
+    # Parameters: (self is implicit)
+    #              move: The move to evaluate
+    #              current_depth: The current depth of the game tree
+    #              max_depth: The maximum depth of the game tree
+    # Returns: A score that represents how effective the move was.
+    def evaluate_move_minimax(self, move, current_depth=0, max_depth=3):
+        player = self.current_player
+        original_number_of_disks = self.num_disks_dictionary[player]
+        original_board = self.bitboards[player]
+
+        # Make the move (including flips) temporarily to simulate the move
+        self.apply_move(self.square_of(move), self.flip_mask_for_move(move, player))
+
+        # Evaluate the board after making the move
+        score = self.evaluate_board_state(player, original_number_of_disks, original_board, self.bitboards[player])
+
+        if current_depth != max_depth:
+            # Depending on the depth, switch between AI and opponent moves
+            next_player = self.current_player if current_depth % 2 == 0 else 3 - self.current_player
+
+            # Generate potential moves for the next player
+            for next_square in iterate_squares(self.legal_moves_mask(self.current_player)):
+                if next_player == self.current_player:
+                    # Maximize AI score
+                    score += self.evaluate_move_minimax(self.move_of(next_square), current_depth + 1, max_depth)
+                else:
+                    # Minimize opponent score
+                    score -= self.evaluate_move_minimax(self.move_of(next_square), current_depth + 1, max_depth)
+
+        self.undo_last_move()
+        return score
+
+        # Time Complexity:
+        # Average and Worst Case: O(b^d), where b is the branching factor and d is max_depth
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Chooses a random move among the possible moves for the current player (Easy difficulty).
+    # Parameters: None (self is implicit)
+    # Returns: The (row, col) move chosen, or None if the current player cannot move.
+    def find_random_move(self):
+        possible_moves = self.get_possible_moves_by_current_player()
+        if possible_moves:
+            return random.choice(possible_moves)
+        return None
+
+        # Time Complexity:
+        # Constant in all cases at O(N^2), creating the list of moves
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Finds the best possible move for the current player, using the greedy (Medium, "M")
+    #                     or minimax (Hard, "H") algorithms. The search only touches this position, never a GUI.
+    # Parameters: (self is implicit)
+    #              difficulty: "M" or "H"
+    # Returns: The best (row, col) move, or None if the current player cannot move.
+    def find_best_move(self, difficulty):
+        best_score = float('-inf')
+        best_move = None
+
+        for move in self.get_possible_moves_by_current_player():
+            if difficulty == "H":
+                score = self.evaluate_move_minimax(move)
+            else:
+                score = self.evaluate_move_greedy(move)
+
+            # Select the move with the highest score
+            if score > best_score:
+                best_score = score
+                best_move = move
+
+        return best_move
+
+        # TimeComplexity:
+        # Worst case = O(N * M), maximum number of possible moves to consider times the cost of evaluating each one
+        # Best case = O(N), evaluating a single move
+        ################################################################################################################################
+
+####################################################################################################################
+# Class description: Legal moves of both players of a Position, kept for the turn loop of the game: the pass, click
+#                    and game over checks of a turn all ask for the same moves. The two bitboards of legal moves are
+#                    computed once per change of the disks (the disks themselves are the key of the cache, so moves,
+#                    undos and loads made by anyone are seen), and every question in between is a bit test.
+class LegalMoveCache:
+
+    ################################################################################################################################
+    # Method description: Creates the cache of a position.
+    # Parameters: (self is implicit)
+    #              position: The Position whose legal moves are kept
+    def __init__(self, position):
+        self.position = position
+        # Disks of both players the masks were computed for, None before the first computation
+        self.board_key = None
+        self.masks = {1: 0, 2: 0}
+        # Number of times the masks were computed, to check how often the cache is refreshed
+        self.refreshes = 0
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Computes the legal moves of both players again if the disks changed since the last time.
+    # Parameters: None (self is implicit)
+    # Returns: The dictionary {player number: bitboard of legal moves}.
+    def refresh(self):
+        bitboards = self.position.bitboards
+        board_key = (bitboards[1], bitboards[2])
+        if board_key != self.board_key:
+            geometry = self.position.geometry
+            self.masks[1] = legal_moves_bitboard(bitboards[1], bitboards[2], geometry)
+            self.masks[2] = legal_moves_bitboard(bitboards[2], bitboards[1], geometry)
+            self.board_key = board_key
+            self.refreshes += 1
+        return self.masks
+
+        # Time Complexity:
+        # Worst case = Inherits from legal_moves_bitboard, twice, after a change of the disks
+        # Average and Best case = O(1), the disks did not change
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Bitboard of the legal moves of a player.
+    # Parameters: (self is implicit)
+    #              player_number: The number of the player
+    # Returns: Bitboard with a bit set per legal move.
+    def moves_mask(self, player_number):
+        return self.refresh()[player_number]
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Tells if a move is legal for a player.
+    # Parameters: (self is implicit)
+    #              move (tuple): The (row, col) coordinate of the move
+    #              player_number: The number of the player making the move
+    # Returns: True if the move is legal, False if not (also for coordinates outside the board).
+    def is_legal(self, move, player_number):
+        if move == () or not self.position.coord_is_valid(move[0], move[1]):
+            return False
+        return self.refresh()[player_number] >> self.position.square_of(move) & 1 == 1
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Tells if a player has a legal move (if not, the player passes).
+    # Parameters: (self is implicit)
+    #              player_number: The number of the player
+    # Returns: True if the player can move, False if not.
+    def player_can_move(self, player_number):
+        return self.refresh()[player_number] != 0
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Tells if the game is over, when neither player can move.
+    # Parameters: None (self is implicit)
+    # Returns: True if the game is over, False if not.
+    def game_is_over(self):
+        masks = self.refresh()
+        return masks[1] == 0 and masks[2] == 0
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Lists the legal moves of a player.
+    # Parameters: (self is implicit)
+    #              player_number: The number of the player
+    # Returns: A list of (row, col) moves in row-major order.
+    def moves(self, player_number):
+        return [self.position.move_of(square) for square in iterate_squares(self.refresh()[player_number])]
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(M), M being the number of legal moves
+        ################################################################################################################################
+
+####################################################################################################################
+# Class description: Reference implementation of the rules on a mailbox (matrix of cells) representation, where
+#                    cells contain None (empty), 1 (player 1, black) or 2 (player 2, white). Moves are found by
+#                    scanning cells in every direction, as the Game class originally did. It has the same
+#                    interface as Position, and it is kept to check and benchmark the bitboard move generation.
+#                    Only the frontier cells (empty cells next to a disk) can be moves, so the position keeps them
+#                    in a set, updated by make_move() and undo_last_move(), and the move generation scans those.
+class MailboxPosition:
+
+    ####################################################################################################################
+    # Method description: The constructor creates an empty position for a square board and resets it
+    #                     to the starting four disks.
+    # Parameters: (self is implicit)
+    #              board_size_n: The number of rows and columns of the board
+    def __init__(self, board_size_n=8):
+        self.board_size_n = board_size_n
+        # Stack of states saved before each move, used to undo moves while searching
+        self.move_history = []
+        self.reset()
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(N^2), creating the cells of the board
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Resets the position to the starting one, with the first 4 disks in the middle of the board
+    #                     and player 1 (Human-user) to move.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def reset(self):
+        self.cells = [[None for _ in range(self.board_size_n)] for _ in range(self.board_size_n)]
+        self.move_history.clear()
+        self.current_player = 1
+        # Empty cells next to at least one disk, the only cells where a move can be legal
+        self.frontier = set()
+
+        # Use a dictionary to store the number of disks for each player
+        # so, index 0 (if it was an array) is not used and this way with dictionary
+        # the index coincides with the Player's number (1 or 2).
+        self.num_disks_dictionary = {1: 0, 2: 0}
+
+        if self.board_size_n < 2:
+            return
+
+        coord1 = int(self.board_size_n / 2 - 1)
+        coord2 = int(self.board_size_n / 2)
+        initial_cells = [(coord1, coord2), (coord1, coord1),
+                         (coord2, coord1), (coord2, coord2)]
+        for i in range(len(initial_cells)):
+            color = i % 2
+            row = initial_cells[i][0]
+            col = initial_cells[i][1]
+
+            self.cells[row][col] = color + 1
+            self.num_disks_dictionary[color + 1] += 1
+        self.frontier = self.compute_frontier()
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(N^2), clearing all the cells
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This function verifies if a set of coordinates, given as row and column, are within the bounds of a board.
+    # Parameters: (self is implicit)
+    #              row: The row coordinate to check
+    #              col: The column coordinate to check
+    # Returns: True if row and col are valid, False if not.
+    def coord_is_valid(self, row, col):
+        return 0 <= row < self.board_size_n and 0 <= col < self.board_size_n
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Returns the content of a cell: None if empty, or the number of the player owning the disk.
+    # Parameters: (self is implicit)
+    #              row, col: The coordinates of the cell
+    # Returns: None, 1 or 2
+    def get_cell(self, row, col):
+        return self.cells[row][col]
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This function creates and returns an independent copy of the current state of all
+    #                     cells in the position (list of rows).
+    # Parameters: None (self is implicit)
+    # Returns: A copy of the current state of all cells.
+    def copy_board_cell_states(self):
+        return [list(row) for row in self.cells]
+
+        # Time Complexity:
+        # Worst, Average, Best = O(N^2), as it copies each cell in the board
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Replaces the whole position with the given cell states, e.g. when the user undoes moves.
+    # Parameters: (self is implicit)
+    #              board_cell_states: Matrix (list of rows) with None, 1 or 2 per cell
+    #              current_player: The player to move in the loaded position
+    # Returns: None
+    def load_board_cell_states(self, board_cell_states, current_player):
+        self.cells = [list(row) for row in board_cell_states]
+        self.current_player = current_player
+        self.num_disks_dictionary = self.count_disks()
+        self.frontier = self.compute_frontier()
+        self.move_history.clear()
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(N^2), copying and counting all cells
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This function is used to count the number of disks for each player in the position.
+    # Parameters: None (self is implicit)
+    # Returns: A dictionary with the number of disks for each player.
+    def count_disks(self):
+        num_disks_dictionary = {1: 0, 2: 0}
+        for row in self.cells:
+            for cell in row:
+                if cell in num_disks_dictionary:
+                    num_disks_dictionary[cell] += 1
+        return num_disks_dictionary
+
+        # Time Complexity: O(N^2): The function cycles through every cell.
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Lists the empty cells next to a cell (the cells that join the frontier when a disk is
+    #                     placed on it).
+    # Parameters: (self is implicit)
+    #              row, col: The coordinates of the cell
+    # Returns: A list of (row, col) cells.
+    def empty_neighbours(self, row, col):
+        neighbours = []
+        for direction in POSSIBLE_MOVE_DIRECTIONS:
+            neighbour_row = row + direction[0]
+            neighbour_col = col + direction[1]
+            if self.coord_is_valid(neighbour_row, neighbour_col) and self.cells[neighbour_row][neighbour_col] is None:
+                neighbours.append((neighbour_row, neighbour_col))
+        return neighbours
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1), 8 neighbours
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Finds the frontier cells from scratch, when a whole position is set.
+    # Parameters: None (self is implicit)
+    # Returns: The set of (row, col) empty cells next to at least one disk.
+    def compute_frontier(self):
+        frontier = set()
+        for row in range(self.board_size_n):
+            for col in range(self.board_size_n):
+                if self.cells[row][col] is not None:
+                    frontier.update(self.empty_neighbours(row, col))
+        return frontier
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(N^2)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Checks if the player has any adversary's disk to flip with the move to make
+    #                     in the given direction.
+    # Parameters: (self is implicit)
+    #              move (tuple): The (row, col) coordinate of where the player makes a move
+    #              direction (tuple): The direction in which the adversary's disk/s are to be flipped
+    #              player_number: The number of the player making the move
+    # Returns: True if there is any disk to flip, False if not.
+    def direction_has_disk_to_flip(self, move, direction, player_number):
+        cells = self.cells
+        disk_type_to_flip = 3 - player_number
+
+        distance = 1
+        disks_to_flip_counter = 0
+        while True:
+            row = move[0] + direction[0] * distance
+            col = move[1] + direction[1] * distance
+
+            if not self.coord_is_valid(row, col) or cells[row][col] == None:  # Empty cell
+                return False
+            elif cells[row][col] == player_number:
+                # Current player color disk found, so stop direction and exit
+                break
+            elif cells[row][col] == disk_type_to_flip:
+                # Disk color is the one to flip, so continue looking in the same direction
+                distance += 1
+                disks_to_flip_counter += 1
+
+        return (disks_to_flip_counter > 0)
+
+        # Time Complexity:
+        # Worst case = O(N), entire board
+        # Average and Best case = O(1), only few cells checks or only one
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Determines if a player's move is legal, i.e. if it captures any of the opponent's disks.
+    # Parameters: (self is implicit)
+    #              move (tuple): The (row, col) coordinate of where the player can make/try a move
+    #              player_number: The number of the player making the move
+    # Returns: True if the player's move is possible, False if not.
+    def move_has_disk_to_flip(self, move, player_number):
+        if move != () and self.coord_is_valid(move[0], move[1]) \
+           and self.cells[move[0]][move[1]] == None:
+            for direction in POSSIBLE_MOVE_DIRECTIONS:
+                if self.direction_has_disk_to_flip(move, direction, player_number):
+                    return True
+
+        return False
+
+        # Time Complexity:
+        # Worst case = O(N), must check all
+        # Average case = O(1), early return
+        # Best case = O(1),  initial conditions fail
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Flips the contrary's disks for the current move being applied, along all valid directions,
+    #                     and updates the number of disks of each player.
+    # Parameters: (self is implicit)
+    #              move (tuple): The (row, col) coordinate of where the player makes a move
+    # Returns: The list of (row, col) coordinates of the flipped disks.
+    def flip_disks_for_move(self, move):
+        cells = self.cells
+        current_disk_type = self.current_player
+        flipped_disks = []
+        for direction in POSSIBLE_MOVE_DIRECTIONS:
+            if self.direction_has_disk_to_flip(move, direction, current_disk_type):
+                distance = 1
+                while True:
+                    row = move[0] + direction[0] * distance
+                    col = move[1] + direction[1] * distance
+                    # If the current cell has a disk of the current player, stop and exit.
+                    if cells[row][col] == current_disk_type:
+                        break
+                    cells[row][col] = current_disk_type
+                    flipped_disks.append((row, col))
+                    distance += 1
+
+        self.num_disks_dictionary[current_disk_type] += len(flipped_disks)
+        self.num_disks_dictionary[3 - current_disk_type] -= len(flipped_disks)
+        return flipped_disks
+
+        # Time Complexity:
+        # Worst case = O(N), if it needs to flip disks across the board
+        # Average case = O(1), few flipped
+        # Best case = O(1), no flip
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Places a disk for the current player and flips the opponent's disks. The move, its player,
+    #                     its flipped disks and the cells it added to the frontier are saved, so the move can be
+    #                     reverted with undo_last_move(). The player to move is not changed, the caller decides whose
+    #                     turn is next (as the Game class always did).
+    # Parameters: (self is implicit)
+    #              move (tuple): The (row, col) coordinate of where the player makes a move
+    # Returns: The list of (row, col) cells that changed (placed disk first), or an empty list if the move is not legal.
+    def make_move(self, move):
+        if not self.move_has_disk_to_flip(move, self.current_player):
+            return []
+
+        # The move cell leaves the frontier and its empty neighbours join it (a flip does not change the frontier)
+        new_frontier_cells = [cell for cell in self.empty_neighbours(move[0], move[1]) if cell not in self.frontier]
+        self.cells[move[0]][move[1]] = self.current_player
+        self.num_disks_dictionary[self.current_player] += 1
+        self.frontier.discard(move)
+        self.frontier.update(new_frontier_cells)
+        flipped_disks = self.flip_disks_for_move(move)
+        self.move_history.append((move, self.current_player, flipped_disks, new_frontier_cells))
+        return [move] + flipped_disks
+
+        # Time Complexity:
+        # Worst case = O(N), if it flips disks across the board
+        # Average case = O(1), a few flipped disks and neighbours
+        # Best case = O(1), if the move is not legal
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Reverts the last move made with make_move(): the flipped disks go back to the opponent and
+    #                     the move cell is emptied.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def undo_last_move(self):
+        if not self.move_history:
+            return
+
+        move, player, flipped_disks, new_frontier_cells = self.move_history.pop()
+        cells = self.cells
+        for row, col in flipped_disks:
+            cells[row][col] = 3 - player
+        cells[move[0]][move[1]] = None
+        self.num_disks_dictionary[player] -= len(flipped_disks) + 1
+        self.num_disks_dictionary[3 - player] += len(flipped_disks)
+        self.current_player = player
+        self.frontier.difference_update(new_frontier_cells)
+        self.frontier.add(move)  # A legal move is always next to a disk
+
+        # Time Complexity:
+        # Worst case = O(N), if the move flipped disks across the board
+        # Average and Best case = O(1), a few flipped disks
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This function checks if the player has any possible moves left on the board.
+    # Parameters: (self is implicit)
+    #              player_number: The number of the player making the move
+    # Returns: True if the player has possible moves, False if not.
+    def player_can_move(self, player_number):
+        for move in self.frontier:
+            if self.move_has_disk_to_flip(move, player_number):
+                return True
+        return False
+
+        # Time Complexity:
+        # Worst and Average case = O(F), scanning the F frontier cells for a valid move
+        # Best case = O(1), if an early valid move is found
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Same as player_can_move() function but for the current player.
+    # Parameters: None (self is implicit)
+    # Returns: True if the current player has possible moves, False if not.
+    def current_player_can_move(self):
+        return self.player_can_move(self.current_player)
+
+        # Time Complexity: Inherits from player_can_move
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Calculates and returns a score after a potential move, like the original Medium/Hard
+    #                     evaluation of the Game class: it scans the whole board to count the disks, and the
+    #                     corner/edge checks scan it again (kept as the reference of the evaluation benchmark).
+    # Parameters: (self is implicit)
+    #              original_number_of_disks_AI_player: The number of disks for the AI player before the move
+    #              original_board: The cells before the move
+    #              after_move_board: The cells after the move
+    # Returns: A score that represents how effective the move was.
+    def evaluate_board_state(self, original_number_of_disks_AI_player, original_board, after_move_board):
+        score = 0
+
+        # 1. Count the number of pieces for AI and opponent
+        ai_pieces = 0
+        opponent_pieces = 0
+        for row in range(self.board_size_n):
+            for col in range(self.board_size_n):
+                if self.cells[row][col] == 2:  # Assuming AI is player 2
+                    ai_pieces += 1
+                elif self.cells[row][col] == 1:
+                    opponent_pieces += 1
+
+        score += ai_pieces - original_number_of_disks_AI_player
+
+        # 2. Control of corners (corners are more valuable)
+        if self.ai_has_new_disk_in_corner(original_board, after_move_board):
+            score += 25
+
+        # 3. Control of edges
+        if self.ai_has_new_disk_on_edge(original_board, after_move_board):
+            score += 10
+
+        return score
+
+        # Time Complexity:
+        # Worst, Average and Best case = O(N^2), scanning the entire board three times
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This function checks if the AI move has a new disk in a corner
+    #                     based on the differences between the original board and the board after the move.
+    # Parameters: (self is implicit)
+    #              original_board: The cells before the move
+    #              after_move_board: The cells after the move
+    # Returns: True if the AI move has a new disk in a corner, False if not.
+    def ai_has_new_disk_in_corner(self, original_board, after_move_board):
+        new_ai_disks = []
+        for i in range(len(original_board)):
+            for j in range(len(original_board[i])):
+                if original_board[i][j] != 2 and after_move_board[i][j] == 2:
+                    new_ai_disks.append((i, j))
+
+        corners = [(0, 0), (0, len(original_board[0])-1), (len(original_board)-1, 0),
+                   (len(original_board)-1, len(original_board[0])-1)]
+        for disk in new_ai_disks:
+            if disk in corners:
+                return True
+        return False
+
+        # Time Complexity:
+        # Worst, Average and Best case = O(N^2), as it always scans the entire board
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This function checks if the AI move has a new disk in an edge based on the differences between
+    #                     the original board and the board after the move.
+    # Parameters: (self is implicit)
+    #              original_board: The cells before the move
+    #              after_move_board: The cells after the move
+    # Returns: True if the AI move has a new disk in an edge, False if not.
+    def ai_has_new_disk_on_edge(self, original_board, after_move_board):
+        new_ai_disks = []
+        for i in range(len(original_board)):
+            for j in range(len(original_board[i])):
+                if original_board[i][j] != 2 and after_move_board[i][j] == 2:
+                    new_ai_disks.append((i, j))
+
+        edges = []
+        edges.extend([(i, 0) for i in range(len(original_board))])  # left edge
+        edges.extend([(i, len(original_board[0])-1) for i in range(len(original_board))])  # right edge
+        edges.extend([(0, j) for j in range(len(original_board[0]))])  # top edge
+        edges.extend([(len(original_board)-1, j) for j in range(len(original_board[0]))])  # bottom edge
+
+        for disk in new_ai_disks:
+            if disk in edges:
+                return True
+        return False
+
+        # Time Complexity:
+        # Worst, Average and Best case = O(N^2), scanning the entire board
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: This function generates a list of all valid move coordinates that the current player can make.
+    # Parameters: None (self is implicit)
+    # Returns: A list of possible moves. Every move is a tuple of coordinates (row, col).
+    def get_possible_moves_by_current_player(self):
+        allowed_moves_list = []
+        for move_to_check in sorted(self.frontier):  # Row-major order, like the bitboard positions
+            if self.move_has_disk_to_flip(move_to_check, self.current_player):
+                allowed_moves_list.append(move_to_check)
+        return allowed_moves_list
+
+        # Time Complexity:
+        # Worst, Average and Best case = O(F log F), sorting and scanning the F frontier cells
+        ################################################################################################################################
+
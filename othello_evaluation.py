@@ -0,0 +1,114 @@
+from othello_engine import popcount
+
+####################################################################################################################
+# Module description: Heuristic evaluation of the Hard difficulty search. It only uses bitboards and precomputed
+#                     masks, so a leaf costs a few dozen integer operations and no move generation:
+#                       - square weights: every square belongs to a class (corner, X-square, edge, ...) with a
+#                         weight, and a class counts with one popcount per player,
+#                       - mobility: empty cells next to opponent disks (the cells where the player can get moves)
+#                         minus empty cells next to own disks,
+#                       - frontier: disks next to an empty cell (they give moves to the opponent), fewer is better.
+#                     The evaluation works for any player: it scores the own bitboard against the opponent one.
+
+# Weights of the square classes (8x8 values of the classic weight table, extended to any board size)
+CORNER_WEIGHT = 100
+C_SQUARE_WEIGHT = -20      # Edge cells next to a corner
+X_SQUARE_WEIGHT = -50      # Cells diagonally next to a corner
+A_SQUARE_WEIGHT = 10       # Edge cells two cells away from a corner
+EDGE_WEIGHT = 5            # Other edge cells
+INNER_RING_WEIGHT = -2     # Cells next to the edges (they give access to the edges)
+CENTER_WEIGHT = -1         # Other cells
+
+MOBILITY_WEIGHT = 4
+FRONTIER_WEIGHT = 4
+
+# Cached weight classes per board size
+_weight_classes = {}
+
+####################################################################################################################
+# Method description: Gives the weight of a square of the board.
+# Parameters: row, col: Coordinates of the square
+#             board_size_n: The number of rows and columns of the board
+# Returns: The weight of the square.
+def square_weight(row, col, board_size_n):
+    last = board_size_n - 1
+    # Distances to the nearest edge row and column
+    row_distance = min(row, last - row)
+    col_distance = min(col, last - col)
+    if row_distance == 0 and col_distance == 0:
+        return CORNER_WEIGHT
+    if row_distance == 1 and col_distance == 1:
+        return X_SQUARE_WEIGHT
+    if row_distance == 0 or col_distance == 0:
+        along_edge_distance = max(row_distance, col_distance)
+        if along_edge_distance == 1:
+            return C_SQUARE_WEIGHT
+        if along_edge_distance == 2:
+            return A_SQUARE_WEIGHT
+        return EDGE_WEIGHT
+    if row_distance == 1 or col_distance == 1:
+        return INNER_RING_WEIGHT
+    return CENTER_WEIGHT
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(1)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Groups the squares of the board by weight, so a class is counted with one popcount.
+# Parameters: geometry: BoardGeometry of the board
+# Returns: A list of (weight, bitboard of the squares of the class) tuples.
+def get_weight_classes(geometry):
+    board_size_n = geometry.board_size_n
+    if board_size_n not in _weight_classes:
+        masks_by_weight = {}
+        for row in range(board_size_n):
+            for col in range(board_size_n):
+                weight = square_weight(row, col, board_size_n)
+                masks_by_weight[weight] = masks_by_weight.get(weight, 0) | 1 << (row * board_size_n + col)
+        _weight_classes[board_size_n] = sorted(masks_by_weight.items())
+    return _weight_classes[board_size_n]
+
+    # Time Complexity:
+    # Worst case = O(N^2), the first time for a board size
+    # Average and Best case = O(1), cached
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Cells next to at least one cell of a bitboard, in any of the 8 directions: the cells are
+#                     spread one column left and right, and then the result one row up and down.
+# Parameters: bitboard: The cells
+#             geometry: BoardGeometry of the board
+# Returns: Bitboard of the neighbour cells, including the cells of the bitboard itself.
+def neighbours_bitboard(bitboard, geometry):
+    row_neighbours = (bitboard | ((bitboard << 1) & geometry.not_first_col_mask) |
+                      ((bitboard >> 1) & geometry.not_last_col_mask))
+    return (row_neighbours | (row_neighbours << geometry.board_size_n) |
+            (row_neighbours >> geometry.board_size_n)) & geometry.full_mask
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(1), 4 shifts
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Heuristic score of the position of a player: square weights, mobility and frontier.
+# Parameters: own: Bitboard of the player
+#             opponent: Bitboard of the opponent
+#             geometry: BoardGeometry of the board
+# Returns: The score, positive when the position is good for the player of the own bitboard.
+def evaluate_bitboards(own, opponent, geometry):
+    score = 0
+    for weight, mask in get_weight_classes(geometry):
+        score += weight * (popcount(own & mask) - popcount(opponent & mask))
+
+    empty = geometry.full_mask & ~(own | opponent)
+    score += MOBILITY_WEIGHT * (popcount(empty & neighbours_bitboard(opponent, geometry)) -
+                                popcount(empty & neighbours_bitboard(own, geometry)))
+
+    next_to_empty = neighbours_bitboard(empty, geometry)
+    score -= FRONTIER_WEIGHT * (popcount(own & next_to_empty) - popcount(opponent & next_to_empty))
+    return score
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(1), 7 weight classes and 12 shifts
+    ####################################################################################################################
@@ -1,10 +1,28 @@
-from game2dboard import Board
+import os
+import queue
+import sys
+import threading
 import time
-import random
+from fractions import Fraction
+from game2dboard import Board, ImageMap
 from tkinter import messagebox, Tk
+import othello_book
+import othello_endgame
+import othello_engine
+import othello_history
+import othello_parallel
+import othello_ponder
+import othello_renderer
+import othello_search
+import othello_transposition
 
 # Key commands
-MSG = "U: Undo Last Moves    F2: Restart    ESC: Exit Game    "
+MSG = "U: Undo Last Moves    A: Hint    F2: Restart    ESC: Exit Game    "
+DIFFICULTY_MESSAGES = {
+    "E": "DIFFICULTY: (E: *Easy*, M: Medium, H: Hard)",
+    "M": "DIFFICULTY: (E: Easy, M: *Medium*, H: Hard)",
+    "H": "DIFFICULTY: (E: Easy, M: Medium, H: *Hard*)",
+}
 
 # Defines sizes of the square and tile, colors of the board, line, and tile as constants
 GAME_WINDOW_TITLE = "Othello"
@@ -12,16 +30,58 @@ CELL_SIZE = 80
 CELL_COLOR = "green"
 CELL_SPACING = 2
 LINE_COLOR = "black"
+# Larger boards (up to 32x32) get smaller cells so the window fits the screen: at most MAX_BOARD_PIXELS wide,
+# with cells of MIN_CELL_SIZE or more. The disk images (DISK_IMAGE_SIZE pixels wide) are scaled down with the cells.
+MAX_BOARD_PIXELS = 720
+MIN_CELL_SIZE = 20
+DISK_IMAGE_SIZE = 82
+# Tk scales an image by integer zoom and subsample factors: the scale is zoom / subsample, subsample at most this
+MAX_IMAGE_SUBSAMPLE = 16
+# Disk images at their original size, by player, once they have been replaced by scaled ones
+original_disk_images = {}
+
+# Memory of the transposition table of the Hard difficulty search (in megabytes), per worker process
+TRANSPOSITION_TABLE_SIZE_MB = 16
+
+# Worker processes of the Hard difficulty search: with more than one, the root moves are searched in parallel
+AI_SEARCH_WORKERS = os.cpu_count() or 1
+
+# Thinking time budget (in seconds) of the computer-AI move per difficulty. Easy (random) and Medium (greedy)
+# answer at once; Hard searches deeper and deeper until its budget is over, so its move latency is bounded.
+AI_TIME_BUDGET_SECONDS = {"E": 0.0, "M": 0.0, "H": 1.0}
+
+# The AI searches in a worker thread while the window keeps running. Its result is polled with the board timer
+# about 60 times per second, and it is shown no sooner than AI_MOVE_DELAY_SECONDS after the previous move,
+# so the human player can see the disks flipped by their move (the search already runs during that delay).
+AI_POLL_INTERVAL_MS = 16
+AI_MOVE_DELAY_SECONDS = 2.0
+# In Hard, the AI ponders while the human player thinks (othello_ponder): when the human plays a pondered move, the
+# answer is ready, so it is shown sooner, just long enough after the human move to see its flipped disks
+PONDER_ENABLED = True
+PONDER_HIT_MOVE_DELAY_SECONDS = 0.5
+# The search thread holds the interpreter lock for up to this long before the Tk loop can run; Python's default
+# (5 ms) makes the window miss 60 fps frames while the AI thinks, at the cost of a slightly slower search.
+THREAD_SWITCH_INTERVAL_SECONDS = 0.001
+
+# Key A shows a hint on the human player's turn: the analysis of the Hard search (one search, the one the AI runs,
+# with exact scores for the HINT_MOVES best moves) numbers the best moves on the board with their scores, and the
+# output bar shows the principal variation of the best one. The search runs in a worker thread, like the AI move.
+HINT_MOVES = 3
+HINT_TIME_BUDGET_SECONDS = AI_TIME_BUDGET_SECONDS["H"]
+HINT_TEXT_COLOR = "yellow"
+HINT_CANVAS_TAG = "hint"
+
+# Statistics of every AI move (nodes, cutoffs, depth, time per iteration, ...) are appended as JSON lines to this
+# file (None for no log), and shown in the output bar when SHOW_AI_SEARCH_STATISTICS is True (key S toggles it)
+AI_SEARCH_LOG_PATH = None
+SHOW_AI_SEARCH_STATISTICS = False
 
-# All the possible move directions a player's move can flip disks 
-# from the other player, as constant (0 –> the current row/column, 
-# +1 –> the next row/column, -1 –> the previous row/column)
-POSSIBLE_MOVE_DIRECTIONS = [(-1, -1), (-1, 0), (-1, +1),
-                            (0, -1),           (0, +1),
-                            (+1, -1), (+1, 0), (+1, +1)]
-
-# ARRAY of tuples (row, col): 
-# POSSIBLE_MOVE_DIRECTIONS = [(-1, -1), (-1, 0), (-1, +1), (0, -1), (0, +1),(+1, -1), (+1, 0), (+1, +1)]
+####################################################################################################################
+# Method description: Size of the cells of a board, CELL_SIZE unless the board would not fit in MAX_BOARD_PIXELS.
+# Parameters: board_size_n: The number of rows and columns of the board
+# Returns: The width (and height) of a cell in pixels.
+def cell_size_for_board(board_size_n):
+    return max(MIN_CELL_SIZE, min(CELL_SIZE, MAX_BOARD_PIXELS // max(1, board_size_n)))
 
 ####################################################################################################################
 # Class description: This class represents the game of Othello, which is a board game played 
@@ -46,7 +106,9 @@ class Game:
 
         # If you want computer AI White disks to start, uncomment the line below: 
             #self.board.start_timer(2000)
-        self.board.cell_size = CELL_SIZE
+        self.cell_size = cell_size_for_board(min(board_width, board_height))
+        self.board.cell_size = self.cell_size
+        self.disk_images_scaled = False
         self.board.margin_color = self.board.grid_color = LINE_COLOR
         self.board.cell_color = CELL_COLOR
         self.board.cell_spacing = CELL_SPACING
@@ -57,6 +119,41 @@ class Game:
         # Global settings initialization
         self.board_size_n = min(self.board.nrows, self.board.ncols)
 
+        # Headless engine position: the AI searches on it, and the board widget only shows the moves actually played
+        self.position = othello_engine.Position(self.board_size_n)
+        # The renderer paints on the board widget only the cells that differ from the engine position
+        self.renderer = othello_renderer.BoardRenderer(self.board, self.board_size_n)
+        # Legal moves of both players, computed once per move: the pass, click, hover and game over checks of a turn
+        # are bit tests on them
+        self.legal_moves = othello_engine.LegalMoveCache(self.position)
+        # (cell under the mouse, position key) of the last hover update
+        self.hovered_cell = None
+        # Opening book of the Hard difficulty (optional: the game also plays without the book file, or when the
+        # book was built with another evaluation)
+        self.opening_book = othello_book.get_opening_book()
+
+        # Alpha-beta search used by the Hard difficulty, with a transposition table kept between moves.
+        # On several cores, the persistent pool of the parallel search is created once here, not at every move.
+        # Near the end of the game, the endgame solver finds the exact result instead of guessing.
+        if AI_SEARCH_WORKERS > 1:
+            self.search_engine = othello_parallel.ParallelSearchEngine(AI_SEARCH_WORKERS, TRANSPOSITION_TABLE_SIZE_MB,
+                                                                       othello_endgame.EndgameSolver())
+        else:
+            self.search_engine = othello_search.SearchEngine(
+                othello_transposition.TranspositionTable(size_in_mb=TRANSPOSITION_TABLE_SIZE_MB),
+                othello_endgame.EndgameSolver())
+
+        # Pondering of the Hard difficulty, on the same search engine (it is stopped before the AI searches its move)
+        self.ponderer = othello_ponder.Ponderer(self.search_engine, self.opening_book)
+        # Search engine of the hint (key A). Its deadline, stop event and statistics are its own, so it never
+        # disturbs a search of the AI engine; it shares the transposition table of the AI when there is one in
+        # this process (the hint and the pondering never search at the same time)
+        hint_transposition_table = getattr(self.search_engine, "transposition_table", None)
+        if hint_transposition_table is None:
+            hint_transposition_table = othello_transposition.TranspositionTable(size_in_mb=TRANSPOSITION_TABLE_SIZE_MB)
+        self.hint_search_engine = othello_search.SearchEngine(hint_transposition_table,
+                                                              othello_endgame.EndgameSolver())
+
         # Event-Handlers initialization
         '''
         Assign the keyboard_command and initialize_game_settings methods as event handlers, 
@@ -69,14 +166,56 @@ class Game:
         self.board.on_mouse_click = self.play_as_human_player
         # Eevent handler for timer to decouple the computer-AI move from the human-user's click
         self.board.on_timer = self.play_as_ai_computer_player
-        # Stack feature for saving movements feature
-        self.algo_stack = []
+        # Move log of the game (square, player and flipped disks of every ply), for undo and redo
+        self.move_log = othello_history.MoveLog()
+
+        # AI worker thread: results are (search_id, move, statistics) tuples. Every new or cancelled search changes
+        # ai_search_id, so a result of a cancelled search is recognized and thrown away.
+        self.ai_results = queue.Queue()
+        self.ai_search_thread = None
+        self.ai_stop_event = None
+        self.ai_search_id = 0
+        self.ai_move_not_before = 0.0
+        sys.setswitchinterval(THREAD_SWITCH_INTERVAL_SECONDS)
+
+        # Hint worker thread (key A): its analysis is posted to hint_results and polled with a Tk timer of the canvas
+        self.hint_results = None
+        self.hint_thread = None
+        self.hint_stop_event = None
+        self.hint_poll_id = None
+
+        # Search statistics of the AI moves: optional JSON lines log and output bar
+        self.search_log = None
+        if AI_SEARCH_LOG_PATH is not None:
+            self.search_log = othello_search.SearchLog(AI_SEARCH_LOG_PATH)
+        self.show_search_statistics = SHOW_AI_SEARCH_STATISTICS
+        self.last_search_statistics = None
 
         # Time Complexity:
         # Worst, Average, and Best case = O(1), as it performs a 
         # constant number of operations (since its a simple class constructor)
         ################################################################################################################################
 
+    ################################################################################################################################
+    # Property description: The player to move and the number of disks of each player are kept by the engine position,
+    #                       so the Game reads and writes them there.
+    @property
+    def current_player(self):
+        return self.position.current_player
+
+    @current_player.setter
+    def current_player(self, player_number):
+        self.position.current_player = player_number
+
+    @property
+    def num_disks_dictionary(self):
+        return self.position.num_disks_dictionary
+
+    @num_disks_dictionary.setter
+    def num_disks_dictionary(self, num_disks_dictionary):
+        self.position.num_disks_dictionary = num_disks_dictionary
+        ################################################################################################################################
+
 
     ################################################################################################################################
     # Method Description: This function starts the display of the board, starting the game
@@ -94,20 +233,41 @@ class Game:
     # Returns: None
     def  keyboard_command(self, key):
         if key == "Escape":
+            # Stops the AI search and the pondering before the search engine is closed
+            self.cancel_ai_search()
+            self.search_engine.close()
+            if self.opening_book is not None:
+                self.opening_book.close()
+            if self.search_log is not None:
+                self.search_log.close()
             self.board.close()
         elif key == "F2":
             self.starting_game_initialization()
         elif key == "u" or key == "U":
             self.undo_last_two_moves()
+        elif key == "r" or key == "R":
+            self.redo_undone_moves()
+        elif key == "a" or key == "A":
+            self.start_hint_search()
         elif key == "e" or key == "E":
             self.difficulty = "E"
-            self.board.print(MSG + "DIFFICULTY: (E: *Easy*, M: Medium, H: Hard)")
+            self.ponderer.stop()
+            self.board.print(MSG + DIFFICULTY_MESSAGES["E"])
         elif key == "m" or key == "M":
             self.difficulty = "M"
-            self.board.print(MSG + "DIFFICULTY: (E: Easy, M: *Medium*, H: Hard)")
+            self.ponderer.stop()
+            self.board.print(MSG + DIFFICULTY_MESSAGES["M"])
         elif key == "h" or key == "H":
             self.difficulty = "H"
-            self.board.print(MSG + "DIFFICULTY: (E: Easy, M: Medium, H: *Hard*)")
+            self.board.print(MSG + DIFFICULTY_MESSAGES["H"])
+            if not self.ai_is_thinking() and not self.ponderer.is_pondering() and self.hint_thread is None:
+                self.start_pondering()
+        elif key == "s" or key == "S":
+            self.show_search_statistics = not self.show_search_statistics
+            if self.show_search_statistics and self.last_search_statistics is not None:
+                self.board.print(self.last_search_statistics.summary())
+            else:
+                self.board.print(MSG + DIFFICULTY_MESSAGES[self.difficulty])
         # TimeComplexity:
         # Worst case = O(n), if all the cells have a disk that needs to be copied
         # Average case and Best case =  O(1), copy and appending into stack
@@ -118,55 +278,34 @@ class Game:
     # Parameters: None (self is implicit)
     # Returns: None
     def starting_game_initialization(self):
-        self.algo_stack.clear()
-        
-        # Use a dictionary to store the number of disks for each player
-        # so, index 0 (if it was an array) is not used and this way with dictionary 
-        # the index coincides with the Player's number (1 or 2). 
+        # A search of the previous game must not play its move in the new one
+        self.cancel_ai_search()
+        self.move_log.clear()
 
-        self.num_disks_dictionary = {1: 2, 2: 2}
+        # The engine position places the first 4 disks in the middle of the board
+        # and resets the number of disks of each player
+        self.position.reset()
 
         if self.board_size_n < 2:
             return
         
-        # Clean the board, in case we're re-starting from a previous game
-        self.board.clear()
         self.board.cursor = "arrow"
+        self.scale_disk_images()
+        self.hovered_cell = None
+        # game2dboard has no mouse move event, so the hover is bound on its canvas
+        self.board._canvas.bind("<Motion>", self.show_move_under_mouse)
 
-        # Disks initialization (Draw the first 4 disks in the middle of the board)
-        '''
-        If the board cols and rows are both 2 or greater, 
-        the method calculates the coordinates of the four initial disks and 
-        stores them in the initial_cells list. 
-        The coord1 and coord2 variables are calculated as the floor division 
-        of self.board_size_n / 2 - 1 and self.board_size_n / 2, respectively, 
-        where self.board_size_n is the size of the board.
-        '''
-        coord1 = int(self.board_size_n / 2 - 1)
-        coord2 = int(self.board_size_n / 2)
-        initial_cells = [(coord1, coord2), (coord1, coord1),
-                         (coord2, coord1), (coord2, coord2)]
-        
-        '''
-        The method then iterates over the initial_cells list and sets the color and position of each disk on the board. 
-        The color variable is set to i % 2, which alternates between 0 and 1 for each iteration of the loop. 
-        The row and col variables are set to the row and column coordinates of the current disk, respectively.
-        '''
-        for i in range(len(initial_cells)):
-            color = i % 2
-            row = initial_cells[i][0]
-            col = initial_cells[i][1]
-
-            self.board[row][col] = color + 1
+        # Disks initialization: the renderer removes the disks of a previous game and draws the first 4 disks
+        # of the engine position in the middle of the board (the middle cells of a previous game are not redrawn)
+        self.renderer.render(self.position)
 
         self.difficulty = "M" # Default difficulty is Medium
-        self.board.print(MSG + "DIFFICULTY: (E: Easy, M: *Medium*, H: Hard)")
+        self.board.print(MSG + DIFFICULTY_MESSAGES["M"])
+        self.last_search_statistics = None
 
         # Player 1 is Human-user
         # Player 2 is Computer-AI
         # Player 1 starts the game
-        self.current_player = 2 # Save initial state move as player 2 (Computer-AI)
-        self.save_moves() # Save state before making a move
         self.current_player = 1 # The turn is for player 1 (Human-user)
 
         # Time Complexity:
@@ -175,105 +314,40 @@ class Game:
         ################################################################################################################################
         
     ################################################################################################################################
-    # Method description: This function verifies if a set of coordinates, given as row and column, are within the bounds of a board.
-    # Parameters: (self is implicit)
-    #              row: The row coordinate to check
-    #              col: The column coordinate to check
-    # Returns: True if row and col are valid, False if not. A valid coordinate must be in the range of the board.
-    def coord_is_valid(self, row, col):
-
-        if 0 <= row < self.board_size_n and 0 <= col < self.board_size_n:
-            return True
-        return False
+    # Method description: Scales the disk images down to the cells of a large board, once (Tk images can only be
+    #                     created after the window, so this is done at the start of the first game).
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def scale_disk_images(self):
+        if self.disk_images_scaled or self.cell_size >= CELL_SIZE:
+            return
+        self.disk_images_scaled = True
+        # Largest zoom / subsample scale that is not above the cell size, so the disk stays inside its cell
+        scale = max(Fraction(self.cell_size * subsample // DISK_IMAGE_SIZE, subsample)
+                    for subsample in range(1, MAX_IMAGE_SUBSAMPLE + 1))
+        image_map = ImageMap.get_instance()
+        for player in (1, 2):
+            image = original_disk_images.setdefault(player, image_map[player])
+            if image is not None:
+                # The image map of game2dboard has no setter for an image, so the scaled one replaces it in its cache
+                image_map._dict[player] = image.zoom(scale.numerator).subsample(scale.denominator)
 
         # Time Complexity:
-        # Worst, Average, and Best case = O(1)
+        # Worst, Average, and Best case = O(P), P being the number of pixels of the disk images
         ################################################################################################################################
 
-
     ################################################################################################################################
     # Method description: This function creates and returns an independent copy of the current state of all
-    #                     cells in a board, which can be usefull when trying to undo moves or use the copied board.
+    #                     cells in the engine position, which can be usefull when trying to undo moves.
     # Parameters: None (self is implicit)
     # Returns: A copy of the current state of all cells in a board.
     def copy_board_cell_states(self):
-        board_cell_states = [[None for _ in range(8)] for _ in range(8)]
-        rows_array = range(0, self.board.nrows, 1)
-        cols_array = range(0, self.board.ncols, 1)
-        for row in rows_array:
-            for col in cols_array:
-                board_cell_states[row][col] = self.board[row][col]
-
-        return board_cell_states
+        return self.position.copy_board_cell_states()
 
     # Time Complexity:
-    # Worst, Average, Best = O(N^2), as it iterates over each cell in the board
+    # Worst, Average, Best = O(N^2), as it copies each cell in the board
     ################################################################################################################################
 
-    ################################################################################################################################
-    # Method description: This function evaluates whether the last two moves in a game were made by the same player.
-    # Parameters: None (self is implicit)
-    # Returns: True if the last two moves were made by the same player, False if not.
-    def check_last_two_moves_from_same_player(self):
-        if len(self.algo_stack) < 2:
-            print("Not enough moves to check.")
-            return False
-
-        # last_move = self.algo_stack[-1]
-        # second_last_move = self.algo_stack[-2]
-
-        last_player = self.algo_stack[-1]["current_player"]
-        second_last_player = self.algo_stack[-2]["current_player"]
-        if last_player == second_last_player:
-            return True
-        else:
-            return False
-        
-        # Time Complexity:
-        # Worst, Average, and Best case = O(1)
-        ################################################################################################################################
-
-    ################################################################################################################################
-    # Method description: Checks if the player has any adversary's disk to flip with the move to make.
-    #                     move is the (row, col) coordinate of where the player makes a move; 
-    #                     direction is the direction in which the adversary's disk/s are to be flipped
-    # Parameters: (self is implicit)
-    #              move (tuple): The (row, col) coordinate of where the player makes a move
-    #              direction (tuple): The direction in which the adversary's disk/s are to be flipped
-    #              player_number: The number of the player making the move
-    # Returns: True if there is any disk to flip, False if not.
-    def direction_has_disk_to_flip(self, move, direction, player_number):
-
-        disk_type_current_player = player_number
-        disk_type_to_flip = 3 - player_number
-
-        # Since we initialize i to 1, 1 means we didnt find any disk to flip.
-        distance = 1
-        disks_to_flip_counter = 0
-        while True:
-            row = move[0] + direction[0] * distance
-            col = move[1] + direction[1] * distance
-
-            if not self.coord_is_valid(row, col) or \
-                    self.board[row][col] == None:  # Empty cell
-                    return False
-            elif self.board[row][col] == disk_type_current_player:  
-                # Current player color disk found, so stop direction and exit
-                break
-            else:
-                # Disk color is the one to flip, so continue looking in the same direction
-                if self.board[row][col] == disk_type_to_flip:
-                    # print("Found disk to flip: ", row, ",", col, "content:", self.board[row][col])
-                    distance += 1
-                    disks_to_flip_counter += 1
-        
-        return (disks_to_flip_counter > 0)
-
-        # Time Complexity:
-        # Worst case = O(N), entire borad
-        # Average and Best case = O(1), only few cells checks or only one
-        ################################################################################################################################
-
     ################################################################################################################################
     # Method description: Determines the validity and impact of a player's move, specifically 
     #                     whether it can capture any of the opponent's disks, when flipping the disks.
@@ -282,74 +356,9 @@ class Game:
     #              player_number: The number of the player making the move
     # Returns: True if the player's move is possible, False if not.
     def move_has_disk_to_flip(self, move, player_number):
+        return self.legal_moves.is_legal(move, player_number)
 
-        content_of_move_cell = self.board[move[0]][move[1]]
-
-        if move != () and self.coord_is_valid(move[0], move[1]) \
-           and content_of_move_cell == None:
-            for direction in POSSIBLE_MOVE_DIRECTIONS:
-                has_disk_to_flip = self.direction_has_disk_to_flip(move, direction, player_number)
-                if has_disk_to_flip:
-                    return True
-                     
-        return False
-
-        # Time Complexity:
-        # Worst case = O(N), must check all
-        # Average case = O(1), early return
-        # Best case = O(1),  initial conditions fail
-        ################################################################################################################################
-
-    ################################################################################################################################
-    # Method description: This function is critical especially in our game where capturing the
-    #                     opponent's pieces is a game´s main rule. It updates the counts of discs for
-    #                     each player in accordance with the opponent's disks being flipped to the
-    #                     player's color along all valid directions from the move.
-    #                     Flips the contrary's disks for the current move being applied by 
-    #                     updating the board's states: "1" state for black disks and "2" state for white disks.
-    #                     Also, per each flip, increases the number of disks for the current player by 1, 
-    #                     and decreases for the contrary.
-    # Parameters: (self is implicit)
-    #              move (tuple): The (row, col) coordinate of where the player makes a move
-    # Returns: None
-    def flip_disks_for_move(self, move):
-            '''
-
-            '''
-            current_disk_type = self.current_player 
-            for direction in POSSIBLE_MOVE_DIRECTIONS:
-                if self.direction_has_disk_to_flip(move, direction, self.current_player):
-                    counter_of_disks_flipped = 0
-                    distance = 1
-                    while True:
-                        # Calculate the coordinates of the current cell 
-                        # based on the direction. For example, if the current move is (3, 4) and the direction is (-1, 0), 
-                        # then the code calculates the row and column coordinates of the cell 
-                        # to check as follows:
-                        # row = 3 + (-1) * distance = 3 - distance
-                        # col = 4 + 0 * distance = 4
-                        # So, cell as (3 - distance, 4) is checked.
-                        row = move[0] + direction[0] * distance
-                        col = move[1] + direction[1] * distance
-                        # If the current cell has a disk of the current player, stop and exit.
-                        if self.board[row][col] == current_disk_type:
-                            break
-                        else:
-                            # Flip the disk on the current cell being analyzed
-                            self.board[row][col] = current_disk_type
-
-                            # Update the number of disks for the current player and the contrary
-                            self.num_disks_dictionary[self.current_player] += 1
-                            self.num_disks_dictionary[3 - self.current_player] -= 1
-                            counter_of_disks_flipped += 1
-                            distance += 1
-                
-                    # print("Total disks flipped: ",counter_of_disks_flipped, "for direction: ",direction)
-
-        # Time Complexity:
-        # Worst case = O(N), if it needs to flip disks across the board
-        # Average case = O(1), few flipped
-        # Best case = O(1), no flip
+        # Time Complexity: O(1), a bit test on the legal moves of the player (computed once per move)
         ################################################################################################################################
 
     ################################################################################################################################
@@ -365,20 +374,19 @@ class Game:
         ################################################################################################################################
 
     ################################################################################################################################
-    # Method description: This function places a disk on the board for a given move for the current player,
-    #                     flips the opponent's disks, it updates the board states, increasing player's disk count.
+    # Method description: This function places a disk for a given move for the current player in the engine position,
+    #                     flips the opponent's disks, and then paints only the changed cells on the board widget.
+    #                     The move is added to the move log.
     # Parameters: (self is implicit)
     #              move (tuple): The (row, col) coordinate of where the player makes a move
     # Returns: None
     def make_move(self, move):
-        if self.move_has_disk_to_flip(move, self.current_player):
-            # Put current player color on the current move cell
-            self.board[move[0]][move[1]] = self.current_player
-            # Adds 1 disk to the current players disk count
-            self.num_disks_dictionary[self.current_player] += 1
-                
-            self.flip_disks_for_move(move)
-            self.save_moves()  # Save state after making a move
+        changed_cells = self.position.make_move(move)
+        if changed_cells:
+            # Paint the placed disk and the flipped disks with the current player color
+            self.renderer.render(self.position)
+
+            self.move_log.record_last_move(self.position)  # Keep the move (and its flipped disks) for undo
 
         # Time Complexity:
         # Worst and Average case = O(N), flipping disks across the board
@@ -393,26 +401,9 @@ class Game:
     #              player_number: The number of the player making the move
     # Returns: True if the player has possible moves, False if not.
     def player_can_move(self, player_number):
+        return self.legal_moves.player_can_move(player_number)
 
-        rows_array = range(0, self.board.nrows, 1)
-        cols_array = range(0, self.board.ncols, 1)
-
-        # Go through all the cells of the board matrix to check if there is any possible move
-        player_has_possible_move = False
-
-        for row in rows_array:
-            for col in cols_array:
-                test_move = (row, col)
-                if self.move_has_disk_to_flip(test_move, player_number):
-                    player_has_possible_move = True
-                    # If found possible move, return True and exit the function
-                    return player_has_possible_move
-               
-        return player_has_possible_move
-
-        # Time Complexity:
-        # Worst and Average case = O(N^2), scanning all cells for a valid move
-        # Best case = O(1), if an early valid move is found
+        # Time Complexity: O(1), the legal moves of the player are computed once per move
         ################################################################################################################################
 
     ################################################################################################################################
@@ -424,9 +415,7 @@ class Game:
         
         return self.player_can_move(self.current_player)
 
-        # Time Complexity: Inherits from player_can_move
-        # Worst and Average case = O(N^2)
-        # Best case = O(1)
+        # Time Complexity: Inherits from player_can_move, O(1)
         ################################################################################################################################
 
     ################################################################################################################################
@@ -434,253 +423,247 @@ class Game:
     # Parameters: (self is implicit)
     # Returns: A list of possible moves that can be made by the current player. Every move is a tuple of coordinates (row, col).
     def get_possible_moves_by_current_player(self):
-            
-        rows_array = range(0, self.board.nrows, 1)
-        cols_array = range(0, self.board.ncols, 1)
-        allowed_moves_list = []
-        for row in rows_array:
-            for col in cols_array:
-                # Move to check and append if valid
-                move_to_check = (row, col)
-                if self.move_has_disk_to_flip(move=move_to_check, player_number=self.current_player):
-                    allowed_moves_list.append(move_to_check)
-
-        return allowed_moves_list
-        # Returns a list of possible moves that can be made by the current player
-        # This is an example of usage of a Linked List, adding moves with .append()
+        return self.legal_moves.moves(self.current_player)
 
-        # Time Complexity:
-        # Worst and Average case = O(N^2), scanning all cells for valid moves
-        # Best case = O(1), if no valid moves are found early
+        # Time Complexity: O(M), M being the number of legal moves (computed once per move)
         ################################################################################################################################
 
     ################################################################################################################################
-    # Method description: Calculates and returns a score after a potential move 
-    #                     depending on the changes of the state of the board.
-    #                     This takes into account the number of disks, corners and edges.
+    # Method description: Finds the move of the AI for the selected difficulty: a random move (Easy), the greedy
+    #                     evaluation (Medium) or the time-budgeted alpha-beta search (Hard). In the first moves of
+    #                     the game, Hard answers with the opening book without searching.
+    #                     It runs in the AI worker thread, so it only uses its own copy of the engine position
+    #                     and never touches the board widget.
     # Parameters: (self is implicit)
-    #              original_number_of_disks_AI_player: The number of disks for the AI player before the move
-    #              original_board: The board before the move
-    #              after_move_board: The board after the move
-    # Returns: A score that represents how effective the move was.
-    def evaluate_board_state(self, original_number_of_disks_AI_player, original_board, after_move_board):
-            score = 0
-            
-            # 1. Count the number of pieces for AI and opponent
-            ai_pieces = 0
-            opponent_pieces = 0
-            for row in range(self.board_size_n):
-                for col in range(self.board_size_n):
-                    if self.board[row][col] == 2:  # Assuming AI is player 2
-                        ai_pieces += 1
-                    elif self.board[row][col] == 1:
-                        opponent_pieces += 1
-
-            number_of_new_disks_for_AI = ai_pieces - original_number_of_disks_AI_player
+    #              search_position: Copy of the engine position, with the AI as current player
+    #              difficulty: "E", "M" or "H"
+    #              stop_event: threading.Event that cancels the Hard search when it is set
+    # Returns: A ((row, col) move or None if the AI cannot move, SearchStatistics of the move) tuple.
+    def find_ai_move(self, search_position, difficulty, stop_event):
+        start_time = time.perf_counter()
+        if difficulty == "E":
+            ai_move = search_position.find_random_move()
+            return (ai_move, othello_search.SearchStatistics("random", ai_move,
+                                                             search_time=time.perf_counter() - start_time))
+        if difficulty == "H":
+            if self.opening_book is not None:
+                book_move = self.opening_book.find_best_move(search_position)
+                if book_move is not None:
+                    return (book_move, othello_search.SearchStatistics("book", book_move,
+                                                                       search_time=time.perf_counter() - start_time))
+            ai_move = self.search_engine.find_best_move(search_position, search_position.geometry.num_squares,
+                                                        AI_TIME_BUDGET_SECONDS[difficulty], stop_event)
+            return (ai_move, self.search_engine.statistics)
+        ai_move = search_position.find_best_move(difficulty)
+        return (ai_move, othello_search.SearchStatistics("greedy", ai_move,
+                                                         search_time=time.perf_counter() - start_time))
 
-            score += number_of_new_disks_for_AI
+        # TimeComplexity:
+        # Worst case = O(N * M), maximum number of possible moves to consider (bounded by the time budget in Hard).
+        # Average case =  O(N_avg * M), depends on the average number of possible moves the AI can make
+        # Best case = O(N), evaluating a single move
+        ################################################################################################################################
 
-            # 2. Control of corners (corners are more valuable)
-            if self.ai_has_new_disk_in_corner(original_board, after_move_board):
-                score += 25
+    ################################################################################################################################
+    # Method description: Body of the AI worker thread: finds the move and posts it (with its statistics) back to
+    #                     the Tk loop.
+    # Parameters: (self is implicit)
+    #              search_position: Copy of the engine position, with the AI as current player
+    #              difficulty: "E", "M" or "H"
+    #              search_id: Identifier of this search, sent with the result
+    #              stop_event: threading.Event that cancels the search when it is set
+    # Returns: None
+    def run_ai_search(self, search_position, difficulty, search_id, stop_event):
+        self.ai_results.put((search_id,) + self.find_ai_move(search_position, difficulty, stop_event))
 
-            # 3. Control of edges
-            if self.ai_has_new_disk_on_edge(original_board, after_move_board):
-                score += 10
+        # Time Complexity: Inherits from find_ai_move
+        ################################################################################################################################
 
-            return score
+    ################################################################################################################################
+    # Method description: Starts searching the AI move in a worker thread, and the timer that polls its result.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def start_ai_search(self):
+        # The search engine is free for the AI search once the pondering and the hint are stopped
+        self.ponderer.stop()
+        self.clear_hint()
+        self.ai_search_id += 1
+        self.ai_stop_event = threading.Event()
+        pondered_answer = self.ponderer.take_answer(self.position) if self.difficulty == "H" else None
+        if pondered_answer is not None:
+            # The answer to this human move was pondered: the worker thread only posts it
+            self.ai_move_not_before = time.perf_counter() + PONDER_HIT_MOVE_DELAY_SECONDS
+            self.ai_search_thread = threading.Thread(
+                target=self.ai_results.put, args=((self.ai_search_id,) + pondered_answer,), daemon=True)
+        else:
+            self.ai_move_not_before = time.perf_counter() + AI_MOVE_DELAY_SECONDS
+            self.ai_search_thread = threading.Thread(
+                target=self.run_ai_search,
+                args=(self.position.copy(), self.difficulty, self.ai_search_id, self.ai_stop_event),
+                daemon=True)
+        self.ai_search_thread.start()
+        self.board.cursor = "wait"
+        self.board.start_timer(AI_POLL_INTERVAL_MS)
 
         # Time Complexity:
-        # Worst and Average case = O(N^2), scanning the entire board
-        # Best case = O(N^2), as it always scans the entire board
+        # Worst, Average, and Best case = O(1), the search itself runs in the worker thread
         ################################################################################################################################
 
-    ###################################################################################################################################
-    # Method description: This function checks if the AI move has a new disk in a corner 
-    #                     after a potential move based on the differences between 
-    #                     the original board and the board after the move.
+    ################################################################################################################################
+    # Method description: Cancels the AI search in progress, if any, and its pending result, and stops the
+    #                     pondering. The threads are waited for (a stopped search ends within a few milliseconds),
+    #                     so the search engine and its transposition table are never used by two searches at the
+    #                     same time.
     # Parameters: (self is implicit)
-    #              original_board: The board before the move
-    #              after_move_board: The board after the move
-    # Returns: True if the AI move has a new disk in a corner, False if not.
-    def ai_has_new_disk_in_corner(self, original_board, after_move_board):
-        new_ai_disks = []
-        for i in range(len(original_board)):
-            for j in range(len(original_board[i])):
-                if original_board[i][j] != 2 and after_move_board[i][j] == 2:
-                    new_ai_disks.append((i, j))
-
-        corners = [(0, 0), (0, len(original_board[0])-1), (len(original_board)-1, 0), (len(original_board)-1, len(original_board[0])-1)]
-        for disk in new_ai_disks:
-            if disk in corners:
-                return True
-        return False
+    # Returns: None
+    def cancel_ai_search(self):
+        self.ponderer.stop()
+        self.clear_hint()
+        self.board.stop_timer()
+        if self.ai_search_thread is not None:
+            self.ai_stop_event.set()
+            self.ai_search_thread.join()
+            self.ai_search_thread = None
+        # Results already posted by the cancelled search no longer match the search id
+        self.ai_search_id += 1
 
         # Time Complexity:
-        # Worst and Average case_ O(N^2)
-        # Best case= O(N^2), as it always scans the entire board
+        # Worst, Average, and Best case = O(1), waiting for at most DEADLINE_CHECK_INTERVAL nodes of the search
         ################################################################################################################################
-    
+
     ################################################################################################################################
-    # Method description: This function checks if the AI move has a new disk in an edge based on the differences between
-    #                     the original board and the board after the move.
-    # Parameters: (self is implicit)
-    #              original_board: The board before the move
-    #              after_move_board: The board after the move
-    # Returns: True if the AI move has a new disk in an edge, False if not.
-    def ai_has_new_disk_on_edge(self, original_board, after_move_board):
-        new_ai_disks = []
-        for i in range(len(original_board)):
-            for j in range(len(original_board[i])):
-                if original_board[i][j] != 2 and after_move_board[i][j] == 2:
-                    new_ai_disks.append((i, j))
-
-        edges = []
-        edges.extend([(i, 0) for i in range(len(original_board))])  # left edge
-        edges.extend([(i, len(original_board[0])-1) for i in range(len(original_board))])  # right edge
-        edges.extend([(0, j) for j in range(len(original_board[0]))])  # top edge
-        edges.extend([(len(original_board)-1, j) for j in range(len(original_board[0]))])  # bottom edge
-
-        for disk in new_ai_disks:
-            if disk in edges:
-                return True
-        return False
+    # Method description: Starts pondering the human player's turn, in Hard (the other difficulties answer at once).
+    #                     Not while the hint searches: show_hint() starts the pondering when the hint is done.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def start_pondering(self):
+        if PONDER_ENABLED and self.difficulty == "H" and self.current_player == 1 and self.hint_thread is None and \
+           self.current_player_can_move():
+            self.ponderer.start(self.position, AI_TIME_BUDGET_SECONDS["H"])
 
         # Time Complexity:
-        # Worst, Best and Average case= O(N^2), scanning the entire board
+        # Worst, Average, and Best case = O(1), the searches run in the pondering thread
         ################################################################################################################################
 
     ################################################################################################################################
-    # Method description: This function is used when selecting the easy difficulty 
-    #                     to make a random move on the board among the possible moves for the AI player.
-    def make_random_move_by_current_player(self):
-        # Makes a random possible move on the board.
-        possible_moves = self.get_possible_moves_by_current_player()
-        if possible_moves:
-            self.current_move = random.choice(possible_moves)
-            self.make_current_move()
+    # Method description: Starts the hint search (key A) of the human player's turn in a worker thread, and the
+    #                     Tk timer that polls its analysis. The pondering is stopped while it searches.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def start_hint_search(self):
+        if self.ai_is_thinking() or self.hint_thread is not None or self.current_player != 1 or \
+           not self.current_player_can_move():
+            return
+        self.ponderer.stop()
+        self.clear_hint()
+        self.hint_results = queue.Queue()
+        self.hint_stop_event = threading.Event()
+        self.hint_thread = threading.Thread(
+            target=self.run_hint_search, args=(self.position.copy(), self.hint_results, self.hint_stop_event),
+            daemon=True)
+        self.hint_thread.start()
+        self.board.print("Hint: thinking...")
+        self.hint_poll_id = self.board._canvas.after(AI_POLL_INTERVAL_MS, self.show_hint)
 
         # Time Complexity:
-        # Constant in all cases at a O(N), creating a list of moves depends on the size of the board
+        # Worst, Average, and Best case = O(1), the search runs in the hint thread
         ################################################################################################################################
-    
+
     ################################################################################################################################
-    # Method description: This method simulates a move, analyses its effect, and then returns the board to its initial
-    #                     configuration in order to determine how effective a particular move is in a board game.
+    # Method description: Body of the hint worker thread: analyzes the position with the hint search engine.
     # Parameters: (self is implicit)
-    #              move: The move to evaluate
-    # Returns: A score that represents how effective the move was.
-    def evaluate_move_greedy(self, move):
-        original_number_of_disks_AI_player = self.num_disks_dictionary[2]
-
-        original_board = self.copy_board_cell_states()
-
-        # Make the move in the board (including flips) temporarily to simulate the move
-        self.make_move(move)
-
-        after_move_board = self.copy_board_cell_states()
-
-        # Evaluate the board after making the move
-        score = self.evaluate_board_state(original_number_of_disks_AI_player, original_board, after_move_board)
+    #              search_position: Copy of the engine position, with the human player to move
+    #              hint_results: queue.Queue where the analysis is posted
+    #              stop_event: threading.Event that cancels the search when it is set
+    # Returns: None
+    def run_hint_search(self, search_position, hint_results, stop_event):
+        hint_results.put(self.hint_search_engine.analyze(search_position, HINT_MOVES,
+                                                         search_position.geometry.num_squares,
+                                                         HINT_TIME_BUDGET_SECONDS, stop_event))
 
-        # Revert the move and flips
-        self.undo_last_move()
+        # Time Complexity: Inherits from the analyze() method of the search engine (bounded by the time budget)
+        ################################################################################################################################
 
-        return score
+    ################################################################################################################################
+    # Method description: Tk timer callback of the hint: when the analysis is ready, numbers the best moves on the
+    #                     board with their scores, shows the principal variation of the best one in the output bar,
+    #                     and starts pondering again.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def show_hint(self):
+        try:
+            analysis = self.hint_results.get_nowait()
+        except queue.Empty:
+            self.hint_poll_id = self.board._canvas.after(AI_POLL_INTERVAL_MS, self.show_hint)
+            return
+        self.hint_poll_id = None
+        self.hint_thread.join()
+        self.hint_thread = None
+
+        canvas = self.board._canvas
+        cell_pitch = self.cell_size + CELL_SPACING
+        for rank, move_analysis in enumerate(analysis[:HINT_MOVES], 1):
+            row, col = move_analysis.move
+            canvas.create_text(self.board.margin + col * cell_pitch + self.cell_size // 2,
+                               self.board.margin + row * cell_pitch + self.cell_size // 2,
+                               text="%d\n%s" % (rank, move_analysis.score_text()), justify="center",
+                               fill=HINT_TEXT_COLOR, font=("Helvetica", max(7, self.cell_size // 6), "bold"),
+                               tags=HINT_CANVAS_TAG)
+        if analysis:
+            best = analysis[0]
+            self.board.print("Hint (depth %d): %s   %s" % (
+                best.depth, " ".join(othello_history.move_text(move) for move in best.principal_variation),
+                "  ".join("%s %s" % (othello_history.move_text(move_analysis.move), move_analysis.score_text())
+                          for move_analysis in analysis[:HINT_MOVES])))
+        self.start_pondering()
 
         # Time Complexity:
-        # Constant in all cases at a O(N^2) derived from the best average and worst cases from the make_move, 
-        # copy_board_cell_states, evaluate_board_state, and undo_last_move functions/methods
+        # Worst, Average, and Best case = O(H + L), H being HINT_MOVES and L the length of the variation
         ################################################################################################################################
 
-    ################################################################################################################################    
-    # Method description: This function can predict the outcome of a move several turns in advance
-    #                     helping the AI and the computer to determine its next move.
-    # Parameters: (self is implicit)
-    #              move: The move to evaluate
-    #              current_depth: The current depth of the game tree
-    #              max_depth: The maximum depth of the game tree
-    # Returns: A score that represents how effective the move was.
-    def evaluate_move_minimax(self, move, current_depth=0, max_depth=3):
-        original_number_of_disks_AI_player = self.num_disks_dictionary[2]
-
-        original_board = self.copy_board_cell_states()
-
-        # Make the move in the board (including flips) temporarily to simulate the move
-        self.make_move(move)
-
-        after_move_board = self.copy_board_cell_states()
-        
-        if current_depth == max_depth:
-            # Base case: Evaluate the board at the current depth
-            score = self.evaluate_board_state(original_number_of_disks_AI_player, original_board, after_move_board)
-        else:
-            # Evaluate the board after making the move
-            score = self.evaluate_board_state(original_number_of_disks_AI_player, original_board, after_move_board)
-
-            # Depending on the depth, switch between AI and opponent moves
-            next_player = self.current_player if current_depth % 2 == 0 else 3 - self.current_player
-
-            # Generate potential moves for the next player
-            next_moves = self.get_possible_moves_by_current_player()
-            if next_moves:
-                for next_move in next_moves:
-                    if next_player == self.current_player:
-                        # Maximize AI score
-                        score += self.evaluate_move_minimax(next_move, current_depth + 1, max_depth)
-                    else:
-                        # Minimize opponent score
-                        score -= self.evaluate_move_minimax(next_move, current_depth + 1, max_depth)
-
-        self.undo_last_move()
-        return score
+    ################################################################################################################################
+    # Method description: Stops the hint search in progress, if any, and removes the hint from the board (the
+    #                     position it was for is changing).
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def clear_hint(self):
+        if self.hint_thread is not None:
+            self.hint_stop_event.set()
+            self.hint_thread.join()
+            self.hint_thread = None
+        if self.hint_poll_id is not None:
+            self.board._canvas.after_cancel(self.hint_poll_id)
+            self.hint_poll_id = None
+        self.board._canvas.delete(HINT_CANVAS_TAG)
 
         # Time Complexity:
-        # Best Case: O(1) When a winning move is found early in the game tree (logical tree that is implicitly formed by 
-        #                  the recursive calls), the algorithm can stop further exploration of that branch and return the 
-        #                  winning move.
-        # Average and Worst Case: O(b^d) The average case time complexity is typically the same as the worst case for 
-        #                          the Minimax algorithm. This is because, on average, the algorithm needs to explore 
-        #                          all the nodes in the game tree. Where b is the branching factor 
-        #                          (the average number of moves available at any point) and d is the depth of the 
-        #                          tree (max_depth in this case). This is because the algorithm generates all possible moves 
-        #                          up to a certain depth and evaluates them. In the worst case scenario, each move leads to 'b' 
-        #                          other moves, and this continues for 'd' levels deep. Hence, the time complexity is exponential.
+        # Worst, Average, and Best case = O(1), waiting for at most DEADLINE_CHECK_INTERVAL nodes of the search
         ################################################################################################################################
-    
+
     ################################################################################################################################
-    # Method description: The function finds and executes the best possible move for the current player in the board game.
-    #                     depending on the difficulty level selected by the user, it will use the greedy or minimax algorithms.
+    # Method description: Writes the statistics of an AI move to the search log and shows them in the output bar,
+    #                     if they are enabled.
     # Parameters: (self is implicit)
+    #              search_statistics: othello_search.SearchStatistics of the move
     # Returns: None
-    def make_best_move_by_current_player(self):
-            best_score = float('-inf')
-            best_move = None
-
-            # Get all possible moves for the AI player
-            possible_moves = self.get_possible_moves_by_current_player()
-
-            # Evaluate each move using the random, greedy or minimax function/method
-            for move in possible_moves:
-                if self.difficulty == "M":
-                    score = self.evaluate_move_greedy(move)
-                elif self.difficulty == "H":
-                    score = self.evaluate_move_minimax(move)
-
-                # Select the move with the highest score
-                if score > best_score:
-                    best_score = score
-                    best_move = move
-
-            # Make the best move if one is found
-            if best_move:
-                self.current_move = best_move
-                self.make_current_move()
+    def report_search_statistics(self, search_statistics):
+        self.last_search_statistics = search_statistics
+        if self.search_log is not None:
+            self.search_log.write(search_statistics, difficulty=self.difficulty,
+                                  disks=[self.num_disks_dictionary[1], self.num_disks_dictionary[2]])
+        if self.show_search_statistics:
+            self.board.print(search_statistics.summary())
 
-        # TimeComplexity:
-        # Worst case = O(N * M), maximum number of possible moves to consider.
-        # Average case =  O(N_avg * M), depends on the average number of possible moves the AI can make
-        # Best case = O(N), evaluating a single move
+        # Time Complexity:
+        # Worst, Average, and Best case = O(I), I being the number of iterations of the search
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Tells if the AI is searching its move, while the human player has to wait.
+    # Parameters: None (self is implicit)
+    # Returns: True if an AI search is in progress, False if not.
+    def ai_is_thinking(self):
+        return self.ai_search_thread is not None
         ################################################################################################################################
 
     ################################################################################################################################
@@ -689,7 +672,8 @@ class Game:
     # Parameters: (self is implicit)
     # Returns: True if the game is over, False if not.
     def is_game_over(self):
-            if not self.player_can_move(1) and not self.player_can_move(2):
+            if self.legal_moves.game_is_over():
+                print("Game transcript: " + self.move_log.to_transcript(self.board_size_n))
                 if self.num_disks_dictionary[1] > self.num_disks_dictionary[2]:
                     print('*****************')
                     print('Wooohooo! You won!! Congrats!!')
@@ -706,12 +690,51 @@ class Game:
                 return False # Game is not over yet
 
         # TimeComplexity:
-        # Worst case = After confirming that neither player can move, it performs the constant time
-        # operation of comparing disk counts, but this does not affect the overall complexity.
-        # Average case =  2 * O(N), both players before determining if the game is over
-        # Best case = O(N), when player 1 wins, thus does not need to check player 2
+        # Worst, Average, and Best case = O(1), the legal moves of both players are computed once per move
+        # (writing the transcript of a finished game is O(P), P being the number of plies)
         ################################################################################################################################
     
+    ################################################################################################################################
+    # Method description: Finds the cell under a point of the board canvas (game2dboard looks for it cell by cell,
+    #                     which is too slow for every mouse move).
+    # Parameters: (self is implicit)
+    #              x, y: The pixel coordinates in the canvas
+    # Returns: The (row, col) of the cell, or None if the point is on the margin or the grid lines.
+    def cell_at_pixel(self, x, y):
+        cell_pitch = self.cell_size + CELL_SPACING
+        row, y_in_cell = divmod(y - self.board.margin, cell_pitch)
+        col, x_in_cell = divmod(x - self.board.margin, cell_pitch)
+        if 0 < x_in_cell < self.cell_size and 0 < y_in_cell < self.cell_size and \
+           0 <= row < self.board_size_n and 0 <= col < self.board_size_n:
+            return (row, col)
+        return None
+
+        # TimeComplexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Triggered when the mouse moves over the board: on the human player's turn, the cursor
+    #                     becomes a hand over the cells where a disk can be placed.
+    # Parameters: (self is implicit)
+    #              event: The Tk mouse event, with the x, y pixel coordinates
+    # Returns: None
+    def show_move_under_mouse(self, event):
+        cell = self.cell_at_pixel(event.x, event.y)
+        # The cursor is only updated when the mouse enters another cell or the position changed
+        hovered_cell = (cell, self.position.hash_key())
+        if hovered_cell == self.hovered_cell or self.ai_is_thinking():
+            return
+        self.hovered_cell = hovered_cell
+        if cell is not None and self.current_player == 1 and self.move_has_disk_to_flip(cell, 1):
+            self.board.cursor = "hand2"
+        else:
+            self.board.cursor = "arrow"
+
+        # TimeComplexity:
+        # Worst, Average, and Best case = O(1), a bit test once per cell entered
+        ################################################################################################################################
+
     ################################################################################################################################
     # Method description: Triggered when the user clicks on the board with the mouse.
     #                     It shouldnt directly go through here if the computer is thinking/moving.
@@ -725,6 +748,10 @@ class Game:
                         btn: Mouse button clicked
                         r, c are the row/column coordinates where the user clicked on the board.
         '''
+        # Clicks are ignored while the computer is thinking/moving
+        if self.ai_is_thinking():
+            return
+
         # Indicate that the game is processing the user's input
         self.board.cursor = "wait"
         
@@ -745,8 +772,9 @@ class Game:
                     return
 
                 self.current_player = 2
-                # Start the timer for the AI move after the human player's turn
-                self.board.start_timer(2000)
+                # The AI starts thinking at once in its worker thread; the timer shows its move when it is ready
+                self.start_ai_search()
+                return
 
             else:
                 print("Current move is NOT legal: ",r," ", c)
@@ -760,184 +788,148 @@ class Game:
         ################################################################################################################################
     
     ################################################################################################################################
-    # Method description: This function creates the AI's game plan. Making sure that it makes a move when it is its 
+    # Method description: This function creates the AI's game plan. Making sure that it makes a move when it is its
     #                     turn or until human player can move once more.
+    #                     It is the timer callback: it polls the result of the AI worker thread without blocking the
+    #                     window, plays the AI move when it is ready, and starts a new search when the human player
+    #                     has to pass.
     # Parameters: (self is implicit)
     # Returns: None
     def play_as_ai_computer_player(self):
-        
+        if not self.ai_is_thinking():
+            # No search in progress (e.g. the timer fired after the search was cancelled)
+            self.board.stop_timer()
+            return
+
+        if time.perf_counter() < self.ai_move_not_before:
+            return
+        try:
+            search_id, ai_move, search_statistics = self.ai_results.get_nowait()
+        except queue.Empty:
+            return  # Still thinking, the window keeps running until the next poll
+        if search_id != self.ai_search_id:
+            return  # Result of a cancelled search
+
         # Disable the Timer to prevent re-triggering
         self.board.stop_timer()
-
-        # Set the cursor to indicate AI is processing
-        self.board.cursor = "wait"
+        self.ai_search_thread.join()
+        self.ai_search_thread = None
 
         # AI's turn to play
-        # if human player cannot move and is not game over the computer keeps playing with this loop
-        while True:    
-            self.current_player = 2
-            if self.current_player_can_move():
-                print("AI (Player 2) is making a move...")
-                time.sleep(1) # Simulate AI thinking time
-
-            if self.difficulty == "E":
-                self.make_random_move_by_current_player()
-            else: # Medium or Hard
-                # AI makes the best move selected by the algorithm
-                # self.make_random_move_by_current_player()
-                self.make_best_move_by_current_player()
-
-            # Check if the game is over after the AI move
-            if self.is_game_over():
-                self.board.cursor = "arrow"
-                return
-            
-            self.current_player = 1
-            if self.current_player_can_move():
-                self.board.cursor = "arrow"
-                # if human player can move after computer´s turn, then exit the loop
-                break
-        
+        if ai_move:
+            print("AI (Player 2) is making a move...")
+            self.current_move = ai_move
+            self.make_current_move()
+            self.report_search_statistics(search_statistics)
+
+        # Check if the game is over after the AI move
+        if self.is_game_over():
+            self.board.cursor = "arrow"
+            return
+
+        self.current_player = 1
+        if self.current_player_can_move():
+            self.board.cursor = "arrow"
+            self.start_pondering()
+            return
+
+        # if human player cannot move and is not game over the computer keeps playing
+        self.current_player = 2
+        self.start_ai_search()
+
         # TimeComplexity:
-        # Worst case = O(W * (M + B + G)), maximum number of iterations as W that AI will make
-        # Average case = O(A * (M + B + G)), a few moves between the AI and the human player
-        # Best case =  O(M + B + G), if the game ends after the computer first move.
+        # Worst and Average case = O(M + B + G), making the AI move, checking the board and if the game is over
+        # Best case =  O(1), when the AI is still thinking
         ################################################################################################################################
 
     ################################################################################################################################
-    # Method description: This function is used to count the number of disks for each player in the board.
-    # Parameters: (self is implicit)
-    #              board: The board to count the disks for each player
-    # Returns: A dictionary with the number of disks for each player.
-    def count_disks(self, board):
-        num_disks_dictionary = {1: 0, 2: 0}
-        for row in board:
-            for cell in row:
-                if cell in num_disks_dictionary:
-                    num_disks_dictionary[cell] += 1
-        return num_disks_dictionary
-    
-        # Time Complexity: O(N^2): The function cycles through every board cell.
-        # The board has a quadratic time complexity if it is N x N in size and needs to check N^2 cells.
+    # Method description: Undoes the last ply of the move log: the engine position XORs the placed and flipped disks
+    #                     back. The board widget is painted by the caller, once for all the undone plies.
+    # Parameters: None (self is implicit)
+    # Returns: The MoveRecord of the undone ply.
+    def undo_ply(self):
+        record = self.move_log.pop()
+        self.position.undo_last_move()
+        return record
+
+        # TimeComplexity:
+        # Worst, Average, and Best case = O(F), F being the number of flipped disks
         ################################################################################################################################
 
     ################################################################################################################################
-    # Method description: This function undoes the last move, usually needed after evaluating moves for AI.
+    # Method description: Plays again a ply that was undone, and adds it back to the move log. The board widget is
+    #                     painted by the caller, once for all the redone plies.
     # Parameters: (self is implicit)
+    #              record: The MoveRecord of the ply
     # Returns: None
-    def undo_last_move(self):
-        self.board.cursor = "arrow"
-
-        if len(self.algo_stack) < 2:
-           print("Not possible to undo move since there are no moves to undo.")
-           return
-        
-        # remove the last move from the stack
-        self.algo_stack.remove(self.algo_stack[-1])
-
-        # get last value of the stack without removing it
-        previous_state = self.algo_stack[-1]
-
-        rows_array = range(0, self.board.nrows, 1)
-        cols_array = range(0, self.board.ncols, 1)
-        matrix = previous_state["board"]
-        for row in rows_array:
-            for col in cols_array:
-                self.board[row][col] = matrix[row][col]
-
-        # (ADLT) possible issue with reference to the board, since it is not being updated
-        # self.num_disks_dictionary = previous_state["num_disks_dictionary"]
-        # count_disks() function fixes this issue
-        self.num_disks_dictionary = self.count_disks(self.board)
-
-        # refresh of the board is done when the function is finished
+    def redo_ply(self, record):
+        self.position.current_player = record.player
+        self.position.apply_move(record.square, record.flipped)
+        self.move_log.append(record)
 
         # TimeComplexity:
-        # Worst case and Average case = O(n^2), performs the whole code given back two moves
-        # Best case =   O(1), if there are less the two moves in the stack, returning immediatly
+        # Worst, Average, and Best case = O(F), F being the number of flipped disks
         ################################################################################################################################
-    
+
     ################################################################################################################################
-    # Method description: This function undoes the last two moves, when requested by the human user (pressing u on the keyboard).
+    # Method description: This function undoes the last moves, when requested by the human user (pressing u on the keyboard):
+    #                     the moves of the AI after the last human move (more than one if the human had to pass),
+    #                     and the human move itself, so it is the human player's turn again.
     # Parameters: (self is implicit)
     # Returns: None
     def undo_last_two_moves(self):
+        # A search in progress is for the position that is being undone
+        self.cancel_ai_search()
         self.board.cursor = "arrow"
 
-        if len(self.algo_stack) < 2:
+        records = self.move_log.records
+        number_of_ai_plies = 0
+        while number_of_ai_plies < len(records) and records[-1 - number_of_ai_plies].player == 2:
+            number_of_ai_plies += 1
+        if number_of_ai_plies == len(records):
            print("Not possible to undo move since there are no moves to undo.")
+           self.start_pondering()
            return
-        # check if the last 2 moves are the same player
-        # (ADLT) need to improve with a loop removing moves while from the same user/player
-        if self.check_last_two_moves_from_same_player() or self.algo_stack[-1]["current_player"] == 1:
-            # removes the last move from the stack (usally AI move)
-            self.algo_stack.pop()
-        else:
-            # removes the last 2 moves from the stack (usually AI moves)
-            self.algo_stack.pop()
-            self.algo_stack.pop()
-
-        # remove the human player move from the stack
-        previous_state = self.algo_stack.pop()
-
-        rows_array = range(0, self.board.nrows, 1)
-        cols_array = range(0, self.board.ncols, 1)
-        matrix = previous_state["board"]
-        for row in rows_array:
-            for col in cols_array:
-                self.board[row][col] = matrix[row][col]
-
-        if len(self.algo_stack) == 0:
-            # if we only have the initial move/postition, then the current player´s turn is 1
-            self.current_player = 2
-            self.save_moves()
-            self.current_player = 1
-        else:
-            self.current_player = previous_state["current_player"]
-            self.save_moves()
-            # The current players turn is the contrary of the previous state
-            self.current_player = 3 - previous_state["current_player"]
-        
-        self.num_disks_dictionary = previous_state["num_disks_dictionary"]
-        # refresh of the board is done when the function is finished
+
+        undone_records = [self.undo_ply() for _ in range(number_of_ai_plies + 1)]
+        undone_records.reverse()
+        self.move_log.push_undone_group(undone_records)
+        self.current_player = 1
+        # Only the cells changed by the undone plies are painted, in one update
+        self.renderer.render(self.position)
+        self.start_pondering()
 
         # TimeComplexity:
-        # Best case = O(1), if there are less the two moves in the stack, returning immediately
-        # Worst case and Average case = O(n^2), performs the whole code given back two moves
+        # Best case = O(1), if there are no moves to undo, returning immediately
+        # Worst case and Average case = O(F), F being the number of disks flipped by the undone moves
         ################################################################################################################################
-    
+
     ################################################################################################################################
-    # Method description: This function saves the state of the board usually invoked after a move is made.
+    # Method description: Redoes the moves undone by the last undo (pressing r on the keyboard). If it is then the
+    #                     AI's turn, it starts searching its move.
     # Parameters: (self is implicit)
     # Returns: None
-    def save_moves(self):
-        state = {
-            "board": self.copy_board_cell_states(),
-            "current_player": self.current_player,
-            "num_disks_dictionary": self.copy_num_disks_dictionary(self.num_disks_dictionary)
-        }
-        self.algo_stack.append(state)
+    def redo_undone_moves(self):
+        if self.ai_is_thinking() or not self.move_log.can_redo():
+            return
 
-        # TimeComplexity:
-        # Best case = O(1), if the copy_board_cell_states() and copy_num_disks_dictionary() functions both have 
-        #             a best case time complexity of O(1), meaning they can complete their tasks in constant time.
-        # Worst and Average case = O(n), if the copy_board_cell_states() and copy_num_disks_dictionary() functions both have
-        #                           a worst and average case time complexity of O(n), meaning they can complete their tasks
-        #                           in linear time.
-        ################################################################################################################################
+        self.ponderer.stop()
+        self.clear_hint()
+        for record in self.move_log.pop_undone_group():
+            self.redo_ply(record)
+        self.renderer.render(self.position)
 
-    ################################################################################################################################
-    # Method description: This function creates a copy of the dictionary of the number of disks for each player.
-    # Parameters: (self is implicit)
-    #              original_dict: The dictionary to copy
-    # Returns: A copy of the dictionary of the number of disks for each player.
-    def copy_num_disks_dictionary(self, original_dict):
-        new_dict = {}
-        for key, value in original_dict.items():
-            new_dict[key] = value
-        return new_dict
+        if self.is_game_over():
+            return
+        self.current_player = 3 - self.move_log.last_record().player
+        if not self.current_player_can_move():
+            self.current_player = 3 - self.current_player  # Pass
+        if self.current_player == 2:
+            self.start_ai_search()
+        else:
+            self.start_pondering()
 
         # TimeComplexity:
-        # Best case = O(1), if no disks are found
-        # Average and Worst case = O(n), if all the cells have a disk that needs to be copied
-        ################################################################################################################################
\ No newline at end of file
+        # Worst, Average, and Best case = O(F), F being the number of disks flipped by the redone moves
+        ################################################################################################################################
+
@@ -0,0 +1,196 @@
+import re
+from othello_engine import Position
+
+####################################################################################################################
+# Module description: Move log of a game. Every ply is stored as its square, its player and the bitboard of the
+#                     disks it flipped, which is all that is needed to undo it (XOR the disks back) or to redo it,
+#                     in O(flipped disks), instead of a copy of the whole board per ply.
+#                     The log is also written as a compact transcript, the usual Othello notation with the board
+#                     size in front, e.g. "8:f5d6c3d3c4": one letter for the column (a, b, ...) and the row number
+#                     per move. Passes are not written: a player who cannot move passes, so replaying the moves
+#                     finds them again.
+
+# Column letters of the transcripts (boards up to 32 columns)
+COLUMN_LETTERS = "abcdefghijklmnopqrstuvwxyzABCDEF"
+TRANSCRIPT_MOVE_PATTERN = re.compile(r"([a-zA-F])([0-9]+)")
+
+####################################################################################################################
+# Class description: One ply of the move log. __slots__ keeps it to three references per ply.
+class MoveRecord:
+
+    __slots__ = ("square", "player", "flipped")
+
+    ################################################################################################################################
+    # Method description: Creates the record of a ply.
+    # Parameters: (self is implicit)
+    #              square: Index of the move square (row * board_size_n + col)
+    #              player: The player who made the move
+    #              flipped: Bitboard of the disks flipped by the move
+    def __init__(self, square, player, flipped):
+        self.square = square
+        self.player = player
+        self.flipped = flipped
+        ################################################################################################################################
+
+####################################################################################################################
+# Class description: Move log of a game with undo and redo. Undone plies are kept (in groups, one group per undo)
+#                    until a new move is played, so they can be redone.
+class MoveLog:
+
+    ################################################################################################################################
+    # Method description: Creates an empty log.
+    # Parameters: None (self is implicit)
+    def __init__(self):
+        self.records = []
+        self.undone_groups = []
+        ################################################################################################################################
+
+    def __len__(self):
+        return len(self.records)
+
+    ################################################################################################################################
+    # Method description: Empties the log, for a new game.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def clear(self):
+        self.records.clear()
+        self.undone_groups.clear()
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Adds the last move of a position to the log. A new move makes the undone plies impossible
+    #                     to redo.
+    # Parameters: (self is implicit)
+    #              position: The engine Position, right after the move was made
+    # Returns: None
+    def record_last_move(self, position):
+        square, flipped, player = position.move_history[-1]
+        self.records.append(MoveRecord(square, player, flipped))
+        self.undone_groups.clear()
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Gives the last ply of the log without removing it.
+    # Parameters: None (self is implicit)
+    # Returns: The last MoveRecord, or None if the log is empty.
+    def last_record(self):
+        return self.records[-1] if self.records else None
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Removes the last ply of the log, to be undone.
+    # Parameters: None (self is implicit)
+    # Returns: The removed MoveRecord.
+    def pop(self):
+        return self.records.pop()
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Keeps a group of undone plies, so they can be redone together.
+    # Parameters: (self is implicit)
+    #              records: The undone MoveRecords, in the order they were played
+    # Returns: None
+    def push_undone_group(self, records):
+        self.undone_groups.append(records)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Tells if there are undone plies to redo.
+    # Parameters: None (self is implicit)
+    # Returns: True if a group of plies can be redone, False if not.
+    def can_redo(self):
+        return bool(self.undone_groups)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Removes the last group of undone plies, to be redone. The caller adds them back to the log
+    #                     with append() as it replays them.
+    # Parameters: None (self is implicit)
+    # Returns: The list of MoveRecords of the group, in the order they were played.
+    def pop_undone_group(self):
+        return self.undone_groups.pop()
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Adds a redone ply back to the log (the other undone groups stay redoable).
+    # Parameters: (self is implicit)
+    #              record: The MoveRecord
+    # Returns: None
+    def append(self, record):
+        self.records.append(record)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Writes the moves of the log as a transcript.
+    # Parameters: (self is implicit)
+    #              board_size_n: The number of rows and columns of the board
+    # Returns: The transcript text, e.g. "8:f5d6c3".
+    def to_transcript(self, board_size_n):
+        return "%d:%s" % (board_size_n, "".join(
+            "%s%d" % (COLUMN_LETTERS[record.square % board_size_n], record.square // board_size_n + 1)
+            for record in self.records))
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(P), P being the number of plies
+        ################################################################################################################################
+
+####################################################################################################################
+# Method description: Writes a move in the notation of the transcripts.
+# Parameters: move: The (row, col) move
+# Returns: The move text, e.g. "f5".
+def move_text(move):
+    return "%s%d" % (COLUMN_LETTERS[move[1]], move[0] + 1)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Reads the moves of a transcript. Raises ValueError if it is not a transcript.
+# Parameters: transcript: The transcript text, e.g. "8:f5d6c3"
+# Returns: A (board_size_n, list of (row, col) moves) tuple.
+def parse_transcript(transcript):
+    size_text, separator, moves_text = transcript.strip().partition(":")
+    if not separator or not size_text.isdigit():
+        raise ValueError("A transcript starts with the board size, e.g. 8:f5d6")
+    board_size_n = int(size_text)
+    moves = []
+    position_in_text = 0
+    for match in TRANSCRIPT_MOVE_PATTERN.finditer(moves_text):
+        if match.start() != position_in_text:
+            break
+        moves.append((int(match.group(2)) - 1, COLUMN_LETTERS.index(match.group(1))))
+        position_in_text = match.end()
+    if position_in_text != len(moves_text):
+        raise ValueError("Invalid move in transcript at: %s" % moves_text[position_in_text:])
+    return (board_size_n, moves)
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(L), L being the length of the transcript
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Replays a transcript from the starting position, finding the passes. Raises ValueError if a
+#                     move is not legal.
+# Parameters: transcript: The transcript text
+#             move_log: MoveLog where the plies are recorded, or None
+# Returns: The engine Position after the last move, with the player to move as current player (the same player
+#          if the game is over).
+def replay_transcript(transcript, move_log=None):
+    board_size_n, moves = parse_transcript(transcript)
+    position = Position(board_size_n)
+    for move_number, move in enumerate(moves, 1):
+        if not position.current_player_can_move():
+            position.current_player = 3 - position.current_player  # Pass
+        if not position.coord_is_valid(move[0], move[1]) or not position.make_move(move):
+            raise ValueError("Move %d %s is not legal" % (move_number, move))
+        if move_log is not None:
+            move_log.record_last_move(position)
+        position.current_player = 3 - position.current_player
+    if not position.current_player_can_move() and position.player_can_move(3 - position.current_player):
+        position.current_player = 3 - position.current_player  # Pass
+    return position
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(P), P being the number of plies
+    ####################################################################################################################
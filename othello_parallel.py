@@ -0,0 +1,347 @@
+import concurrent.futures
+import multiprocessing
+import os
+import time
+from othello_engine import Position, popcount, legal_moves_bitboard
+from othello_search import SearchEngine, SearchStatistics, SearchTimeout, MoveAnalysis, order_moves, \
+    endgame_solver_score, endgame_solver_analysis, collect_statistics, HARD_SEARCH_DEPTH, INFINITE_SCORE, \
+    NEW_ITERATION_TIME_FRACTION
+from othello_transposition import TranspositionTable, EXACT_BOUND, UPPER_BOUND
+
+####################################################################################################################
+# Module description: Root-parallel version of the Hard difficulty search for machines with several cores.
+#                     Every iteration of the iterative deepening searches the first (best ordered) root move alone
+#                     to get a good alpha, and then the other root moves at the same time in a pool of worker
+#                     processes (processes, not threads, so each one gets its own core and interpreter lock).
+#                     The best root score found so far is shared between the workers, and every root move starts
+#                     its search with it as alpha, so the moves that cannot beat it are still pruned. A worker also
+#                     sees the better alphas published while it searches: it reads the shared value with its
+#                     deadline checks, and searches its move again with the narrower window (the transposition
+#                     table keeps the work already done).
+#                     The pool is created once and kept between moves; each worker keeps its own
+#                     transposition table, so it also keeps what it learned in the previous moves.
+
+# Memory of the transposition table of each worker process (in megabytes)
+WORKER_TRANSPOSITION_TABLE_SIZE_MB = 16
+
+# How often (in seconds) the main process checks the deadline and the stop event while the workers search
+RESULT_POLL_INTERVAL_SECONDS = 0.005
+
+# Globals of a worker process, set by initialize_worker()
+worker_search_engine = None
+worker_shared_alpha = None
+worker_stop_flag = None
+worker_search_id = 0
+
+####################################################################################################################
+# Class description: Boolean shared between processes with the interface of threading.Event used by the search,
+#                    so SearchEngine.negamax() stops when another process sets it.
+class SharedStopFlag:
+
+    def __init__(self, shared_value):
+        self.shared_value = shared_value
+
+    def is_set(self):
+        return self.shared_value.value != 0
+
+####################################################################################################################
+# Class description: Stop flag of a root move search that also stops it when another worker shares a better alpha
+#                    than the one it is searching with, so the move can be searched again with the narrower window.
+class SharedAlphaStopFlag(SharedStopFlag):
+
+    def __init__(self, shared_value, shared_alpha):
+        SharedStopFlag.__init__(self, shared_value)
+        self.shared_alpha = shared_alpha
+        # Alpha of the running search, None when it does not use the shared alpha
+        self.alpha = None
+
+    def is_set(self):
+        return self.shared_value.value != 0 or (self.alpha is not None and self.shared_alpha.value > self.alpha)
+
+####################################################################################################################
+# Method description: Initializer of every worker process: creates its search engine and keeps the shared values.
+# Parameters: shared_alpha: multiprocessing.Value with the best root score of the running iteration
+#             stop_flag: multiprocessing.Value set to 1 by the main process to stop the searches
+#             transposition_table_size_mb: Memory of the transposition table of the worker, 0 for none
+#             pattern_evaluation: True to evaluate with the pattern weights when they are available
+# Returns: None
+def initialize_worker(shared_alpha, stop_flag, transposition_table_size_mb, pattern_evaluation=True):
+    global worker_search_engine, worker_shared_alpha, worker_stop_flag
+    transposition_table = None
+    if transposition_table_size_mb > 0:
+        transposition_table = TranspositionTable(size_in_mb=transposition_table_size_mb)
+    worker_search_engine = SearchEngine(transposition_table, pattern_evaluation=pattern_evaluation)
+    worker_shared_alpha = shared_alpha
+    worker_stop_flag = SharedAlphaStopFlag(stop_flag, shared_alpha)
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(E), E being the number of entries of the transposition table
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Task of a worker process: searches one root move. Its alpha is the best root score shared by
+#                     all the workers, and a better score found here is shared back. When another worker shares a
+#                     better alpha during the search, the move is searched again with it.
+# Parameters: board_size_n: The number of rows and columns of the board
+#             player_1_disks, player_2_disks: Bitboards of the root position (two ints, whatever the board size)
+#             current_player: The player to move at the root
+#             square: Index of the root move square
+#             depth: Depth of the iteration
+#             time_left: Seconds until the deadline of the search, or None
+#             search_id: Identifier of the search (a new one is a new move of the game)
+#             share_alpha: False to search the move with a full window (exact score), without the shared alpha
+# Returns: A (score, alpha, nodes_searched, transposition_hits, leaf_evaluations, cutoffs) tuple, or None if the
+#          search was stopped.
+#          A score <= the alpha it was searched with is only an upper bound: the move is not better than the best one.
+def search_root_move(board_size_n, player_1_disks, player_2_disks, current_player, square, depth, time_left, search_id,
+                     share_alpha=True):
+    global worker_search_id
+    search_engine = worker_search_engine
+    if search_id != worker_search_id:
+        worker_search_id = search_id
+        if search_engine.transposition_table is not None:
+            search_engine.transposition_table.new_search()
+
+    position = Position(board_size_n)
+    position.load_bitboards(player_1_disks, player_2_disks, current_player)
+    search_engine.prepare_position(position)
+    search_engine.nodes_searched = 0
+    search_engine.transposition_hits = 0
+    search_engine.leaf_evaluations = 0
+    search_engine.cutoffs = 0
+    search_engine.deadline = None if time_left is None else time.perf_counter() + time_left
+    search_engine.stop_event = worker_stop_flag
+
+    try:
+        while True:
+            alpha = worker_shared_alpha.value if share_alpha else -INFINITE_SCORE
+            worker_stop_flag.alpha = alpha if share_alpha else None
+            try:
+                score = search_engine.search_move(position, square, depth, alpha, INFINITE_SCORE)
+                break
+            except SearchTimeout:
+                if worker_stop_flag.shared_value.value != 0 or \
+                   (search_engine.deadline is not None and time.perf_counter() >= search_engine.deadline):
+                    return None
+                # Another worker shared a better alpha: the moves of the stopped search are undone, and the move
+                # is searched again
+                while position.move_history:
+                    position.undo_last_move()
+    finally:
+        search_engine.deadline = None
+        search_engine.stop_event = None
+        worker_stop_flag.alpha = None
+
+    with worker_shared_alpha.get_lock():
+        if score > worker_shared_alpha.value:
+            worker_shared_alpha.value = score
+    return (score, alpha, search_engine.nodes_searched, search_engine.transposition_hits,
+            search_engine.leaf_evaluations, search_engine.cutoffs)
+
+    # Time Complexity: Inherits from SearchEngine.negamax
+    ####################################################################################################################
+
+####################################################################################################################
+# Class description: Search engine with the interface of othello_search.SearchEngine that searches the root moves
+#                    in a persistent pool of worker processes.
+class ParallelSearchEngine:
+
+    ################################################################################################################################
+    # Method description: Creates the engine and its pool of worker processes (started on the first search).
+    # Parameters: (self is implicit)
+    #              number_of_workers: Number of worker processes, by default one per core
+    #              transposition_table_size_mb: Memory of the transposition table of each worker, 0 for none
+    #              endgame_solver: othello_endgame.EndgameSolver used (in this process) when few cells are empty, or None
+    #              pattern_evaluation: True to evaluate with the pattern weights (othello_patterns) when they are
+    #                                  available for the board size
+    def __init__(self, number_of_workers=None, transposition_table_size_mb=WORKER_TRANSPOSITION_TABLE_SIZE_MB,
+                 endgame_solver=None, pattern_evaluation=True):
+        if number_of_workers is None:
+            number_of_workers = os.cpu_count() or 1
+        if number_of_workers < 1:
+            raise ValueError("The number of workers must be at least 1")
+        self.number_of_workers = number_of_workers
+
+        # Worker processes are started fresh ("spawn"): forking a process that runs Tk and threads is not safe
+        context = multiprocessing.get_context("spawn")
+        self.shared_alpha = context.Value("i", -INFINITE_SCORE)
+        self.stop_flag = context.Value("b", 0)
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=number_of_workers, mp_context=context, initializer=initialize_worker,
+            initargs=(self.shared_alpha, self.stop_flag, transposition_table_size_mb, pattern_evaluation))
+        self.search_id = 0
+        # The endgame is searched in the main process: the solver is fast there, and needs no table
+        self.endgame_solver = endgame_solver
+
+        # Statistics of the last search (same as SearchEngine)
+        self.nodes_searched = 0
+        self.transposition_hits = 0
+        self.leaf_evaluations = 0
+        self.cutoffs = 0
+        self.depth_reached = 0
+        self.best_score = 0
+        self.search_time = 0.0
+        self.iterations = []
+        self.statistics = SearchStatistics("search")
+        self.analysis = []
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1), the processes are started when the first task is submitted
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Stops the worker processes. The engine cannot search anymore after it.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def close(self):
+        self.stop_flag.value = 1
+        self.executor.shutdown(wait=True)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Finds the best move of the current player of the position with iterative deepening,
+    #                     like SearchEngine.find_best_move(), searching the root moves in parallel.
+    #                     The analysis of the root moves has their scores, but the principal variations stop at the
+    #                     root move (the transposition tables are in the worker processes). With multi_pv above
+    #                     1, the root moves are searched without the shared alpha, so all their scores are exact.
+    # Parameters: (self is implicit)
+    #              position: The engine Position to search (it is not changed)
+    #              max_depth: Depth (in plies) of the last iteration
+    #              time_limit: Time budget in seconds, or None to always complete max_depth
+    #              stop_event: threading.Event that stops the search when it is set, or None
+    #              multi_pv: Number of best moves whose exact score is wanted
+    # Returns: The best (row, col) move, or None if the current player cannot move.
+    def find_best_move(self, position, max_depth=HARD_SEARCH_DEPTH, time_limit=None, stop_event=None, multi_pv=1):
+        start_time = time.perf_counter()
+        deadline = None if time_limit is None else start_time + time_limit
+        self.search_id += 1
+        self.nodes_searched = 0
+        self.transposition_hits = 0
+        self.leaf_evaluations = 0
+        self.cutoffs = 0
+        self.depth_reached = 0
+        # A search stopped during its first iteration has no score: the one of the previous search is not kept
+        self.best_score = 0
+        self.search_time = 0.0
+        self.iterations = []
+        self.analysis = []
+        self.stop_flag.value = 0
+
+        player = position.current_player
+        own = position.bitboards[player]
+        opponent = position.bitboards[3 - player]
+        root_moves = order_moves(legal_moves_bitboard(own, opponent, position.geometry), position.geometry)
+        if not root_moves:
+            self.statistics = SearchStatistics("search")
+            return None
+
+        # Deeper than the number of empty cells, the search already sees the end of every line
+        number_of_empty_cells = position.geometry.num_squares - popcount(own | opponent)
+        max_depth = min(max_depth, number_of_empty_cells)
+
+        if self.endgame_solver is not None and self.endgame_solver.can_solve(position):
+            best_move = self.endgame_solver.find_best_move(position, time_limit, stop_event, multi_pv)
+            if best_move is not None:
+                self.nodes_searched = self.endgame_solver.nodes_searched
+                self.depth_reached = number_of_empty_cells if self.endgame_solver.completed else 0
+                self.best_score = endgame_solver_score(self.endgame_solver)
+                self.analysis = endgame_solver_analysis(position, self.endgame_solver, number_of_empty_cells)
+                self.search_time = time.perf_counter() - start_time
+                self.statistics = collect_statistics(self, "endgame", best_move)
+                return best_move
+            # The solver was stopped before it solved a root move: the move is searched, in the time left
+
+        for depth in range(1, max_depth + 1):
+            if depth > 1 and time_limit is not None and \
+               time.perf_counter() - start_time > NEW_ITERATION_TIME_FRACTION * time_limit:
+                break
+
+            iteration_start_time = time.perf_counter()
+            iteration_start_nodes = self.nodes_searched
+            self.shared_alpha.value = -INFINITE_SCORE
+            root_scores = {}
+            # The first move alone gives the alpha of the others, then all the others are searched at once
+            for squares in (root_moves[:1], root_moves[1:]):
+                time_left = None if deadline is None else deadline - time.perf_counter()
+                futures = {self.executor.submit(search_root_move, position.board_size_n, position.bitboards[1],
+                                                position.bitboards[2], player, square, depth, time_left,
+                                                self.search_id, multi_pv == 1): square
+                           for square in squares}
+                if not self.wait_for_results(futures, root_scores, deadline, stop_event):
+                    break
+            if len(root_scores) < len(root_moves):
+                break  # Interrupted iteration: its scores are discarded
+
+            # Next iteration starts with the best moves of this one (sort is stable, so ties keep their order)
+            root_moves.sort(key=lambda square: -root_scores[square][0])
+            self.analysis = []
+            for square in root_moves:
+                score, alpha = root_scores[square]
+                move = position.move_of(square)
+                self.analysis.append(MoveAnalysis(move, score, EXACT_BOUND if score > alpha else UPPER_BOUND, depth,
+                                                  [move]))
+            self.depth_reached = depth
+            self.best_score = root_scores[root_moves[0]][0]
+            self.iterations.append((depth, self.nodes_searched - iteration_start_nodes,
+                                    time.perf_counter() - iteration_start_time))
+
+        self.search_time = time.perf_counter() - start_time
+        best_move = position.move_of(root_moves[0])
+        self.statistics = collect_statistics(self, "search", best_move)
+        return best_move
+
+        # Time Complexity:
+        # Worst case = O(b^d), as SearchEngine
+        # Average and Best case = O(b^(d/2) / W), W being the number of workers, when all of them are busy
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Analyzes a position like SearchEngine.analyze(), with the parallel search.
+    # Parameters: (self is implicit)
+    #              position: The engine Position to analyze (it is not changed)
+    #              number_of_moves: Number of best moves whose exact score is wanted
+    #              max_depth: Depth (in plies) of the last iteration
+    #              time_limit: Time budget in seconds, or None to always complete max_depth
+    #              stop_event: threading.Event that stops the search when it is set, or None
+    # Returns: A list of MoveAnalysis, one per legal move, best first (empty if the player to move cannot move).
+    def analyze(self, position, number_of_moves, max_depth=HARD_SEARCH_DEPTH, time_limit=None, stop_event=None):
+        self.find_best_move(position, max_depth, time_limit, stop_event, number_of_moves)
+        return self.analysis
+
+        # Time Complexity: Inherits from find_best_move
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Waits for the root move searches submitted to the workers. When the deadline is reached or
+    #                     the stop event is set, the workers are told to stop and the searches are abandoned.
+    # Parameters: (self is implicit)
+    #              futures: Dictionary {future: square} of the submitted searches
+    #              root_scores: Dictionary {square: (score, alpha it was searched with)} where the scores are added
+    #              deadline: perf_counter() time when the search must stop, or None
+    #              stop_event: threading.Event that stops the search when it is set, or None
+    # Returns: True if every search finished, False if they were stopped.
+    def wait_for_results(self, futures, root_scores, deadline, stop_event):
+        pending = set(futures)
+        while pending:
+            done, pending = concurrent.futures.wait(pending, timeout=RESULT_POLL_INTERVAL_SECONDS)
+            for future in done:
+                result = future.result()
+                if result is None:
+                    continue  # Stopped by its own deadline
+                score, alpha, nodes_searched, transposition_hits, leaf_evaluations, cutoffs = result
+                root_scores[futures[future]] = (score, alpha)
+                self.nodes_searched += nodes_searched
+                self.transposition_hits += transposition_hits
+                self.leaf_evaluations += leaf_evaluations
+                self.cutoffs += cutoffs
+
+            if (deadline is not None and time.perf_counter() >= deadline) or \
+               (stop_event is not None and stop_event.is_set()):
+                self.stop_flag.value = 1
+                concurrent.futures.wait(pending)
+                return False
+        return all(futures[future] in root_scores for future in futures)
+
+        # Time Complexity:
+        # Proportional to the time of the slowest root move search
+        ################################################################################################################################
@@ -0,0 +1,341 @@
+import argparse
+import os
+import random
+import time
+import numpy as np
+import othello_batch
+import othello_endgame
+import othello_search
+import othello_transposition
+from othello_engine import Position, popcount
+from othello_history import move_text, parse_transcript
+from othello_patterns import get_pattern_instances, table_layout, write_pattern_weights, DEFAULT_PATTERNS_PATH, \
+    NUMBER_OF_PHASES, PATTERN_MIN_BOARD_SIZE, PATTERN_SHAPES, SYMMETRIES
+
+####################################################################################################################
+# Module description: Learns the weights of the pattern evaluation (othello_patterns) and writes them to
+#                     othello_patterns.bin. Self-play games of the Hard search at TRAINING_SEARCH_DEPTH (with the
+#                     endgame solver) after TRAINING_RANDOM_OPENING_PLIES random moves give the positions. Every
+#                     position is scored by a deeper search of othello_evaluation (TRAINING_LABEL_DEPTH), or by the
+#                     final result of its game from EXACT_SOLVE_EMPTIES empty cells on (the endgame solver played
+#                     the rest perfectly), and the weights are fitted to predict these scores: the patterns learn
+#                     what a deeper search sees, on top of the evaluation of othello_evaluation folded into them
+#                     (see fit_pattern_weights()). Scores of the final results of the games would be simpler labels,
+#                     but the games of one engine are biased by its own mistakes, and the weights learn them.
+#                     Needs NumPy.
+
+DEFAULT_TRAINING_GAMES = 2600
+DEFAULT_TRAINING_GAMES_PATH = "othello_patterns_games.txt"
+DEFAULT_TRAINING_POSITIONS_PATH = "othello_patterns_positions.npz"
+TRAINING_SEARCH_DEPTH = 2
+TRAINING_LABEL_DEPTH = 5
+TRAINING_RANDOM_OPENING_PLIES = 8
+# Value of a disk of final disk difference, in the units of othello_evaluation (a corner is 100)
+TRAINING_DISK_SCORE = 8
+DEFAULT_TRAINING_ITERATIONS = 60
+# Regularization of the fit of the scores: corrections seen in few positions stay near 0
+TRAINING_REGULARIZATION = 200.0
+# Regularization of the fit of the tables to othello_evaluation (exact targets, so it only settles the unseen ones)
+EVALUATION_FIT_REGULARIZATION = 10.0
+# The folded evaluation is divided by this in the fit of the scores, so its factor is regularized like a weight
+EVALUATION_FACTOR_SCALE = 16
+# Shapes that learn corrections to the folded evaluation. The rows, columns and short diagonals only hold their
+# part of the folded evaluation: with corrections on all of them, the weights fit the noise of the training games
+# (in self-play at depth 3 against othello_evaluation, 62% of the points instead of 68%).
+CORRECTION_SHAPES = ("edge_x", "corner_3x3", "corner_2x5", "diagonal_8")
+
+####################################################################################################################
+# Method description: Plays one training game: random opening moves, then the Hard search (with its endgame solver,
+#                     so the end of the game is played perfectly) for both players.
+# Parameters: search_engine: othello_search.SearchEngine playing the game
+#             max_depth: Depth of the search
+#             opening_random: random.Random choosing the opening moves
+#             board_size_n: The number of rows and columns of the board
+# Returns: The transcript of the game (see othello_history).
+def play_training_game(search_engine, max_depth, opening_random, board_size_n=8):
+    position = Position(board_size_n)
+    moves = []
+    while True:
+        if not position.current_player_can_move():
+            position.current_player = 3 - position.current_player  # Pass
+            if not position.current_player_can_move():
+                break  # Game over
+            continue
+        if len(moves) < TRAINING_RANDOM_OPENING_PLIES:
+            move = opening_random.choice(position.get_possible_moves_by_current_player())
+        else:
+            move = search_engine.find_best_move(position, max_depth)
+        position.make_move(move)
+        position.current_player = 3 - position.current_player
+        moves.append(move)
+    return "%d:%s" % (board_size_n, "".join(move_text(move) for move in moves))
+
+    # Time Complexity: Inherits from SearchEngine.find_best_move, for the N^2 - 4 moves of the game
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Scores the positions of a training game where a player moves: by a search of
+#                     othello_evaluation, or by the final result of the game once the endgame solver played it.
+# Parameters: transcript: The transcript of the game
+#             search_engine: othello_search.SearchEngine without pattern evaluation nor endgame solver
+#             label_depth: Depth of the search scoring the positions
+# Returns: A list of (player 1 disks, player 2 disks, score for player 1) tuples.
+def label_training_positions(transcript, search_engine, label_depth):
+    board_size_n, moves = parse_transcript(transcript)
+    position = Position(board_size_n)
+    positions = []
+    for move in moves:
+        if not position.current_player_can_move():
+            position.current_player = 3 - position.current_player  # Pass
+        positions.append((position.bitboards[1], position.bitboards[2], position.current_player))
+        if not position.make_move(move):
+            raise ValueError("Illegal move %s in training game %s" % (move, transcript))
+        position.current_player = 3 - position.current_player
+    disks = position.count_disks()
+    final_score = (disks[1] - disks[2]) * TRAINING_DISK_SCORE
+
+    labelled_positions = []
+    for player_1_disks, player_2_disks, current_player in positions:
+        if position.geometry.num_squares - popcount(player_1_disks | player_2_disks) <= \
+           othello_endgame.EXACT_SOLVE_EMPTIES:
+            score = final_score
+        else:
+            position.load_bitboards(player_1_disks, player_2_disks, current_player)
+            search_engine.find_best_move(position, label_depth)
+            score = search_engine.best_score if current_player == 1 else -search_engine.best_score
+            if abs(score) >= othello_search.WIN_SCORE:  # The search saw the end of the game: WIN_SCORE plus the disks
+                score = (score - othello_search.WIN_SCORE if score > 0 else score + othello_search.WIN_SCORE) * \
+                        TRAINING_DISK_SCORE
+        labelled_positions.append((player_1_disks, player_2_disks, score))
+    return labelled_positions
+
+    # Time Complexity: Inherits from SearchEngine.find_best_move, for every position of the game
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Bitboards turned by a symmetry of the board.
+# Parameters: bitboards: uint64 array of bitboards
+#             symmetry_name: Name of the symmetry in othello_patterns.SYMMETRIES
+#             board_size_n: The number of rows and columns of the boards
+# Returns: uint64 array of the turned bitboards.
+def turn_bitboards(bitboards, symmetry_name, board_size_n=8):
+    symmetry = SYMMETRIES[symmetry_name]
+    turned = np.zeros_like(bitboards)
+    for square in range(board_size_n * board_size_n):
+        row, col = symmetry(square // board_size_n, square % board_size_n, board_size_n)
+        turned |= ((bitboards >> np.uint64(square)) & np.uint64(1)) << np.uint64(row * board_size_n + col)
+    return turned
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(M * N^2), vectorised over the M bitboards
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Pattern indices of many positions at once (the same as PatternEvaluator.compute_indices()).
+# Parameters: player_1_disks, player_2_disks: uint64 arrays of bitboards
+#             board_size_n: The number of rows and columns of the boards
+# Returns: (number of positions, number of instances) int64 array of indices, with the offsets of their tables.
+def pattern_indices_array(player_1_disks, player_2_disks, board_size_n=8):
+    offsets = table_layout()[0]
+    instances = get_pattern_instances(board_size_n)
+    indices = np.zeros((len(player_1_disks), len(instances)), dtype=np.int64)
+    for instance, (shape_number, squares) in enumerate(instances):
+        index = np.full(len(player_1_disks), offsets[shape_number], dtype=np.int64)
+        for digit_position, square in enumerate(squares):
+            digits = ((player_1_disks >> np.uint64(square)) & np.uint64(1)) + \
+                     ((player_2_disks >> np.uint64(square)) & np.uint64(1)) * np.uint64(2)
+            index += digits.astype(np.int64) * 3 ** digit_position
+        indices[:, instance] = index
+    return indices
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(M * I * C), vectorised over the M positions
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Fits the weights of one phase by regularized least squares: the sum of the weights of the
+#                     patterns of a position (plus a factor times an extra feature, if there is one) should be its
+#                     target score. The normal equations (A^T A + lambda I) w = A^T y are solved by conjugate
+#                     gradient, preconditioned by their diagonal. A is never built: its pattern columns are 0/1, so
+#                     its products are a sum of weights by index and a bincount of the positions by index. The
+#                     regularization keeps the weights of the configurations seen in few positions near 0.
+# Parameters: indices: (M, I) int64 array of the pattern indices of the positions
+#             targets: (M,) float array of the scores to learn
+#             number_of_entries: Number of pattern weights
+#             iterations: Conjugate gradient iterations
+#             regularization: lambda
+#             feature: (M,) float array of the extra feature of the positions, or None
+# Returns: float64 array of the number_of_entries weights, followed by the factor of the feature if there is one.
+def fit_phase_weights(indices, targets, number_of_entries, iterations, regularization, feature=None):
+    flat_indices = indices.ravel()
+    number_of_instances = indices.shape[1]
+    features = [] if feature is None else [feature]
+
+    # Products by A and by A^T
+    def predict(weights):
+        prediction = weights[indices].sum(axis=1)
+        for feature_number, values in enumerate(features):
+            prediction += values * weights[number_of_entries + feature_number]
+        return prediction
+
+    def transposed_product(values):
+        return np.concatenate([np.bincount(flat_indices, weights=np.repeat(values, number_of_instances),
+                                           minlength=number_of_entries)] + [[feature @ values] for feature in features])
+
+    diagonal = np.concatenate([np.bincount(flat_indices, minlength=number_of_entries).astype(np.float64)] +
+                              [[feature @ feature] for feature in features]) + regularization
+    weights = np.zeros(len(diagonal))
+    residual = transposed_product(targets)
+    preconditioned_residual = residual / diagonal
+    direction = preconditioned_residual.copy()
+    residual_product = residual @ preconditioned_residual
+    for _ in range(iterations):
+        product = transposed_product(predict(direction)) + regularization * direction
+        step = residual_product / (direction @ product)
+        weights += step * direction
+        residual -= step * product
+        preconditioned_residual = residual / diagonal
+        new_residual_product = residual @ preconditioned_residual
+        direction = preconditioned_residual + (new_residual_product / residual_product) * direction
+        residual_product = new_residual_product
+    return weights
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(iterations * M * I), vectorised
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Fits the weights of all the phases to the scores of the training positions, in two steps:
+#                     - the evaluation of othello_evaluation is folded into the tables: all the patterns are fitted
+#                       to it (they cover every cell, and reproduce it within a few points),
+#                     - the scores are fitted by a factor of this folded evaluation plus corrections on the
+#                       CORRECTION_SHAPES, and the factor is multiplied into the folded tables.
+#                     Every position is also used turned by the symmetries of the board, and with the colours swapped
+#                     (and the opposite score), so the weights favour neither a colour nor a side of the board.
+# Parameters: player_1_disks, player_2_disks: uint64 arrays of the bitboards of the positions
+#             scores: float array of the scores of the positions for player 1
+#             iterations: Conjugate gradient iterations of the fits of every phase
+#             board_size_n: The number of rows and columns of the boards
+# Returns: A list with the weights of every phase (lists of ints).
+def fit_pattern_weights(player_1_disks, player_2_disks, scores, iterations, board_size_n=8):
+    number_of_entries = table_layout()[1]
+    correction_instances = [instance for instance, (shape_number, _) in enumerate(get_pattern_instances(board_size_n))
+                            if PATTERN_SHAPES[shape_number][0] in CORRECTION_SHAPES]
+    phases = np.minimum(NUMBER_OF_PHASES - 1, (othello_batch.popcount_array(player_1_disks | player_2_disks) - 4) *
+                        NUMBER_OF_PHASES // (board_size_n * board_size_n - 3))
+    phase_weights = []
+    for phase in range(NUMBER_OF_PHASES):
+        in_phase = phases == phase
+        indices = []
+        evaluations = []
+        targets = []
+        for symmetry_name in SYMMETRIES:
+            turned_1 = turn_bitboards(player_1_disks[in_phase], symmetry_name, board_size_n)
+            turned_2 = turn_bitboards(player_2_disks[in_phase], symmetry_name, board_size_n)
+            for own, opponent, sign in ((turned_1, turned_2, 1), (turned_2, turned_1, -1)):
+                indices.append(pattern_indices_array(own, opponent, board_size_n))
+                evaluations.append(othello_batch.evaluate(np.stack([own, opponent], axis=1), board_size_n))
+                targets.append(sign * scores[in_phase])
+        indices = np.concatenate(indices)
+        evaluations = np.concatenate(evaluations).astype(np.float64)
+        targets = np.concatenate(targets).astype(np.float64)
+
+        evaluation_weights = fit_phase_weights(indices, evaluations, number_of_entries, iterations,
+                                               EVALUATION_FIT_REGULARIZATION)
+        folded_evaluations = evaluation_weights[indices].sum(axis=1)
+        correction_weights = fit_phase_weights(np.ascontiguousarray(indices[:, correction_instances]), targets,
+                                               number_of_entries, iterations, TRAINING_REGULARIZATION,
+                                               folded_evaluations / EVALUATION_FACTOR_SCALE)
+        evaluation_factor = correction_weights[-1] / EVALUATION_FACTOR_SCALE
+        weights = correction_weights[:-1] + evaluation_factor * evaluation_weights
+        print("Phase %d: %d positions, folded evaluation error %.1f, evaluation factor %.2f, mean absolute error "
+              "%.1f (plain evaluation %.1f)" % (
+                  phase, in_phase.sum(), np.abs(evaluations - folded_evaluations).mean(), evaluation_factor,
+                  np.abs(targets - weights[indices].sum(axis=1)).mean(), np.abs(targets - evaluations).mean()))
+        phase_weights.append(np.clip(np.rint(weights), -32768, 32767).astype(np.int64).tolist())
+    return phase_weights
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(iterations * M * I), M being the number of positions with their symmetries
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Learns the pattern weights and writes the weights file. The slow steps keep their results:
+#                     the games are kept as transcripts in games_path, one per line (the games already there are
+#                     used again and only the missing ones are played, so a long run can be resumed), and the
+#                     scored positions in positions_path (when it exists, the weights are fitted to it directly).
+# Parameters: path: Path of the weights file
+#             games_path: Path of the file of training games
+#             positions_path: Path of the NumPy file of scored positions
+#             number_of_games: Number of training games
+#             max_depth: Depth of the search playing the games
+#             label_depth: Depth of the search scoring the positions
+#             iterations: Conjugate gradient iterations of the fit of every phase
+#             seed: Seed of the random opening moves
+#             board_size_n: The number of rows and columns of the board
+# Returns: None
+def train(path, games_path, positions_path, number_of_games=DEFAULT_TRAINING_GAMES, max_depth=TRAINING_SEARCH_DEPTH,
+          label_depth=TRAINING_LABEL_DEPTH, iterations=DEFAULT_TRAINING_ITERATIONS, seed=2023, board_size_n=8):
+    if board_size_n < PATTERN_MIN_BOARD_SIZE:
+        raise ValueError("The patterns need a board of at least %d rows and columns" % PATTERN_MIN_BOARD_SIZE)
+    start_time = time.perf_counter()
+    if not os.path.exists(positions_path):
+        transcripts = []
+        if os.path.exists(games_path):
+            with open(games_path) as games_file:
+                transcripts = [line.strip() for line in games_file if line.strip()][:number_of_games]
+        # The games are played and scored by the evaluation of othello_evaluation alone
+        search_engine = othello_search.SearchEngine(othello_transposition.TranspositionTable(),
+                                                    othello_endgame.EndgameSolver(), pattern_evaluation=False)
+        opening_random = random.Random(seed * 1000003 + len(transcripts))
+        with open(games_path, "a") as games_file:
+            while len(transcripts) < number_of_games:
+                transcripts.append(play_training_game(search_engine, max_depth, opening_random, board_size_n))
+                games_file.write(transcripts[-1] + "\n")
+                games_file.flush()
+                if len(transcripts) % 100 == 0:
+                    print("Played %d games in %.0f s" % (len(transcripts), time.perf_counter() - start_time))
+
+        label_search_engine = othello_search.SearchEngine(othello_transposition.TranspositionTable(),
+                                                          pattern_evaluation=False)
+        labelled_positions = []
+        for game_number, transcript in enumerate(transcripts, 1):
+            labelled_positions += label_training_positions(transcript, label_search_engine, label_depth)
+            if game_number % 100 == 0:
+                print("Scored the positions of %d games in %.0f s" % (game_number, time.perf_counter() - start_time))
+        player_1_disks, player_2_disks, scores = zip(*labelled_positions)
+        np.savez_compressed(positions_path, player_1_disks=np.array(player_1_disks, dtype=np.uint64),
+                            player_2_disks=np.array(player_2_disks, dtype=np.uint64),
+                            scores=np.array(scores, dtype=np.float64))
+
+    positions = np.load(positions_path)
+    phase_weights = fit_pattern_weights(positions["player_1_disks"], positions["player_2_disks"], positions["scores"],
+                                        iterations, board_size_n)
+    write_pattern_weights(path, board_size_n, phase_weights)
+    print("Wrote %s in %.0f s" % (path, time.perf_counter() - start_time))
+    print("The opening book was built with other weights: build it again with python othello_book.py")
+
+    # Time Complexity:
+    # Proportional to the number of games played and scored, and to iterations times the number of positions
+    ####################################################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description="Learn the pattern weights of the Hard difficulty evaluation")
+    parser.add_argument("--games", type=int, default=DEFAULT_TRAINING_GAMES, help="number of training games")
+    parser.add_argument("--games-file", default=DEFAULT_TRAINING_GAMES_PATH,
+                        help="transcripts of the training games (reused, and completed if there are fewer)")
+    parser.add_argument("--positions-file", default=DEFAULT_TRAINING_POSITIONS_PATH,
+                        help="scored training positions (reused if it exists)")
+    parser.add_argument("--depth", type=int, default=TRAINING_SEARCH_DEPTH, help="depth of the search playing")
+    parser.add_argument("--label-depth", type=int, default=TRAINING_LABEL_DEPTH,
+                        help="depth of the search scoring the positions")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_TRAINING_ITERATIONS,
+                        help="conjugate gradient iterations of the fit")
+    parser.add_argument("--seed", type=int, default=2023, help="seed of the random opening moves")
+    parser.add_argument("--output", default=DEFAULT_PATTERNS_PATH, help="path of the weights file")
+    arguments = parser.parse_args()
+    train(arguments.output, arguments.games_file, arguments.positions_file, arguments.games, arguments.depth,
+          arguments.label_depth, arguments.iterations, arguments.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+import os
+import struct
+import sys
+import zlib
+from array import array
+from othello_engine import get_board_geometry, iterate_squares
+
+####################################################################################################################
+# Module description: Pattern evaluation of the Hard difficulty search. The board is seen through patterns: groups
+#                     of cells where the disks matter together (an edge with its X-squares, the 3x3 and 2x5
+#                     regions of a corner, the rows and columns, the diagonals). Every configuration of a pattern
+#                     (each cell empty, player 1 or player 2) is a ternary number, its index, and every
+#                     configuration has a learned weight; the score of a position is the sum of the weights of the
+#                     configurations of its patterns. The patterns cover every cell of the board, so the square
+#                     weights of othello_evaluation are folded into them, and mobility, frontier and stability are
+#                     learned as they show in the configurations of the lines.
+#                     A pattern has several instances (the same shape at every corner and edge, turned by the
+#                     symmetries of the board) sharing one weight table. The weights are stored in one flat
+#                     array('h') per game phase, with the tables of all the shapes one after the other, and the
+#                     index of every instance already includes the offset of its table, so a leaf costs one array
+#                     read per instance and nothing else.
+#                     The indices are not computed at the leaves: the engine Position keeps them up to date when a
+#                     move is made or undone (apply_move() adds to the indices of the few instances that contain
+#                     the placed and flipped disks, undo_last_move() subtracts it back).
+#                     The weights are learned offline by othello_pattern_training.py and stored in
+#                     othello_patterns.bin, for the board size they were learned on; on other board sizes, or
+#                     without the file, the search uses the evaluation of othello_evaluation.
+
+PATTERNS_MAGIC = b"OTHPAT02"
+# Magic, board size, number of phases, entries per phase, length of the compressed weights
+HEADER_STRUCT = struct.Struct("<8sHHII")
+DEFAULT_PATTERNS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "othello_patterns.bin")
+
+# Smallest board where the patterns of the two ends of an edge do not overlap
+PATTERN_MIN_BOARD_SIZE = 8
+
+# Shapes of the patterns, as (row, col) cells seen from the top-left corner; a negative column counts from the
+# right edge (-1 is the last column), so the line patterns fit any board size
+EDGE_X_CELLS = ((0, 0), (0, 1), (0, 2), (0, 3), (0, -4), (0, -3), (0, -2), (0, -1), (1, 1), (1, -2))
+CORNER_3X3_CELLS = ((0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2), (2, 0), (2, 1), (2, 2))
+CORNER_2X5_CELLS = ((0, 0), (0, 1), (0, 2), (0, 3), (0, 4), (1, 0), (1, 1), (1, 2), (1, 3), (1, 4))
+LINE_2_CELLS = tuple((1, col) for col in (0, 1, 2, 3, -4, -3, -2, -1))
+LINE_3_CELLS = tuple((2, col) for col in (0, 1, 2, 3, -4, -3, -2, -1))
+LINE_4_CELLS = tuple((3, col) for col in (0, 1, 2, 3, -4, -3, -2, -1))
+DIAGONAL_8_CELLS = tuple((index, index) for index in range(8))
+DIAGONAL_7_CELLS = tuple((index, index + 1) for index in range(7))
+DIAGONAL_6_CELLS = tuple((index, index + 2) for index in range(6))
+DIAGONAL_5_CELLS = tuple((index, index + 3) for index in range(5))
+DIAGONAL_4_CELLS = tuple((index, index + 4) for index in range(4))
+
+# Symmetries of the board: (row, col) -> (row, col) on a board of n rows and columns
+SYMMETRIES = {
+    "identity": lambda row, col, n: (row, col),
+    "transpose": lambda row, col, n: (col, row),
+    "flip_cols": lambda row, col, n: (row, n - 1 - col),
+    "flip_rows": lambda row, col, n: (n - 1 - row, col),
+    "rotate_180": lambda row, col, n: (n - 1 - row, n - 1 - col),
+    "anti_transpose": lambda row, col, n: (n - 1 - col, n - 1 - row),
+    "rotate_90": lambda row, col, n: (col, n - 1 - row),
+    "rotate_270": lambda row, col, n: (n - 1 - col, row),
+}
+
+# The patterns: (name, cells, symmetries giving its instances). Instances with the same cells as a previous one
+# (the same line seen from its other end) are dropped.
+PATTERN_SHAPES = (
+    ("edge_x", EDGE_X_CELLS, ("identity", "transpose", "rotate_180", "anti_transpose")),
+    ("corner_3x3", CORNER_3X3_CELLS, ("identity", "flip_cols", "flip_rows", "rotate_180")),
+    ("corner_2x5", CORNER_2X5_CELLS, tuple(SYMMETRIES)),
+    ("line_2", LINE_2_CELLS, tuple(SYMMETRIES)),
+    ("line_3", LINE_3_CELLS, tuple(SYMMETRIES)),
+    ("line_4", LINE_4_CELLS, tuple(SYMMETRIES)),
+    ("diagonal_8", DIAGONAL_8_CELLS, tuple(SYMMETRIES)),
+    ("diagonal_7", DIAGONAL_7_CELLS, tuple(SYMMETRIES)),
+    ("diagonal_6", DIAGONAL_6_CELLS, tuple(SYMMETRIES)),
+    ("diagonal_5", DIAGONAL_5_CELLS, tuple(SYMMETRIES)),
+    ("diagonal_4", DIAGONAL_4_CELLS, tuple(SYMMETRIES)),
+)
+
+# Game phases, by the part of the board filled: each phase has its own weights
+NUMBER_OF_PHASES = 6
+
+# Flipped disks are applied to the indices by chunks of this many squares
+FLIP_CHUNK_BITS = 8
+FLIP_CHUNK_MASK = (1 << FLIP_CHUNK_BITS) - 1
+
+# Cached instances per board size, and weights and pattern evaluators per path and board size
+_pattern_instances = {}
+_pattern_weights = {}
+_pattern_evaluators = {}
+
+####################################################################################################################
+# Method description: Number of entries of the weight table of every shape, and the offset of each table in the
+#                     flat array of a phase.
+# Parameters: None
+# Returns: A (list of table offsets, entries of the array of a phase) tuple.
+def table_layout():
+    offsets = []
+    number_of_entries = 0
+    for _, cells, _ in PATTERN_SHAPES:
+        offsets.append(number_of_entries)
+        number_of_entries += 3 ** len(cells)
+    return (offsets, number_of_entries)
+
+####################################################################################################################
+# Method description: Gives the pattern instances of a board size: the squares of every instance, in the order of
+#                     the cells of its shape (the first cell is the lowest ternary digit).
+# Parameters: board_size_n: The number of rows and columns of the board
+# Returns: A list of (shape number, list of square indexes) tuples.
+def get_pattern_instances(board_size_n):
+    if board_size_n not in _pattern_instances:
+        instances = []
+        seen_cell_sets = set()
+        for shape_number, (_, cells, symmetry_names) in enumerate(PATTERN_SHAPES):
+            for symmetry_name in symmetry_names:
+                symmetry = SYMMETRIES[symmetry_name]
+                squares = []
+                for row, col in cells:
+                    row, col = symmetry(row, col if col >= 0 else board_size_n + col, board_size_n)
+                    squares.append(row * board_size_n + col)
+                if frozenset(squares) not in seen_cell_sets:
+                    seen_cell_sets.add(frozenset(squares))
+                    instances.append((shape_number, squares))
+        _pattern_instances[board_size_n] = instances
+    return _pattern_instances[board_size_n]
+
+    # Time Complexity:
+    # Worst case = O(I * C), I instances of C cells, the first time for a board size
+    # Average and Best case = O(1), cached
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Phase of a position by its number of disks.
+# Parameters: number_of_disks: Disks on the board
+#             num_squares: Number of cells of the board
+# Returns: The phase, from 0 (opening) to NUMBER_OF_PHASES - 1 (endgame).
+def phase_of(number_of_disks, num_squares):
+    return min(NUMBER_OF_PHASES - 1, max(0, number_of_disks - 4) * NUMBER_OF_PHASES // (num_squares - 3))
+
+####################################################################################################################
+# Method description: Reads the weights of a pattern file.
+# Parameters: path: Path of the file
+# Returns: A (board size, list with the array('h') of weights of every phase) tuple. Raises ValueError if the file
+#          is not a pattern file of the current shapes.
+def load_pattern_weights(path=DEFAULT_PATTERNS_PATH):
+    with open(path, "rb") as weights_file:
+        data = weights_file.read()
+    magic, board_size_n, number_of_phases, number_of_entries, compressed_size = HEADER_STRUCT.unpack_from(data)
+    if magic != PATTERNS_MAGIC or number_of_phases != NUMBER_OF_PHASES or number_of_entries != table_layout()[1]:
+        raise ValueError("%s is not a pattern weights file of these patterns" % path)
+    weights = array("h")
+    weights.frombytes(zlib.decompress(data[HEADER_STRUCT.size:HEADER_STRUCT.size + compressed_size]))
+    if sys.byteorder == "big":
+        weights.byteswap()  # The file is little-endian
+    return (board_size_n, [weights[phase * number_of_entries:(phase + 1) * number_of_entries]
+                           for phase in range(number_of_phases)])
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(P * E), P phases of E entries
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Writes a pattern file.
+# Parameters: path: Path of the file
+#             board_size_n: The board size the weights were learned on
+#             phase_weights: List with the weights of every phase (sequences of E ints each)
+# Returns: None
+def write_pattern_weights(path, board_size_n, phase_weights):
+    weights = array("h")
+    for weights_of_phase in phase_weights:
+        weights.extend(weights_of_phase)
+    if sys.byteorder == "big":
+        weights.byteswap()
+    compressed_weights = zlib.compress(weights.tobytes(), 9)
+    with open(path, "wb") as weights_file:
+        weights_file.write(HEADER_STRUCT.pack(PATTERNS_MAGIC, board_size_n, len(phase_weights), table_layout()[1],
+                                              len(compressed_weights)))
+        weights_file.write(compressed_weights)
+
+####################################################################################################################
+# Method description: Checksum of pattern weights, which tells the evaluations apart (e.g. the one an opening book was
+#                     built with). It is computed on the little-endian bytes of the weights, like the file.
+# Parameters: phase_weights: List with the weights of every phase (sequences of E ints each)
+# Returns: The CRC-32 of the weights, an unsigned 32-bit int.
+def weights_checksum(phase_weights):
+    checksum = 0
+    for weights_of_phase in phase_weights:
+        weights = array("h", weights_of_phase)
+        if sys.byteorder == "big":
+            weights.byteswap()
+        checksum = zlib.crc32(weights.tobytes(), checksum)
+    return checksum
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(P * E)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Gives the pattern evaluator of a board size, loading the weights file the first time.
+# Parameters: board_size_n: The number of rows and columns of the board
+#             path: Path of the weights file
+# Returns: The PatternEvaluator, or None if the file does not exist or has the weights of another board size.
+def get_pattern_evaluator(board_size_n, path=DEFAULT_PATTERNS_PATH):
+    key = (path, board_size_n)
+    if key not in _pattern_evaluators:
+        pattern_evaluator = None
+        if os.path.exists(path):
+            if path not in _pattern_weights:
+                _pattern_weights[path] = load_pattern_weights(path)
+            weights_board_size_n, phase_weights = _pattern_weights[path]
+            if weights_board_size_n == board_size_n:
+                pattern_evaluator = PatternEvaluator(board_size_n, phase_weights)
+        _pattern_evaluators[key] = pattern_evaluator
+    return _pattern_evaluators[key]
+
+    # Time Complexity:
+    # Worst case = O(P * E + N^2), reading the file and building the evaluator the first time
+    # Average and Best case = O(1), cached
+    ####################################################################################################################
+
+####################################################################################################################
+# Class description: Pattern evaluation of the positions of one board size. The evaluator is shared by the positions
+#                    it is attached to (Position.attach_pattern_evaluator()); each position keeps its own list of
+#                    indices, one per instance, updated by apply_move() and undo_move().
+class PatternEvaluator:
+
+    ################################################################################################################################
+    # Method description: Creates the evaluator of a board size.
+    # Parameters: (self is implicit)
+    #              board_size_n: The number of rows and columns of the board
+    #              phase_weights: List with the array of weights of every phase
+    def __init__(self, board_size_n, phase_weights):
+        self.geometry = get_board_geometry(board_size_n)
+        self.board_size_n = board_size_n
+        self.num_squares = self.geometry.num_squares
+        self.instances = get_pattern_instances(board_size_n)
+        offsets = table_layout()[0]
+        self.instance_offsets = [offsets[shape_number] for shape_number, _ in self.instances]
+        # Weights of the phase of every number of disks, so a leaf finds them with one read
+        self.disk_count_weights = [phase_weights[phase_of(number_of_disks, self.num_squares)]
+                                   for number_of_disks in range(self.num_squares + 1)]
+        self.weights_checksum = weights_checksum(phase_weights)
+
+        # Changes of the indices made by a move, by player and square: a list of (instance, delta) per square.
+        # The ternary digit of a cell is 0 when it is empty, 1 for player 1 and 2 for player 2, so a disk placed
+        # by a player adds player * 3^k to the index, and a flipped disk player - opponent times 3^k.
+        placed_updates = {1: [[] for _ in range(self.num_squares)], 2: [[] for _ in range(self.num_squares)]}
+        flip_updates = {1: [[] for _ in range(self.num_squares)], 2: [[] for _ in range(self.num_squares)]}
+        for instance, (_, squares) in enumerate(self.instances):
+            for digit_position, square in enumerate(squares):
+                power = 3 ** digit_position
+                for player in (1, 2):
+                    placed_updates[player][square].append((instance, player * power))
+                    flip_updates[player][square].append((instance, (2 * player - 3) * power))
+        self.placed_updates = {player: [tuple(updates) for updates in placed_updates[player]] for player in (1, 2)}
+        # The flips of a move are read FLIP_CHUNK_BITS squares at a time: the changes of every value of a chunk of
+        # the flipped bitboard are merged by instance, so a few flipped disks in a row cost one short loop
+        self.flip_chunk_updates = {1: [], 2: []}
+        for first_square in range(0, self.num_squares, FLIP_CHUNK_BITS):
+            for player in (1, 2):
+                chunk_updates = []
+                for chunk_value in range(1 << FLIP_CHUNK_BITS):
+                    merged_updates = {}
+                    for square in iterate_squares(chunk_value << first_square):
+                        if square < self.num_squares:
+                            for instance, delta in flip_updates[player][square]:
+                                merged_updates[instance] = merged_updates.get(instance, 0) + delta
+                    chunk_updates.append(tuple(merged_updates.items()))
+                self.flip_chunk_updates[player].append(chunk_updates)
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(I * C + N^2 * 2^B), I instances of C cells, chunks of B bits
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Computes the indices of all the instances from scratch (when the evaluator is attached to a
+    #                     position, or the position is loaded).
+    # Parameters: (self is implicit)
+    #              player_1_disks, player_2_disks: Bitboards of the position
+    # Returns: The list of indices, one per instance, each with the offset of its table.
+    def compute_indices(self, player_1_disks, player_2_disks):
+        indices = list(self.instance_offsets)
+        for player, disks in ((1, player_1_disks), (2, player_2_disks)):
+            placed_updates = self.placed_updates[player]
+            for square in iterate_squares(disks):
+                for instance, delta in placed_updates[square]:
+                    indices[instance] += delta
+        return indices
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(D), D being the number of disks
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Updates the indices of a position for a move (called by Position.apply_move()).
+    # Parameters: (self is implicit)
+    #              indices: The list of indices of the position
+    #              square: Index of the move square
+    #              flipped: Bitboard of the flipped disks
+    #              player: The player making the move
+    # Returns: None
+    def apply_move(self, indices, square, flipped, player):
+        for instance, delta in self.placed_updates[player][square]:
+            indices[instance] += delta
+        chunk_updates = self.flip_chunk_updates[player]
+        chunk = 0
+        while flipped:
+            for instance, delta in chunk_updates[chunk][flipped & FLIP_CHUNK_MASK]:
+                indices[instance] += delta
+            flipped >>= FLIP_CHUNK_BITS
+            chunk += 1
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(F), F being the number of flipped disks (a few instances per disk)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Reverts the changes of apply_move() (called by Position.undo_last_move()).
+    # Parameters: (self is implicit)
+    #              indices: The list of indices of the position
+    #              square, flipped, player: The move, as given to apply_move()
+    # Returns: None
+    def undo_move(self, indices, square, flipped, player):
+        for instance, delta in self.placed_updates[player][square]:
+            indices[instance] -= delta
+        chunk_updates = self.flip_chunk_updates[player]
+        chunk = 0
+        while flipped:
+            for instance, delta in chunk_updates[chunk][flipped & FLIP_CHUNK_MASK]:
+                indices[instance] -= delta
+            flipped >>= FLIP_CHUNK_BITS
+            chunk += 1
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(F), F being the number of flipped disks
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Score of a position for a player: the sum of the weights of its pattern instances in the
+    #                     phase of the position (the weights are learned for player 1).
+    # Parameters: (self is implicit)
+    #              position: The engine Position, with this evaluator attached
+    #              player_number: The player whose point of view is used
+    # Returns: The score, positive when the position is good for player_number.
+    def evaluate(self, position, player_number):
+        weights = self.disk_count_weights[position.num_disks_dictionary[1] + position.num_disks_dictionary[2]]
+        score = sum(map(weights.__getitem__, position.pattern_indices))
+        return score if player_number == 1 else -score
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(I), one array read per instance
+        ################################################################################################################################
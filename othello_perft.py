@@ -0,0 +1,327 @@
+import argparse
+import concurrent.futures
+import sys
+import time
+from othello_engine import Position, MailboxPosition, popcount, iterate_squares, legal_moves_bitboard, \
+    flip_mask_bitboard, get_board_geometry
+
+####################################################################################################################
+# Module description: Perft ("performance test") of the move generation: counts the leaves of the game tree to a
+#                     fixed depth. The counts only depend on the rules, so a move generator that disagrees with the
+#                     known counts (or with the original cell-by-cell rules of MailboxPosition) has a bug, and the
+#                     time to count them measures the raw speed of the move generation. Run it from a terminal:
+#                         python othello_perft.py --depth 8
+#                         python othello_perft.py --depth 6 --divide --verify
+#                     A pass is a move: when the player to move cannot move but the opponent can, the pass uses one
+#                     ply. A finished game is one leaf, whatever the remaining depth.
+#                     Modes: --hash caches the counts of positions reached by different move orders, --workers
+#                     splits the tree a few plies below the root over worker processes, and --verify also counts
+#                     with MailboxPosition (direction_has_disk_to_flip / flip_disks_for_move) and compares.
+
+# Leaves of the 8x8 starting position for depths 0 to 8
+KNOWN_PERFT_8X8 = [1, 4, 12, 56, 244, 1396, 8200, 55092, 390216]
+
+# Root "move" of the divide output when the player to move has to pass
+PASS_SQUARE = -1
+
+# Default maximum number of entries of the perft hash table
+DEFAULT_HASH_ENTRIES = 4000000
+
+# Globals of a worker process: its own hash table, kept between the subtrees it counts
+worker_hash_table = None
+
+####################################################################################################################
+# Method description: Counts the leaves of the game tree below a position, on bitboards. At the last ply the legal
+#                     moves are counted with a popcount instead of being played (bulk counting).
+# Parameters: own: Bitboard of the player to move
+#             opponent: Bitboard of the other player
+#             depth: Remaining plies
+#             geometry: BoardGeometry of the board
+#             passed: True if the previous ply was a pass
+# Returns: The number of leaves.
+def perft_bitboards(own, opponent, depth, geometry, passed=False):
+    if depth == 0:
+        return 1
+    moves = legal_moves_bitboard(own, opponent, geometry)
+    if not moves:
+        if passed:
+            return 1  # Game over
+        return perft_bitboards(opponent, own, depth - 1, geometry, True)
+    if depth == 1:
+        return popcount(moves)
+
+    nodes = 0
+    for square in iterate_squares(moves):
+        flipped = flip_mask_bitboard(own, opponent, square, geometry)
+        nodes += perft_bitboards(opponent ^ flipped, own | flipped | (1 << square), depth - 1, geometry)
+    return nodes
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(b^(d-1)), b being the number of moves per position and d the depth
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Same as perft_bitboards(), caching the count of every subtree in a hash table, so the
+#                     positions reached by different move orders are counted once. The count below a position only
+#                     depends on the disks, the player to move and the depth (after a pass the player who passed
+#                     still cannot move, so the pass flag is not needed in the key).
+# Parameters: own, opponent, depth, geometry, passed: As perft_bitboards()
+#             hash_table: Dictionary {(own, opponent, depth): leaves}
+#             max_entries: Maximum number of entries, the table stops growing when it is full
+# Returns: The number of leaves.
+def perft_hashed(own, opponent, depth, geometry, hash_table, max_entries=DEFAULT_HASH_ENTRIES, passed=False):
+    if depth <= 1:
+        return perft_bitboards(own, opponent, depth, geometry, passed)
+    key = (own, opponent, depth)
+    nodes = hash_table.get(key)
+    if nodes is not None:
+        return nodes
+
+    moves = legal_moves_bitboard(own, opponent, geometry)
+    if not moves:
+        if passed:
+            return 1  # Game over
+        nodes = perft_hashed(opponent, own, depth - 1, geometry, hash_table, max_entries, True)
+    else:
+        nodes = 0
+        for square in iterate_squares(moves):
+            flipped = flip_mask_bitboard(own, opponent, square, geometry)
+            nodes += perft_hashed(opponent ^ flipped, own | flipped | (1 << square), depth - 1, geometry,
+                                  hash_table, max_entries)
+    if len(hash_table) < max_entries:
+        hash_table[key] = nodes
+    return nodes
+
+    # Time Complexity:
+    # Worst case = O(b^(d-1)), no transpositions
+    # Average and Best case = O(U), U being the number of unique positions of the tree
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Counts the leaves of the game tree with the position objects (get_possible_moves, make_move and
+#                     undo_last_move), without bulk counting, so every move of the tree is played. With a
+#                     MailboxPosition it follows the original rules of the game, and is the reference of the counts.
+# Parameters: position: Position or MailboxPosition (it is restored before returning)
+#             depth: Remaining plies
+#             passed: True if the previous ply was a pass
+# Returns: The number of leaves.
+def perft_position(position, depth, passed=False):
+    if depth == 0:
+        return 1
+    possible_moves = position.get_possible_moves_by_current_player()
+    if not possible_moves:
+        if passed:
+            return 1  # Game over
+        position.current_player = 3 - position.current_player
+        nodes = perft_position(position, depth - 1, True)
+        position.current_player = 3 - position.current_player
+        return nodes
+
+    nodes = 0
+    for move in possible_moves:
+        position.make_move(move)
+        position.current_player = 3 - position.current_player
+        nodes += perft_position(position, depth - 1)
+        position.undo_last_move()
+    return nodes
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(b^d) moves made and undone
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Lists the subtrees of a position a few plies below the root, each one tagged with the root
+#                     move it comes from. A finished game or a subtree at depth 0 is kept as it is.
+# Parameters: own, opponent, depth, geometry, passed: As perft_bitboards()
+#             split_depth: Plies below the root where the tree is split
+#             root_square: Root move of the subtree (None at the root)
+#             subtrees: List where (root square, own, opponent, depth, passed) tuples are added
+# Returns: None
+def split_tree(own, opponent, depth, geometry, split_depth, root_square, subtrees, passed=False):
+    moves = legal_moves_bitboard(own, opponent, geometry) if depth > 0 else 0
+    if (split_depth == 0 and root_square is not None) or depth == 0 or (not moves and passed):
+        subtrees.append((root_square, own, opponent, depth, passed))
+        return
+    if not moves:
+        if root_square is None and not legal_moves_bitboard(opponent, own, geometry):
+            subtrees.append((None, own, opponent, depth, passed))  # Game over at the root
+            return
+        split_tree(opponent, own, depth - 1, geometry, split_depth - 1,
+                   PASS_SQUARE if root_square is None else root_square, subtrees, True)
+        return
+    for square in iterate_squares(moves):
+        flipped = flip_mask_bitboard(own, opponent, square, geometry)
+        split_tree(opponent ^ flipped, own | flipped | (1 << square), depth - 1, geometry, split_depth - 1,
+                   square if root_square is None else root_square, subtrees)
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(b^s), s being the split depth
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Task of a worker process: counts the leaves of one subtree.
+# Parameters: own, opponent, depth, passed: The subtree, as perft_bitboards()
+#             board_size_n: The number of rows and columns of the board
+#             hash_entries: Maximum entries of the hash table of the worker, 0 for no hash table
+# Returns: The number of leaves.
+def count_subtree(own, opponent, depth, passed, board_size_n, hash_entries):
+    global worker_hash_table
+    geometry = get_board_geometry(board_size_n)
+    if hash_entries <= 0:
+        return perft_bitboards(own, opponent, depth, geometry, passed)
+    if worker_hash_table is None:
+        worker_hash_table = {}
+    return perft_hashed(own, opponent, depth, geometry, worker_hash_table, hash_entries, passed)
+
+####################################################################################################################
+# Method description: Counts the leaves below every root move of a position (the "divide" of perft).
+# Parameters: position: The engine Position
+#             depth: Plies to count (at least 1)
+#             hash_entries: Maximum entries of the hash table, 0 for no hash table
+#             number_of_workers: Worker processes, 1 to count in this process
+#             split_depth: Plies below the root where the tree is split between the workers
+# Returns: A dictionary {root square (PASS_SQUARE for a pass): leaves}, empty if the game is over.
+def divide(position, depth, hash_entries=0, number_of_workers=1, split_depth=2):
+    player = position.current_player
+    geometry = position.geometry
+    subtrees = []
+    split_tree(position.bitboards[player], position.bitboards[3 - player], depth, geometry,
+               split_depth if number_of_workers > 1 else 1, None, subtrees)
+    leaves_by_root_square = {}
+    for root_square, _, _, _, _ in subtrees:
+        if root_square is not None:
+            leaves_by_root_square[root_square] = 0
+
+    if number_of_workers > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=number_of_workers) as executor:
+            futures = {executor.submit(count_subtree, own, opponent, subtree_depth, passed, position.board_size_n,
+                                       hash_entries): root_square
+                       for root_square, own, opponent, subtree_depth, passed in subtrees if root_square is not None}
+            for future in concurrent.futures.as_completed(futures):
+                leaves_by_root_square[futures[future]] += future.result()
+    else:
+        hash_table = {}
+        for root_square, own, opponent, subtree_depth, passed in subtrees:
+            if root_square is None:
+                continue  # Game over at the root
+            if hash_entries > 0:
+                leaves_by_root_square[root_square] += perft_hashed(own, opponent, subtree_depth, geometry, hash_table,
+                                                                   hash_entries, passed)
+            else:
+                leaves_by_root_square[root_square] += perft_bitboards(own, opponent, subtree_depth, geometry, passed)
+    return leaves_by_root_square
+
+    # Time Complexity: Inherits from perft_bitboards (or perft_hashed), divided by the number of workers
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Counts the leaves below every root move of a position with the position objects.
+# Parameters: position: Position or MailboxPosition
+#             depth: Plies to count (at least 1)
+# Returns: A dictionary {root square (PASS_SQUARE for a pass): leaves}, empty if the game is over.
+def divide_position(position, depth):
+    possible_moves = position.get_possible_moves_by_current_player()
+    if not possible_moves:
+        if not position.player_can_move(3 - position.current_player):
+            return {}
+        position.current_player = 3 - position.current_player
+        nodes = perft_position(position, depth - 1, True)
+        position.current_player = 3 - position.current_player
+        return {PASS_SQUARE: nodes}
+
+    leaves_by_root_square = {}
+    for move in possible_moves:
+        position.make_move(move)
+        position.current_player = 3 - position.current_player
+        leaves_by_root_square[move[0] * position.board_size_n + move[1]] = perft_position(position, depth - 1)
+        position.undo_last_move()
+    return leaves_by_root_square
+
+    # Time Complexity: Inherits from perft_position
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Reads a board written as text, one character per cell in row order: "-" or "." for an empty
+#                     cell, "X" or "1" for player 1 (black) and "O" or "2" for player 2 (white). Spaces and line
+#                     breaks are ignored. Raises ValueError if the text is not a square board.
+# Parameters: board_text: The board
+# Returns: The board cell states (list of rows with None, 1 or 2).
+def parse_board(board_text):
+    cell_values = {"-": None, ".": None, "X": 1, "1": 1, "O": 2, "2": 2}
+    characters = [character for character in board_text.upper() if not character.isspace()]
+    board_size_n = int(round(len(characters) ** 0.5))
+    if board_size_n * board_size_n != len(characters) or any(character not in cell_values for character in characters):
+        raise ValueError("The board must be N*N characters among - . X O 1 2")
+    return [[cell_values[characters[row * board_size_n + col]] for col in range(board_size_n)]
+            for row in range(board_size_n)]
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(N^2)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Name of a root move of the divide output.
+# Parameters: position: The engine Position
+#             square: Index of the move square, or PASS_SQUARE
+# Returns: The (row, col) move as text, or "pass".
+def root_move_name(position, square):
+    return "pass" if square == PASS_SQUARE else str(position.move_of(square))
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft of the Othello move generation: leaf counts and speed")
+    parser.add_argument("--depth", type=int, default=6, help="count every depth from 1 to this one")
+    parser.add_argument("--size", type=int, default=8, help="number of rows and columns of the starting position")
+    parser.add_argument("--board", default=None, help="position to count from instead of the starting one "
+                                                      "(N*N characters among - X O)")
+    parser.add_argument("--player", type=int, default=1, choices=[1, 2], help="player to move of --board")
+    parser.add_argument("--divide", action="store_true", help="print the leaves below every root move")
+    parser.add_argument("--hash", action="store_true", help="cache the counts of transpositions in a hash table")
+    parser.add_argument("--hash-entries", type=int, default=DEFAULT_HASH_ENTRIES, help="maximum hash table entries")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (1 to count in this process)")
+    parser.add_argument("--split-depth", type=int, default=2, help="plies below the root split between the workers")
+    parser.add_argument("--verify", action="store_true",
+                        help="also count with MailboxPosition (the original rules) and compare")
+    arguments = parser.parse_args()
+
+    if arguments.board is not None:
+        try:
+            board_cell_states = parse_board(arguments.board)
+        except ValueError as error:
+            parser.error(str(error))
+        position = Position(len(board_cell_states))
+        position.load_board_cell_states(board_cell_states, arguments.player)
+    else:
+        position = Position(arguments.size)
+    hash_entries = arguments.hash_entries if arguments.hash else 0
+    check_known_counts = arguments.board is None and arguments.size == 8
+
+    failures = 0
+    print("%5s %14s %10s %14s %s" % ("Depth", "Leaves", "Time (s)", "Leaves/second", "Check"))
+    for depth in range(1, arguments.depth + 1):
+        start_time = time.perf_counter()
+        leaves_by_root_square = divide(position, depth, hash_entries, arguments.workers, arguments.split_depth)
+        elapsed_time = time.perf_counter() - start_time
+        leaves = sum(leaves_by_root_square.values()) if leaves_by_root_square else 1
+
+        checks = []
+        if check_known_counts and depth < len(KNOWN_PERFT_8X8):
+            checks.append("known " + ("ok" if leaves == KNOWN_PERFT_8X8[depth] else "FAILED"))
+        if arguments.verify:
+            mailbox_position = MailboxPosition(position.board_size_n)
+            mailbox_position.load_board_cell_states(position.copy_board_cell_states(), position.current_player)
+            reference_leaves_by_root_square = divide_position(mailbox_position, depth)
+            checks.append("mailbox " + ("ok" if reference_leaves_by_root_square == leaves_by_root_square else "FAILED"))
+        failures += sum(check.endswith("FAILED") for check in checks)
+        print("%5d %14d %10.3f %14.0f %s" % (depth, leaves, elapsed_time, leaves / max(elapsed_time, 1e-9),
+                                            ", ".join(checks)))
+
+    if arguments.divide:
+        print()
+        for square in sorted(leaves_by_root_square):
+            print("%-10s %14d" % (root_move_name(position, square), leaves_by_root_square[square]))
+    if failures:
+        print("%d checks FAILED" % failures)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import threading
+from othello_evaluation import evaluate_bitboards
+
+####################################################################################################################
+# Module description: Pondering: the AI searches while the human player is thinking. The likely replies of the human
+#                     player are predicted (the moves the evaluation likes best for them), and the AI answer to each
+#                     one is searched with the normal time budget, in a background thread. The answers are kept by
+#                     position, so when the human plays one of the pondered moves the AI answers at once. Even when
+#                     the human plays another move, the pondering searches have filled the transposition table.
+#                     The pondering thread uses the search engine of the game, so it must be stopped (stop()) before
+#                     the engine searches anything else; a stopped search ends within a few milliseconds.
+
+# Number of human replies pondered, best predicted first
+PONDER_MAX_REPLIES = 4
+
+####################################################################################################################
+# Class description: Searches the AI answers to the predicted human replies in a background thread.
+class Ponderer:
+
+    ################################################################################################################################
+    # Method description: Creates the ponderer of a search engine.
+    # Parameters: (self is implicit)
+    #              search_engine: SearchEngine or ParallelSearchEngine of the AI
+    #              opening_book: OpeningBook of the AI, or None (book positions are answered at once, so they are not
+    #                            pondered)
+    def __init__(self, search_engine, opening_book=None):
+        self.search_engine = search_engine
+        self.opening_book = opening_book
+        # Pondered answers: (player 1 disks, player 2 disks, player to move) -> (move, SearchStatistics)
+        self.answers = {}
+        self.thread = None
+        self.stop_event = None
+        # Statistics: replies pondered to the end, and pondered answers played
+        self.replies_pondered = 0
+        self.hits = 0
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Key of a position in the pondered answers (the whole position, so keys never collide).
+    # Parameters: position: The engine Position
+    # Returns: The key tuple.
+    @staticmethod
+    def position_key(position):
+        return (position.bitboards[1], position.bitboards[2], position.current_player)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Starts pondering a position where the human player is to move. The answers pondered for
+    #                     a previous position are dropped.
+    # Parameters: (self is implicit)
+    #              position: The engine Position, with the human player to move (a copy is pondered)
+    #              time_limit: Time budget in seconds of the search of every answer
+    # Returns: None
+    def start(self, position, time_limit):
+        self.stop()
+        self.answers.clear()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.ponder, args=(position.copy(), time_limit, self.stop_event),
+                                       daemon=True)
+        self.thread.start()
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1), the searches run in the pondering thread
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Stops pondering, waiting for the pondering thread to end. The answers already pondered are
+    #                     kept.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def stop(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1), waiting for at most DEADLINE_CHECK_INTERVAL nodes of the search
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Tells if the pondering thread is running.
+    # Parameters: None (self is implicit)
+    # Returns: True if pondering, False if not.
+    def is_pondering(self):
+        return self.thread is not None and self.thread.is_alive()
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Predicts the replies of the player to move: its moves sorted by the evaluation of the
+    #                     position after each one, from its point of view.
+    # Parameters: (self is implicit)
+    #              position: The engine Position
+    # Returns: A list of (row, col) moves, most likely first.
+    def predict_replies(self, position):
+        player = position.current_player
+        scored_moves = []
+        for move in position.get_possible_moves_by_current_player():
+            position.make_move(move)
+            score = evaluate_bitboards(position.bitboards[player], position.bitboards[3 - player], position.geometry)
+            position.undo_last_move()
+            scored_moves.append((-score, move))
+        scored_moves.sort()
+        return [move for _, move in scored_moves]
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(M log M), M being the number of moves
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Body of the pondering thread: searches the AI answer to every predicted reply, until all
+    #                     are pondered or the pondering is stopped. Answers of stopped searches are not kept.
+    # Parameters: (self is implicit)
+    #              position: Copy of the engine position, with the human player to move
+    #              time_limit: Time budget in seconds of every search
+    #              stop_event: threading.Event that stops the pondering when it is set
+    # Returns: None
+    def ponder(self, position, time_limit, stop_event):
+        human_player = position.current_player
+        for reply in self.predict_replies(position)[:PONDER_MAX_REPLIES]:
+            if stop_event.is_set():
+                return
+            position.make_move(reply)
+            position.current_player = 3 - human_player
+            if position.current_player_can_move() and \
+               (self.opening_book is None or self.opening_book.find_best_move(position) is None):
+                answer = self.search_engine.find_best_move(position, position.geometry.num_squares, time_limit,
+                                                           stop_event)
+                if not stop_event.is_set():
+                    self.answers[self.position_key(position)] = (answer, self.search_engine.statistics)
+                    self.replies_pondered += 1
+            position.undo_last_move()
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(R * T), R being PONDER_MAX_REPLIES and T the time budget
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Gives the pondered answer to a position, if it was pondered. The pondering must be
+    #                     stopped first.
+    # Parameters: (self is implicit)
+    #              position: The engine Position, with the AI to move
+    # Returns: A (move, SearchStatistics) tuple with "ponder" as source of the statistics, or None.
+    def take_answer(self, position):
+        pondered_answer = self.answers.pop(self.position_key(position), None)
+        if pondered_answer is None:
+            return None
+        self.hits += 1
+        pondered_answer[1].source = "ponder"
+        return pondered_answer
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
@@ -0,0 +1,58 @@
+from othello_engine import iterate_squares
+
+####################################################################################################################
+# Module description: Diff-based rendering of the engine position on the game2dboard Board. The renderer keeps the
+#                     disks shown on screen as two bitboards, so the cells that differ from the engine position are
+#                     found with two XORs, and only those cells are written to the widget. Every cell write can
+#                     redraw its image, so a move, an undo or a restart costs the number of cells that changed, not
+#                     the size of the board. The writes of one render() are all done before the Tk loop runs
+#                     again, so they appear on screen in a single redraw.
+
+####################################################################################################################
+# Class description: Keeps a game2dboard Board in sync with an engine Position.
+class BoardRenderer:
+
+    ################################################################################################################################
+    # Method description: Creates the renderer of an empty board.
+    # Parameters: (self is implicit)
+    #              board: The game2dboard Board (all its cells empty)
+    #              board_size_n: The number of rows and columns of the board
+    def __init__(self, board, board_size_n):
+        self.board = board
+        self.board_size_n = board_size_n
+        # Disks of each player on screen
+        self.shown_bitboards = {1: 0, 2: 0}
+        # Cells written by the last render() and by all of them
+        self.last_cells_painted = 0
+        self.cells_painted = 0
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Paints the cells of the board that differ from the position.
+    # Parameters: (self is implicit)
+    #              position: The engine Position to show
+    # Returns: The number of cells painted.
+    def render(self, position):
+        player_1_disks = position.bitboards[1]
+        player_2_disks = position.bitboards[2]
+        changed = (self.shown_bitboards[1] ^ player_1_disks) | (self.shown_bitboards[2] ^ player_2_disks)
+        cells_painted = 0
+        for square in iterate_squares(changed):
+            if player_1_disks >> square & 1:
+                value = 1
+            elif player_2_disks >> square & 1:
+                value = 2
+            else:
+                value = None
+            self.board[square // self.board_size_n][square % self.board_size_n] = value
+            cells_painted += 1
+
+        self.shown_bitboards[1] = player_1_disks
+        self.shown_bitboards[2] = player_2_disks
+        self.last_cells_painted = cells_painted
+        self.cells_painted += cells_painted
+        return cells_painted
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(C), C being the number of changed cells
+        ################################################################################################################################
@@ -0,0 +1,713 @@
+import bisect
+import json
+import time
+from othello_engine import popcount, iterate_squares, legal_moves_bitboard, flip_mask_bitboard
+from othello_evaluation import evaluate_bitboards
+from othello_patterns import get_pattern_evaluator
+from othello_transposition import EXACT_BOUND, LOWER_BOUND, UPPER_BOUND
+
+####################################################################################################################
+# Module description: Game tree search of the Hard difficulty. It is a negamax with alpha-beta pruning: every
+#                     score is seen from the point of view of the player to move, so the score of a move is the
+#                     negated score of the position it leads to, and branches that cannot change the result
+#                     (alpha >= beta) are not searched.
+
+# Score of a finished game, above any heuristic evaluation; the final disk difference is added to it
+WIN_SCORE = 10000
+INFINITE_SCORE = 1000000
+
+# Default search depth (in plies) of the Hard difficulty when it has no time budget
+HARD_SEARCH_DEPTH = 6
+
+# The clock is read every (DEADLINE_CHECK_INTERVAL + 1) nodes, a few milliseconds of search
+DEADLINE_CHECK_INTERVAL = 255
+
+# A new iteration usually takes several times longer than the previous ones, so it is not started when
+# more than this fraction of the time budget is already used
+NEW_ITERATION_TIME_FRACTION = 0.5
+
+# Evaluation identifier of the evaluation of othello_evaluation (a pattern evaluation is identified by the
+# checksum of its weights)
+HEURISTIC_EVALUATION_ID = 0
+
+# Names of the bound types of the root move scores in the analysis of a search
+BOUND_NAMES = {EXACT_BOUND: "exact", LOWER_BOUND: "lower", UPPER_BOUND: "upper"}
+
+####################################################################################################################
+# Class description: Raised inside the search when its deadline is reached or it is stopped, to unwind it at once.
+class SearchTimeout(Exception):
+    pass
+
+####################################################################################################################
+# Method description: Heuristic score of a position for a player: the pattern evaluation when the position has one
+#                     attached (see othello_patterns), or else square weights, mobility and frontier (see
+#                     othello_evaluation).
+# Parameters: position: The engine Position to evaluate
+#             player_number: The player whose point of view is used
+# Returns: The score, positive when the position is good for player_number.
+def evaluate_position(position, player_number):
+    if position.pattern_evaluator is not None:
+        return position.pattern_evaluator.evaluate(position, player_number)
+    return evaluate_bitboards(position.bitboards[player_number], position.bitboards[3 - player_number],
+                              position.geometry)
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(1), a few popcounts and shifts, plus one table read per pattern instance
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Identifies the evaluation used by the search on a board size, so what a search stored (e.g. the
+#                     opening book) is not used with another evaluation.
+# Parameters: board_size_n: The number of rows and columns of the board
+#             pattern_evaluation: True if the search evaluates with the pattern weights when they are available
+# Returns: The checksum of the pattern weights, or HEURISTIC_EVALUATION_ID for the evaluation of othello_evaluation.
+def evaluation_id(board_size_n, pattern_evaluation=True):
+    pattern_evaluator = get_pattern_evaluator(board_size_n) if pattern_evaluation else None
+    if pattern_evaluator is None:
+        return HEURISTIC_EVALUATION_ID
+    return pattern_evaluator.weights_checksum
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(1), once the pattern evaluator is loaded
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Score of a finished game for a player: a win is always better than any heuristic score.
+# Parameters: position: The engine Position, where no player can move
+#             player_number: The player whose point of view is used
+# Returns: The score, positive when player_number has won.
+def final_score(position, player_number):
+    return disk_difference_score(position.num_disks_dictionary[player_number] -
+                                 position.num_disks_dictionary[3 - player_number])
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(1)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Converts a final disk difference (e.g. given by the endgame solver) to a search score.
+# Parameters: disk_difference: Disks of the player minus disks of the opponent at the end of the game
+# Returns: The score, above any heuristic score for a win and below any for a loss.
+def disk_difference_score(disk_difference):
+    if disk_difference > 0:
+        return WIN_SCORE + disk_difference
+    if disk_difference < 0:
+        return -WIN_SCORE + disk_difference
+    return 0
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(1)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Search score of the last move found by an endgame solver: the exact disk difference, or only
+#                     a win, draw or loss when the solver proved no more than that.
+# Parameters: endgame_solver: othello_endgame.EndgameSolver after find_best_move()
+# Returns: The score of the move for the player who moves.
+def endgame_solver_score(endgame_solver):
+    if endgame_solver.exact:
+        return disk_difference_score(endgame_solver.best_score)
+    return endgame_solver.best_score * WIN_SCORE
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(1)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Orders the legal moves so the best ones are usually searched first, which makes alpha-beta
+#                     prune more: the best move stored in the transposition table, corners, then the other cells,
+#                     and the X-squares (next to an empty corner diagonally) at the end.
+# Parameters: moves: Bitboard of the legal moves
+#             geometry: BoardGeometry of the board
+#             first_square: Square to search first (e.g. the transposition table move), or -1
+# Returns: A list of square indexes.
+def order_moves(moves, geometry, first_square=-1):
+    ordered_moves = []
+    if first_square >= 0 and moves >> first_square & 1:
+        ordered_moves.append(first_square)
+        moves ^= 1 << first_square
+    corner_moves = moves & geometry.corners_mask
+    x_square_moves = moves & geometry.x_squares_mask
+    other_moves = moves ^ corner_moves ^ x_square_moves
+    ordered_moves.extend(iterate_squares(corner_moves))
+    ordered_moves.extend(iterate_squares(other_moves))
+    ordered_moves.extend(iterate_squares(x_square_moves))
+    return ordered_moves
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(M), M being the number of legal moves
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Makes the statistics of the last search of a search engine (SearchEngine or
+#                     othello_parallel.ParallelSearchEngine, which keep the same counters).
+# Parameters: search_engine: The search engine, after its search
+#             source: "search", or "endgame" if the endgame solver found the move
+#             best_move: The move found
+# Returns: A SearchStatistics.
+def collect_statistics(search_engine, source, best_move):
+    return SearchStatistics(source, best_move, search_engine.best_score, search_engine.depth_reached,
+                            search_engine.nodes_searched, search_engine.leaf_evaluations, search_engine.cutoffs,
+                            search_engine.transposition_hits, search_engine.search_time, search_engine.iterations)
+
+####################################################################################################################
+# Class description: Statistics of the search of one move, to see where the thinking time goes. The search engines
+#                    fill one at the end of every search (SearchEngine.statistics); the game also makes one for the
+#                    moves that are not searched (opening book, Easy and Medium). __slots__ keeps the record small.
+class SearchStatistics:
+
+    __slots__ = ("source", "best_move", "score", "depth_reached", "nodes", "leaf_evaluations", "cutoffs",
+                 "transposition_hits", "search_time", "iterations")
+
+    ################################################################################################################################
+    # Method description: Creates the statistics of a move.
+    # Parameters: (self is implicit)
+    #              source: How the move was found: "search", "endgame", "book", "random", "greedy" or
+    #                      "ponder" (searched while the human player was thinking)
+    #              best_move: The (row, col) move found, or None
+    #              score: Score of the move for the player who searched it (0 if it was not searched)
+    #              depth_reached: Depth of the last complete iteration (empty cells for a complete endgame solve)
+    #              nodes: Positions searched
+    #              leaf_evaluations: Positions scored by the heuristic evaluation
+    #              cutoffs: Beta cutoffs (moves not searched because a previous one was good enough)
+    #              transposition_hits: Positions found in the transposition table
+    #              search_time: Seconds of the search
+    #              iterations: List of (depth, nodes, seconds) of the complete iterations of the iterative deepening
+    def __init__(self, source, best_move=None, score=0, depth_reached=0, nodes=0, leaf_evaluations=0, cutoffs=0,
+                 transposition_hits=0, search_time=0.0, iterations=()):
+        self.source = source
+        self.best_move = best_move
+        self.score = score
+        self.depth_reached = depth_reached
+        self.nodes = nodes
+        self.leaf_evaluations = leaf_evaluations
+        self.cutoffs = cutoffs
+        self.transposition_hits = transposition_hits
+        self.search_time = search_time
+        self.iterations = list(iterations)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Effective branching factor of every iteration: its nodes divided by the nodes of the
+    #                     previous one (how much more a search one ply deeper costs).
+    # Parameters: None (self is implicit)
+    # Returns: A list with one factor per iteration after the first one.
+    def branching_factors(self):
+        return [nodes / previous_nodes
+                for (_, previous_nodes, _), (_, nodes, _) in zip(self.iterations, self.iterations[1:])
+                if previous_nodes]
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(I), I being the number of iterations
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: The statistics as a dictionary of JSON values.
+    # Parameters: None (self is implicit)
+    # Returns: A dictionary with every statistic, plus the nodes per second and the branching factors.
+    def to_dict(self):
+        return {
+            "source": self.source,
+            "best_move": None if self.best_move is None else list(self.best_move),
+            "score": self.score,
+            "depth_reached": self.depth_reached,
+            "nodes": self.nodes,
+            "leaf_evaluations": self.leaf_evaluations,
+            "cutoffs": self.cutoffs,
+            "transposition_hits": self.transposition_hits,
+            "search_time": round(self.search_time, 6),
+            "nodes_per_second": round(self.nodes / self.search_time) if self.search_time > 0 else 0,
+            "iterations": [{"depth": depth, "nodes": nodes, "time": round(seconds, 6)}
+                           for depth, nodes, seconds in self.iterations],
+            "branching_factors": [round(factor, 2) for factor in self.branching_factors()],
+        }
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(I)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: One line summary, short enough for the output bar of the board.
+    # Parameters: None (self is implicit)
+    # Returns: The summary text.
+    def summary(self):
+        if self.nodes == 0:
+            return "AI: %s move in %.2f s" % (self.source, self.search_time)
+        return "AI: %s depth %d, %d nodes in %.2f s (%.0f k nodes/s)" % (
+            self.source, self.depth_reached, self.nodes, self.search_time,
+            self.nodes / self.search_time / 1000 if self.search_time > 0 else 0)
+        ################################################################################################################################
+
+####################################################################################################################
+# Class description: Result of the search for one root move, as given by the analysis of a search (the hints of the
+#                    game). __slots__ keeps the record small.
+class MoveAnalysis:
+
+    __slots__ = ("move", "score", "bound", "depth", "principal_variation")
+
+    ################################################################################################################################
+    # Method description: Creates the analysis of a root move.
+    # Parameters: (self is implicit)
+    #              move: The (row, col) root move
+    #              score: Score of the move for the player to move at the root
+    #              bound: EXACT_BOUND, or UPPER_BOUND when the move was only proven not better than the best ones
+    #                     (LOWER_BOUND for a win proven by the endgame solver without its disk difference)
+    #              depth: Depth of the search of the move (empty cells for the endgame solver)
+    #              principal_variation: The expected line of play, a list of (row, col) moves starting with move
+    def __init__(self, move, score, bound, depth, principal_variation):
+        self.move = move
+        self.score = score
+        self.bound = bound
+        self.depth = depth
+        self.principal_variation = principal_variation
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Short text of the score: the final disk difference of a game searched to the end
+    #                     (W: win, L: loss), or the heuristic score; "<=" in front of an upper bound.
+    # Parameters: None (self is implicit)
+    # Returns: The score text, e.g. "+35", "<=-12", "W+6".
+    def score_text(self):
+        if self.score >= WIN_SCORE:
+            text = "W+%d" % (self.score - WIN_SCORE)
+        elif self.score <= -WIN_SCORE:
+            text = "L%d" % (self.score + WIN_SCORE)
+        else:
+            text = "%+d" % self.score
+        return "<=" + text if self.bound == UPPER_BOUND else text
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: The analysis as a dictionary of JSON values.
+    # Parameters: None (self is implicit)
+    # Returns: A dictionary with the move, score, bound ("exact", "lower" or "upper"), depth and variation.
+    def to_dict(self):
+        return {
+            "move": list(self.move),
+            "score": self.score,
+            "bound": BOUND_NAMES[self.bound],
+            "depth": self.depth,
+            "principal_variation": [list(move) for move in self.principal_variation],
+        }
+        ################################################################################################################################
+
+####################################################################################################################
+# Method description: Analysis of the root moves of an endgame solver search, from its root scores.
+# Parameters: position: The engine Position searched
+#             endgame_solver: othello_endgame.EndgameSolver after find_best_move()
+#             number_of_empty_cells: Empty cells of the position (the depth of a complete solve)
+# Returns: A list of MoveAnalysis, best first.
+def endgame_solver_analysis(position, endgame_solver, number_of_empty_cells):
+    analysis = []
+    for square, (score, bound) in endgame_solver.root_scores.items():
+        if endgame_solver.exact:
+            score = disk_difference_score(score)
+        else:
+            score = ((score > 0) - (score < 0)) * WIN_SCORE
+        move = position.move_of(square)
+        analysis.append(MoveAnalysis(move, score, bound, number_of_empty_cells, [move]))
+    analysis.sort(key=lambda move_analysis: -move_analysis.score)
+    return analysis
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(M log M), M being the number of root moves
+    ####################################################################################################################
+
+####################################################################################################################
+# Class description: Sink of search statistics that writes one JSON object per line (JSON lines), to a file or to
+#                    any text stream, flushed at every line so the log can be followed while the game runs.
+class SearchLog:
+
+    ################################################################################################################################
+    # Method description: Opens the log.
+    # Parameters: (self is implicit)
+    #              destination: Path of the file (the lines are appended to it) or an open text stream
+    def __init__(self, destination):
+        self.owns_stream = isinstance(destination, str)
+        self.stream = open(destination, "a") if self.owns_stream else destination
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Writes the statistics of one move.
+    # Parameters: (self is implicit)
+    #              statistics: SearchStatistics of the move
+    #              fields: Extra fields of the line (e.g. the move number or the difficulty)
+    # Returns: None
+    def write(self, statistics, **fields):
+        record = dict(fields)
+        record.update(statistics.to_dict())
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Closes the log file (a stream given by the caller is left open).
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def close(self):
+        if self.owns_stream:
+            self.stream.close()
+        ################################################################################################################################
+
+####################################################################################################################
+# Class description: Alpha-beta negamax search on an engine Position. The position is changed with
+#                    apply_move()/undo_last_move() while searching, and it is left as it was at the end.
+#                    Iterative deepening is used at the root: each depth is searched with the root moves sorted by
+#                    the scores of the previous depth, so the best move is searched first.
+#                    With a transposition table, positions already searched (through another move order, or in
+#                    the previous iteration) return their stored score or at least give their best move first.
+#                    With an endgame solver, positions with few empty cells are solved instead.
+class SearchEngine:
+
+    ################################################################################################################################
+    # Method description: Creates a search engine.
+    # Parameters: (self is implicit)
+    #              transposition_table: othello_transposition.TranspositionTable shared by the searches, or None
+    #              endgame_solver: othello_endgame.EndgameSolver used when few cells are empty, or None
+    #              pattern_evaluation: True to evaluate with the pattern weights (othello_patterns) when they are
+    #                                  available for the board size, False to always use othello_evaluation
+    def __init__(self, transposition_table=None, endgame_solver=None, pattern_evaluation=True):
+        self.transposition_table = transposition_table
+        self.endgame_solver = endgame_solver
+        self.pattern_evaluation = pattern_evaluation
+        # Statistics of the last search
+        self.nodes_searched = 0
+        self.transposition_hits = 0
+        self.leaf_evaluations = 0
+        self.cutoffs = 0
+        self.depth_reached = 0
+        self.best_score = 0
+        self.search_time = 0.0
+        self.iterations = []
+        # SearchStatistics of the last search
+        self.statistics = SearchStatistics("search")
+        # MoveAnalysis of every root move of the last search, best first
+        self.analysis = []
+        # perf_counter() time when the running search must stop, None when it has no time budget
+        self.deadline = None
+        # threading.Event set by another thread to cancel the running search, or None
+        self.stop_event = None
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Releases the resources of the engine. The sequential search has none; it is here so
+    #                     it can be used like othello_parallel.ParallelSearchEngine.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def close(self):
+        pass
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Attaches the evaluation of the engine to a position it is going to search: the pattern
+    #                     evaluator of its board size, or none.
+    # Parameters: (self is implicit)
+    #              position: The engine Position (a copy owned by the search)
+    # Returns: None
+    def prepare_position(self, position):
+        pattern_evaluator = get_pattern_evaluator(position.board_size_n) if self.pattern_evaluation else None
+        if pattern_evaluator is not position.pattern_evaluator:
+            position.attach_pattern_evaluator(pattern_evaluator)
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(D), D being the number of disks, when the evaluator is attached
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Finds the best move of the current player of the position with iterative deepening.
+    #                     With a time limit, the iterations go on until the deadline, and the best move of the last
+    #                     completed iteration is returned (the interrupted iteration is discarded). A search running
+    #                     in a worker thread can be cancelled the same way from another thread with stop_event.
+    #                     The search works on a copy, so the given position is never changed.
+    #                     The scores of all the root moves of the last completed iteration are kept in analysis.
+    #                     Every root move is searched with the multi_pv-th best score found so far as alpha, so the
+    #                     multi_pv best moves get exact scores and the others are pruned as usual (their score is
+    #                     an upper bound); multi_pv=1 is the normal search of the best move.
+    # Parameters: (self is implicit)
+    #              position: The engine Position to search
+    #              max_depth: Depth (in plies) of the last iteration
+    #              time_limit: Time budget in seconds, or None to always complete max_depth
+    #              stop_event: threading.Event that stops the search when it is set, or None
+    #              multi_pv: Number of best moves whose exact score is wanted
+    # Returns: The best (row, col) move, or None if the current player cannot move.
+    def find_best_move(self, position, max_depth=HARD_SEARCH_DEPTH, time_limit=None, stop_event=None, multi_pv=1):
+        start_time = time.perf_counter()
+        self.nodes_searched = 0
+        self.transposition_hits = 0
+        self.leaf_evaluations = 0
+        self.cutoffs = 0
+        self.depth_reached = 0
+        # A search stopped during its first iteration has no score: the one of the previous search is not kept
+        self.best_score = 0
+        self.search_time = 0.0
+        self.iterations = []
+        self.analysis = []
+        self.deadline = None if time_limit is None else start_time + time_limit
+        self.stop_event = stop_event
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
+
+        search_position = position.copy()
+        self.prepare_position(search_position)
+        player = search_position.current_player
+        own = search_position.bitboards[player]
+        opponent = search_position.bitboards[3 - player]
+        root_moves = order_moves(legal_moves_bitboard(own, opponent, search_position.geometry), search_position.geometry)
+        if not root_moves:
+            self.statistics = SearchStatistics("search")
+            return None
+        multi_pv = max(1, min(multi_pv, len(root_moves)))
+
+        # Deeper than the number of empty cells, the search already sees the end of every line
+        number_of_empty_cells = search_position.geometry.num_squares - popcount(own | opponent)
+        max_depth = min(max_depth, number_of_empty_cells)
+
+        if self.endgame_solver is not None and self.endgame_solver.can_solve(search_position):
+            best_move = self.endgame_solver.find_best_move(search_position, time_limit, stop_event, multi_pv)
+            if best_move is not None:
+                self.record_endgame_solver_statistics(number_of_empty_cells, start_time)
+                self.analysis = endgame_solver_analysis(search_position, self.endgame_solver, number_of_empty_cells)
+                self.statistics = collect_statistics(self, "endgame", best_move)
+                return best_move
+            # The solver was stopped before it solved a root move: the move is searched, in the time left
+
+        root_scores = {}
+        root_bounds = {}
+        # Scores and bound types of the last complete iteration
+        completed_root_scores = {}
+        completed_root_bounds = {}
+        try:
+            for depth in range(1, max_depth + 1):
+                if depth > 1 and time_limit is not None and \
+                   time.perf_counter() - start_time > NEW_ITERATION_TIME_FRACTION * time_limit:
+                    break
+
+                iteration_start_time = time.perf_counter()
+                iteration_start_nodes = self.nodes_searched
+                alpha = -INFINITE_SCORE
+                # The multi_pv best scores of the iteration so far, lowest first
+                best_scores = []
+                for square in root_moves:
+                    score = self.search_move(search_position, square, depth, alpha, INFINITE_SCORE)
+                    root_scores[square] = score
+                    root_bounds[square] = EXACT_BOUND if score > alpha else UPPER_BOUND
+                    bisect.insort(best_scores, score)
+                    if len(best_scores) > multi_pv:
+                        del best_scores[0]
+                    if len(best_scores) == multi_pv:
+                        alpha = max(alpha, best_scores[0])
+
+                # Next iteration starts with the best moves of this one (sort is stable, so ties keep their order)
+                root_moves.sort(key=lambda square: -root_scores[square])
+                completed_root_scores = dict(root_scores)
+                completed_root_bounds = dict(root_bounds)
+                self.depth_reached = depth
+                self.best_score = root_scores[root_moves[0]]
+                self.iterations.append((depth, self.nodes_searched - iteration_start_nodes,
+                                        time.perf_counter() - iteration_start_time))
+        except SearchTimeout:
+            pass  # root_moves is only sorted after complete iterations, so its first move is still the best one
+
+        self.deadline = None
+        self.stop_event = None
+        self.analysis = [MoveAnalysis(search_position.move_of(square), completed_root_scores[square],
+                                      completed_root_bounds[square], self.depth_reached,
+                                      self.principal_variation(search_position, square, self.depth_reached))
+                         for square in root_moves if square in completed_root_scores]
+        self.search_time = time.perf_counter() - start_time
+        best_move = search_position.move_of(root_moves[0])
+        self.statistics = collect_statistics(self, "search", best_move)
+        return best_move
+
+        # Time Complexity:
+        # Worst case = O(b^d), as minimax, when the moves are badly ordered
+        # Average and Best case = O(b^(d/2)), alpha-beta with good move ordering
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Analyzes a position: one search of the best move (the search the AI runs, with
+    #                     exact scores for the number_of_moves best moves) gives the score, depth and principal
+    #                     variation of every legal move.
+    # Parameters: (self is implicit)
+    #              position: The engine Position to analyze (it is not changed)
+    #              number_of_moves: Number of best moves whose exact score is wanted
+    #              max_depth: Depth (in plies) of the last iteration
+    #              time_limit: Time budget in seconds, or None to always complete max_depth
+    #              stop_event: threading.Event that stops the search when it is set, or None
+    # Returns: A list of MoveAnalysis, one per legal move, best first (empty if the player to move cannot move).
+    def analyze(self, position, number_of_moves, max_depth=HARD_SEARCH_DEPTH, time_limit=None, stop_event=None):
+        self.find_best_move(position, max_depth, time_limit, stop_event, number_of_moves)
+        return self.analysis
+
+        # Time Complexity: Inherits from find_best_move
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Principal variation of a root move: the move, then the best moves stored in the
+    #                     transposition table for the positions that follow, as long as they are legal.
+    # Parameters: (self is implicit)
+    #              position: The engine Position of the root (it is left as it was)
+    #              square: Index of the root move square
+    #              max_length: Number of moves of the variation at most (the depth of the search)
+    # Returns: A list of (row, col) moves, starting with the root move.
+    def principal_variation(self, position, square, max_length):
+        geometry = position.geometry
+        variation = [position.move_of(square)]
+        plies = 0
+        while True:
+            player = position.current_player
+            own = position.bitboards[player]
+            opponent = position.bitboards[3 - player]
+            position.apply_move(square, flip_mask_bitboard(own, opponent, square, geometry))
+            plies += 1
+            if len(variation) >= max_length or self.transposition_table is None:
+                break
+            # The opponent moves next, or the player again when the opponent has to pass
+            position.current_player = 3 - player
+            moves = legal_moves_bitboard(position.bitboards[3 - player], position.bitboards[player], geometry)
+            if not moves:
+                position.current_player = player
+                moves = legal_moves_bitboard(position.bitboards[player], position.bitboards[3 - player], geometry)
+            entry = self.transposition_table.probe(position.hash_key())
+            if entry is None or entry[3] < 0 or not moves >> entry[3] & 1:
+                break
+            square = entry[3]
+            variation.append(position.move_of(square))
+        for _ in range(plies):
+            position.undo_last_move()
+        return variation
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(L), L being max_length
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Copies the statistics of the endgame solver after it has searched the move.
+    # Parameters: (self is implicit)
+    #              number_of_empty_cells: Empty cells of the root position (the depth of a complete solve)
+    #              start_time: perf_counter() time when the search started
+    # Returns: None
+    def record_endgame_solver_statistics(self, number_of_empty_cells, start_time):
+        self.nodes_searched = self.endgame_solver.nodes_searched
+        self.transposition_hits = 0
+        self.leaf_evaluations = 0
+        self.cutoffs = 0
+        self.depth_reached = number_of_empty_cells if self.endgame_solver.completed else 0
+        self.best_score = endgame_solver_score(self.endgame_solver)
+        self.deadline = None
+        self.stop_event = None
+        self.search_time = time.perf_counter() - start_time
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Plays a move of the current player, searches the resulting position and reverts the move.
+    # Parameters: (self is implicit)
+    #              position: The engine Position
+    #              square: Index of the move square
+    #              depth: Remaining depth, including this move
+    #              alpha, beta: Search window, from the point of view of the current player
+    # Returns: The score of the move for the current player.
+    def search_move(self, position, square, depth, alpha, beta):
+        player = position.current_player
+        flipped = flip_mask_bitboard(position.bitboards[player], position.bitboards[3 - player], square,
+                                     position.geometry)
+        position.apply_move(square, flipped)
+        position.current_player = 3 - player
+        score = -self.negamax(position, depth - 1, -beta, -alpha)
+        position.undo_last_move()
+        return score
+
+        # Time Complexity: Inherits from negamax
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Negamax with alpha-beta pruning. When the player to move has no legal move it passes,
+    #                     and when neither player can move the game is over and it is scored exactly.
+    #                     Results are stored in the transposition table with the type of bound they are.
+    # Parameters: (self is implicit)
+    #              position: The engine Position
+    #              depth: Remaining depth in plies
+    #              alpha: Score already guaranteed to the player to move
+    #              beta: Score above which the opponent avoids this position
+    # Returns: The score of the position for the player to move.
+    #          Raises SearchTimeout when the deadline of the search is reached or the search is stopped.
+    def negamax(self, position, depth, alpha, beta):
+        self.nodes_searched += 1
+        if not self.nodes_searched & DEADLINE_CHECK_INTERVAL:
+            if (self.deadline is not None and time.perf_counter() >= self.deadline) or \
+               (self.stop_event is not None and self.stop_event.is_set()):
+                raise SearchTimeout()
+        player = position.current_player
+        geometry = position.geometry
+
+        if depth <= 0:
+            self.leaf_evaluations += 1
+            if not geometry.full_mask & ~(position.bitboards[1] | position.bitboards[2]):
+                return final_score(position, player)  # The last move filled the board: the game is over
+            return evaluate_position(position, player)
+
+        transposition_table = self.transposition_table
+        table_move = -1
+        if transposition_table is not None:
+            key = position.hash_key()
+            entry = transposition_table.probe(key)
+            if entry is not None:
+                self.transposition_hits += 1
+                entry_depth, entry_bound, entry_score, table_move = entry
+                if entry_depth >= depth:
+                    if entry_bound == EXACT_BOUND:
+                        return entry_score
+                    if entry_bound == LOWER_BOUND:
+                        alpha = max(alpha, entry_score)
+                    else:
+                        beta = min(beta, entry_score)
+                    if alpha >= beta:
+                        return entry_score
+        # The bound of the result is classified against the window actually searched, narrowed by the table entry
+        original_alpha = alpha
+
+        own = position.bitboards[player]
+        opponent = position.bitboards[3 - player]
+        moves = legal_moves_bitboard(own, opponent, geometry)
+
+        if not moves:
+            if not legal_moves_bitboard(opponent, own, geometry):
+                return final_score(position, player)
+            # Pass: the opponent moves again
+            position.current_player = 3 - player
+            score = -self.negamax(position, depth, -beta, -alpha)
+            position.current_player = player
+            return score
+
+        best_score = -INFINITE_SCORE
+        best_square = -1
+        for square in order_moves(moves, geometry, table_move):
+            flipped = flip_mask_bitboard(own, opponent, square, geometry)
+            position.apply_move(square, flipped)
+            position.current_player = 3 - player
+            score = -self.negamax(position, depth - 1, -beta, -alpha)
+            position.undo_last_move()
+
+            if score > best_score:
+                best_score = score
+                best_square = square
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.cutoffs += 1
+                        break  # Cutoff: the opponent will not allow this position
+
+        if transposition_table is not None:
+            if best_score <= original_alpha:
+                bound = UPPER_BOUND
+            elif best_score >= beta:
+                bound = LOWER_BOUND
+            else:
+                bound = EXACT_BOUND
+            transposition_table.store(key, depth, bound, best_score, best_square)
+        return best_score
+
+        # Time Complexity:
+        # Worst case = O(b^d), b being the branching factor and d the depth
+        # Average and Best case = O(b^(d/2)), when the best moves are searched first
+        ################################################################################################################################
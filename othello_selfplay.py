@@ -0,0 +1,277 @@
+import argparse
+import concurrent.futures
+import os
+import random
+import time
+import othello_book
+import othello_endgame
+import othello_engine
+import othello_search
+import othello_transposition
+
+####################################################################################################################
+# Module description: Headless self-play tournaments between two AI players, to measure whether a change of the
+#                     engine makes it stronger (and how fast it plays). Run it from a terminal:
+#                         python othello_selfplay.py --games 200 --first hard:depth=4 --second medium
+#                     A player is given as "name" or "name:option=value,option=value":
+#                         easy                random move (Easy difficulty)
+#                         medium              greedy move (Medium difficulty)
+#                         minimax             original depth 3 minimax of Position.find_best_move("H")
+#                         hard                alpha-beta search of the game (Hard difficulty), with the options
+#                                             depth (default 6), time (seconds per move, default none),
+#                                             tt (transposition table MB, default 16, 0 for none),
+#                                             book (1/0, default 1) and endgame (1/0, default 1)
+#                     New players are added to PLAYER_FACTORIES. The games are played in a pool of worker processes.
+#                     They are played in pairs: both games of a pair start from the same random opening, and each
+#                     player has the black disks in one of them, so neither player gets the better colour or opening.
+
+# Default number of random moves played before the players take over
+DEFAULT_OPENING_PLIES = 4
+
+# Globals of a worker process, set by initialize_worker()
+worker_players = None
+
+####################################################################################################################
+# Method description: Easy player: a random move among the possible moves.
+# Parameters: options: Dictionary of the options of the player (none are used)
+# Returns: A function that gives the move of the current player of a Position.
+def create_easy_player(options):
+    return othello_engine.Position.find_random_move
+
+####################################################################################################################
+# Method description: Medium player: the greedy move.
+# Parameters: options: Dictionary of the options of the player (none are used)
+# Returns: A function that gives the move of the current player of a Position.
+def create_medium_player(options):
+    return lambda position: position.find_best_move("M")
+
+####################################################################################################################
+# Method description: Player of the original minimax of the Hard difficulty (before the alpha-beta search).
+# Parameters: options: Dictionary of the options of the player (none are used)
+# Returns: A function that gives the move of the current player of a Position.
+def create_minimax_player(options):
+    return lambda position: position.find_best_move("H")
+
+####################################################################################################################
+# Method description: Hard player: the alpha-beta search of the game, with its opening book and endgame solver.
+# Parameters: options: Dictionary of the options of the player (depth, time, tt, book, endgame, patterns)
+# Returns: A function that gives the move of the current player of a Position.
+def create_hard_player(options):
+    max_depth = int(options.get("depth", othello_search.HARD_SEARCH_DEPTH))
+    time_limit = float(options["time"]) if "time" in options else None
+    transposition_table_size_mb = float(options.get("tt", othello_transposition.DEFAULT_SIZE_IN_MB))
+    transposition_table = None
+    if transposition_table_size_mb > 0:
+        transposition_table = othello_transposition.TranspositionTable(size_in_mb=transposition_table_size_mb)
+    endgame_solver = othello_endgame.EndgameSolver() if options.get("endgame", "1") != "0" else None
+    search_engine = othello_search.SearchEngine(transposition_table, endgame_solver,
+                                                options.get("patterns", "1") != "0")
+    opening_book = None
+    if options.get("book", "1") != "0":
+        opening_book = othello_book.get_opening_book(pattern_evaluation=options.get("patterns", "1") != "0")
+
+    def find_move(position):
+        if opening_book is not None:
+            book_move = opening_book.find_best_move(position)
+            if book_move is not None:
+                return book_move
+        return search_engine.find_best_move(position, max_depth, time_limit)
+
+    return find_move
+
+# Players of the tournaments: name -> (function creating the player from its options, names of the options)
+PLAYER_FACTORIES = {
+    "easy": (create_easy_player, ()),
+    "medium": (create_medium_player, ()),
+    "minimax": (create_minimax_player, ()),
+    "hard": (create_hard_player, ("depth", "time", "tt", "book", "endgame", "patterns")),
+}
+
+####################################################################################################################
+# Method description: Splits a player description such as "hard:depth=4,time=0.5" into its name and options.
+#                     Raises ValueError if the player or one of its options does not exist.
+# Parameters: player_spec: The player description
+# Returns: A (name, {option: value}) tuple.
+def parse_player_spec(player_spec):
+    name, _, option_text = player_spec.partition(":")
+    if name not in PLAYER_FACTORIES:
+        raise ValueError("Unknown player %r (choose from %s)" % (name, ", ".join(sorted(PLAYER_FACTORIES))))
+    options = {}
+    for option in option_text.split(","):
+        if not option:
+            continue
+        key, separator, value = option.partition("=")
+        if not separator or key not in PLAYER_FACTORIES[name][1]:
+            raise ValueError("Unknown option %r of player %r" % (option, name))
+        options[key] = value
+    return (name, options)
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(L), L being the length of the description
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Creates a player from its description.
+# Parameters: player_spec: The player description, e.g. "hard:depth=4"
+# Returns: A function that gives the move of the current player of a Position.
+def create_player(player_spec):
+    name, options = parse_player_spec(player_spec)
+    return PLAYER_FACTORIES[name][0](options)
+
+####################################################################################################################
+# Method description: Initializer of every worker process: creates both players once, so the players with a search
+#                     engine keep their transposition table from one game to the next.
+# Parameters: player_specs: Descriptions of the first and second players
+# Returns: None
+def initialize_worker(player_specs):
+    global worker_players
+    worker_players = [create_player(player_spec) for player_spec in player_specs]
+
+####################################################################################################################
+# Method description: Plays one game of the tournament. Game 2k and 2k+1 start from the same random opening, the
+#                     first player has the black disks (player 1) in the even game and the white disks in the odd one.
+# Parameters: game_index: Number of the game in the tournament
+#             seed: Seed of the tournament
+#             board_size_n: The number of rows and columns of the board
+#             opening_plies: Number of random moves played before the players take over
+# Returns: A (disks of the first player, disks of the second player, [think time, moves] of the first player,
+#          [think time, moves] of the second player) tuple.
+def play_game(game_index, seed, board_size_n, opening_plies):
+    opening_random = random.Random(seed * 1000003 + game_index // 2)
+    # The random players get a different (but reproducible) sequence in every game
+    random.seed(seed * 1000003 + game_index)
+    first_player_number = 1 if game_index % 2 == 0 else 2
+    players = {first_player_number: worker_players[0], 3 - first_player_number: worker_players[1]}
+    think_statistics = {1: [0.0, 0], 2: [0.0, 0]}
+
+    position = othello_engine.Position(board_size_n)
+    ply = 0
+    while True:
+        if not position.current_player_can_move():
+            position.current_player = 3 - position.current_player  # Pass
+            if not position.current_player_can_move():
+                break  # Game over
+            continue
+        if ply < opening_plies:
+            move = opening_random.choice(position.get_possible_moves_by_current_player())
+        else:
+            start_time = time.perf_counter()
+            move = players[position.current_player](position)
+            statistics = think_statistics[position.current_player]
+            statistics[0] += time.perf_counter() - start_time
+            statistics[1] += 1
+        position.make_move(move)
+        position.current_player = 3 - position.current_player
+        ply += 1
+
+    disks = position.count_disks()
+    return (disks[first_player_number], disks[3 - first_player_number],
+            think_statistics[first_player_number], think_statistics[3 - first_player_number])
+
+    # Time Complexity: Inherits from the players, for the N^2 - 4 moves of the game
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Plays a tournament between two players, in a pool of worker processes.
+# Parameters: player_specs: Descriptions of the first and second players
+#             number_of_games: Number of games (rounded up to an even number, games are played in pairs)
+#             seed: Seed of the random openings
+#             board_size_n: The number of rows and columns of the board
+#             opening_plies: Number of random moves played before the players take over
+#             number_of_workers: Number of worker processes, 1 to play in this process
+#             report: Function called with the number of finished games after every game, or None
+# Returns: A (list of the results of play_game(), elapsed seconds) tuple.
+def run_tournament(player_specs, number_of_games, seed=2023, board_size_n=8, opening_plies=DEFAULT_OPENING_PLIES,
+                   number_of_workers=None, report=None):
+    if number_of_workers is None:
+        number_of_workers = os.cpu_count() or 1
+    number_of_games += number_of_games % 2
+    results = []
+    start_time = time.perf_counter()
+    if number_of_workers <= 1:
+        initialize_worker(player_specs)
+        for game_index in range(number_of_games):
+            results.append(play_game(game_index, seed, board_size_n, opening_plies))
+            if report is not None:
+                report(len(results))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=number_of_workers, initializer=initialize_worker,
+                                                    initargs=(player_specs,)) as executor:
+            futures = [executor.submit(play_game, game_index, seed, board_size_n, opening_plies)
+                       for game_index in range(number_of_games)]
+            for future in concurrent.futures.as_completed(futures):
+                results.append(future.result())
+                if report is not None:
+                    report(len(results))
+    return (results, time.perf_counter() - start_time)
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(G / W) games, G being the number of games and W the number of workers
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Prints the win rates, disk differences and think times of both players.
+# Parameters: player_specs: Descriptions of the first and second players
+#             results: List of the results of play_game()
+#             elapsed_seconds: Duration of the tournament
+# Returns: None
+def print_report(player_specs, results, elapsed_seconds):
+    number_of_games = len(results)
+    print("%-24s %7s %7s %7s %7s %14s %14s" % ("player", "wins", "draws", "losses", "score", "avg disk diff",
+                                             "think/move ms"))
+    for player_index, player_spec in enumerate(player_specs):
+        wins = draws = 0
+        disk_difference = 0
+        think_time = 0.0
+        moves = 0
+        for result in results:
+            own_disks = result[player_index]
+            opponent_disks = result[1 - player_index]
+            wins += own_disks > opponent_disks
+            draws += own_disks == opponent_disks
+            disk_difference += own_disks - opponent_disks
+            think_time += result[2 + player_index][0]
+            moves += result[2 + player_index][1]
+        losses = number_of_games - wins - draws
+        print("%-24s %6.1f%% %6.1f%% %6.1f%% %6.1f%% %+14.2f %14.2f" % (
+            player_spec, 100.0 * wins / number_of_games, 100.0 * draws / number_of_games,
+            100.0 * losses / number_of_games, 100.0 * (wins + 0.5 * draws) / number_of_games,
+            disk_difference / number_of_games, 1000.0 * think_time / moves if moves else 0.0))
+    print("%d games in %.1f s: %.2f games/s" % (number_of_games, elapsed_seconds, number_of_games / elapsed_seconds))
+
+    # Time Complexity:
+    # Worst, Average, and Best case = O(G)
+    ####################################################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless self-play tournament between two Othello AI players")
+    parser.add_argument("--first", default="hard:depth=4", help="first player, e.g. hard:depth=4,time=0.5")
+    parser.add_argument("--second", default="medium", help="second player (%s)" % ", ".join(sorted(PLAYER_FACTORIES)))
+    parser.add_argument("--games", type=int, default=100, help="number of games (played in pairs of both colours)")
+    parser.add_argument("--opening-plies", type=int, default=DEFAULT_OPENING_PLIES,
+                        help="random moves played before the players take over")
+    parser.add_argument("--size", type=int, default=8, help="number of rows and columns of the board")
+    parser.add_argument("--seed", type=int, default=2023, help="seed of the random openings")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (1 to play in this process)")
+    arguments = parser.parse_args()
+
+    player_specs = (arguments.first, arguments.second)
+    for player_spec in player_specs:
+        try:
+            parse_player_spec(player_spec)
+        except ValueError as error:
+            parser.error(str(error))
+
+    number_of_games = arguments.games + arguments.games % 2
+    print("%s vs %s: %d games on %dx%d, %d random opening moves, %d workers" % (
+        arguments.first, arguments.second, number_of_games, arguments.size, arguments.size,
+        arguments.opening_plies, arguments.workers))
+    results, elapsed_seconds = run_tournament(
+        player_specs, number_of_games, arguments.seed, arguments.size, arguments.opening_plies, arguments.workers,
+        lambda finished_games: print("%d/%d games" % (finished_games, number_of_games), end="\r"))
+    print()
+    print_report(player_specs, results, elapsed_seconds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,815 @@
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import os
+import random
+import time
+import othello_book
+import othello_endgame
+import othello_engine
+import othello_history
+import othello_search
+import othello_transposition
+
+####################################################################################################################
+# Module description: Headless game server: many games at the same time, played by clients over TCP (or a Unix
+#                     socket) with a line protocol, one JSON object per line. Run it from a terminal:
+#                         python othello_server.py --port 8765 --workers 4
+#                     and load test it on the same machine (with a server started in the same process, or a
+#                     running one with --connect):
+#                         python othello_server.py --load-test --sessions 1000 --connections 20 --difficulty M
+#                     The games are lightweight sessions (an engine Position and its move log) following the rules
+#                     of othello_game: the client is player 1 (black, moves first) against the AI as player 2, a
+#                     player without moves passes, and undo takes back the AI moves and the last client move.
+#                     The AI moves are searched in a bounded pool of worker processes. At most --max-queued
+#                     requests wait for a worker; beyond that a request is refused at once with "busy"
+#                     (backpressure), and a request that cannot be answered before its deadline fails with
+#                     "deadline exceeded" (the client move is then taken back, so it can be sent again).
+#
+#                     Requests ("id" is optional and returned in the response; responses can come in any order):
+#                         {"id": 1, "op": "new", "size": 8, "difficulty": "H"}
+#                         {"id": 2, "op": "move", "session": 1, "move": [2, 3], "deadline_ms": 2000}
+#                         {"id": 3, "op": "undo", "session": 1}
+#                         {"id": 4, "op": "state", "session": 1}
+#                         {"id": 5, "op": "close", "session": 1}
+#                         {"id": 6, "op": "stats"}
+#                     Responses are {"id": ..., "ok": true, ...} or {"id": ..., "ok": false, "error": "..."}. The
+#                     state of a game has the board (rows of "-", "X" and "O"), the player to move, the disks, the
+#                     legal moves, whether the game is over and its transcript. A move response also has the
+#                     AI moves played and the search statistics of the last one.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Requests waiting for a worker process beyond which new AI requests are refused
+DEFAULT_MAX_QUEUED_REQUESTS = 256
+# Deadline of a move request (client move and AI answers) when the request has no deadline_ms
+DEFAULT_DEADLINE_SECONDS = 5.0
+# Thinking time of the AI per difficulty (Hard searches until its budget or the deadline is over)
+SERVER_TIME_BUDGET_SECONDS = {"E": 0.0, "M": 0.0, "H": 0.5}
+# Part of the time left before the deadline kept for sending the AI move back to the event loop
+DEADLINE_MARGIN_SECONDS = 0.05
+# Memory of the transposition table of each worker process (in megabytes)
+WORKER_TRANSPOSITION_TABLE_SIZE_MB = 16
+# Limits of a connection: longest request line, requests processed at the same time (the next lines are not read
+# until one of them is answered, so a client sending too fast is slowed down by TCP)
+MAX_LINE_BYTES = 65536
+MAX_PIPELINED_REQUESTS = 64
+DEFAULT_MAX_SESSIONS = 100000
+# Board sizes of the games (even, so the 4 starting disks are in the middle)
+MIN_BOARD_SIZE = 4
+MAX_BOARD_SIZE = 32
+# Wait of a load test client before sending a move again after a busy response
+BUSY_RETRY_DELAY_SECONDS = 0.05
+# Latest samples kept for the latency percentiles of the statistics
+LATENCY_SAMPLES = 10000
+
+HUMAN_PLAYER = 1
+AI_PLAYER = 2
+BOARD_CHARACTERS = {None: "-", 1: "X", 2: "O"}
+
+# Globals of a worker process, set by initialize_worker()
+worker_search_engine = None
+worker_opening_book = None
+
+####################################################################################################################
+# Class description: Error of a request, sent back to the client as {"ok": false, "error": message}.
+class RequestError(Exception):
+    pass
+
+####################################################################################################################
+# Method description: Tells if a value of a request is a JSON integer (bool is an int in Python, but not in JSON).
+# Parameters: value: The value
+# Returns: True if it is an integer, False if not.
+def is_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+####################################################################################################################
+# Method description: Initializer of every worker process: creates its search engine once, so it keeps its
+#                     transposition table from one request to the next.
+# Parameters: transposition_table_size_mb: Memory of the transposition table of the worker, 0 for none
+# Returns: None
+def initialize_worker(transposition_table_size_mb):
+    global worker_search_engine, worker_opening_book
+    transposition_table = None
+    if transposition_table_size_mb > 0:
+        transposition_table = othello_transposition.TranspositionTable(size_in_mb=transposition_table_size_mb)
+    worker_search_engine = othello_search.SearchEngine(transposition_table, othello_endgame.EndgameSolver())
+    worker_opening_book = othello_book.get_opening_book()
+    random.seed()
+
+####################################################################################################################
+# Method description: Task of a worker process: finds the AI move of a position for a difficulty, like the game
+#                     does (random for Easy, greedy for Medium, book and alpha-beta search for Hard).
+# Parameters: board_size_n: The number of rows and columns of the board
+#             player_1_disks, player_2_disks: Bitboards of the position
+#             player: The player to move
+#             difficulty: "E", "M" or "H"
+#             time_limit: Time budget in seconds of the Hard search
+# Returns: A ((row, col) move, dictionary of the SearchStatistics) tuple.
+def find_ai_move(board_size_n, player_1_disks, player_2_disks, player, difficulty, time_limit):
+    position = othello_engine.Position(board_size_n)
+    position.load_bitboards(player_1_disks, player_2_disks, player)
+    start_time = time.perf_counter()
+    if difficulty == "E":
+        ai_move = position.find_random_move()
+        statistics = othello_search.SearchStatistics("random", ai_move, search_time=time.perf_counter() - start_time)
+    elif difficulty == "M":
+        ai_move = position.find_best_move("M")
+        statistics = othello_search.SearchStatistics("greedy", ai_move, search_time=time.perf_counter() - start_time)
+    else:
+        ai_move = None
+        if worker_opening_book is not None:
+            ai_move = worker_opening_book.find_best_move(position)
+        if ai_move is not None:
+            statistics = othello_search.SearchStatistics("book", ai_move,
+                                                         search_time=time.perf_counter() - start_time)
+        else:
+            ai_move = worker_search_engine.find_best_move(position, position.geometry.num_squares, time_limit)
+            statistics = worker_search_engine.statistics
+    return (ai_move, statistics.to_dict())
+
+    # Time Complexity: Inherits from the AI of the difficulty (bounded by time_limit in Hard)
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Percentile of a list of values (nearest rank method).
+# Parameters: values: The values (not empty)
+#             percent: The percentile, from 0 to 100
+# Returns: The smallest value with at least percent % of the values less than or equal to it.
+def percentile(values, percent):
+    sorted_values = sorted(values)
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+####################################################################################################################
+# Class description: One game of the server: the engine position, its legal moves and its move log.
+class GameSession:
+
+    ################################################################################################################################
+    # Method description: Creates a game at its starting position, with the client to move.
+    # Parameters: (self is implicit)
+    #              session_id: Identifier of the game
+    #              board_size_n: The number of rows and columns of the board
+    #              difficulty: "E", "M" or "H"
+    def __init__(self, session_id, board_size_n, difficulty):
+        self.session_id = session_id
+        self.board_size_n = board_size_n
+        self.difficulty = difficulty
+        self.position = othello_engine.Position(board_size_n)
+        self.legal_moves = othello_engine.LegalMoveCache(self.position)
+        self.move_log = othello_history.MoveLog()
+        # Requests of a game are handled one at a time (a move waits for the AI answer of the previous one)
+        self.lock = asyncio.Lock()
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Tells if the game is over, when neither player can move.
+    # Parameters: None (self is implicit)
+    # Returns: True if the game is over, False if not.
+    def is_game_over(self):
+        return self.legal_moves.game_is_over()
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Plays a move of the player to move, and gives the turn to the other player (or back to the
+    #                     same one when the other player has to pass).
+    # Parameters: (self is implicit)
+    #              move (tuple): The (row, col) move
+    # Returns: None. Raises RequestError if the move is not legal.
+    def play(self, move):
+        if not self.legal_moves.is_legal(move, self.position.current_player):
+            raise RequestError("Move %s is not legal" % (list(move),))
+        self.position.make_move(move)
+        self.move_log.record_last_move(self.position)
+        self.position.current_player = 3 - self.position.current_player
+        if not self.legal_moves.player_can_move(self.position.current_player) and not self.is_game_over():
+            self.position.current_player = 3 - self.position.current_player  # Pass
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(F), F being the number of flipped disks
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Takes back plies down to a length of the move log (the plies of a failed request).
+    # Parameters: (self is implicit)
+    #              number_of_plies: Length of the move log to go back to
+    # Returns: None
+    def undo_to(self, number_of_plies):
+        while len(self.move_log) > number_of_plies:
+            self.move_log.pop()
+            self.position.undo_last_move()
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(F), F being the number of disks flipped by the undone plies
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Undoes the AI moves after the last client move, and the client move itself, so it is the
+    #                     client's turn again (as key U of the game).
+    # Parameters: None (self is implicit)
+    # Returns: None. Raises RequestError if the client has no move to undo.
+    def undo(self):
+        records = self.move_log.records
+        number_of_ai_plies = 0
+        while number_of_ai_plies < len(records) and records[-1 - number_of_ai_plies].player == AI_PLAYER:
+            number_of_ai_plies += 1
+        if number_of_ai_plies == len(records):
+            raise RequestError("There are no moves to undo")
+        self.undo_to(len(records) - number_of_ai_plies - 1)
+        self.position.current_player = HUMAN_PLAYER
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(F), F being the number of disks flipped by the undone plies
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: State of the game sent to the client.
+    # Parameters: None (self is implicit)
+    # Returns: A dictionary that can be written as JSON.
+    def to_dict(self):
+        position = self.position
+        board_size_n = self.board_size_n
+        return {
+            "session": self.session_id,
+            "size": board_size_n,
+            "difficulty": self.difficulty,
+            "board": ["".join(BOARD_CHARACTERS[position.get_cell(row, col)] for col in range(board_size_n))
+                      for row in range(board_size_n)],
+            "to_move": position.current_player,
+            "disks": [position.num_disks_dictionary[1], position.num_disks_dictionary[2]],
+            "legal_moves": [list(move) for move in self.legal_moves.moves(position.current_player)],
+            "game_over": self.is_game_over(),
+            "transcript": self.move_log.to_transcript(board_size_n),
+        }
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(N^2), writing the board
+        ################################################################################################################################
+
+####################################################################################################################
+# Class description: The server: the game sessions of the connected clients, the pool of worker processes of the
+#                    AI, and the statistics of the requests.
+class OthelloServer:
+
+    ################################################################################################################################
+    # Method description: Creates the server (the worker processes are started with the first AI request).
+    # Parameters: (self is implicit)
+    #              number_of_workers: Number of worker processes of the AI, by default one per core
+    #              max_queued_requests: AI requests allowed to wait for a worker before new ones are refused
+    #              default_deadline_seconds: Deadline of the move requests without deadline_ms
+    #              max_sessions: Number of games the server holds at most
+    #              transposition_table_size_mb: Memory of the transposition table of each worker, 0 for none
+    def __init__(self, number_of_workers=None, max_queued_requests=DEFAULT_MAX_QUEUED_REQUESTS,
+                 default_deadline_seconds=DEFAULT_DEADLINE_SECONDS, max_sessions=DEFAULT_MAX_SESSIONS,
+                 transposition_table_size_mb=WORKER_TRANSPOSITION_TABLE_SIZE_MB):
+        if number_of_workers is None:
+            number_of_workers = os.cpu_count() or 1
+        self.number_of_workers = number_of_workers
+        self.max_queued_requests = max_queued_requests
+        self.default_deadline_seconds = default_deadline_seconds
+        self.max_sessions = max_sessions
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=number_of_workers, initializer=initialize_worker, initargs=(transposition_table_size_mb,))
+        # Free workers, created in start() because it belongs to the event loop
+        self.free_workers = None
+        self.sessions = {}
+        self.next_session_id = 1
+        self.connections = 0
+        self.connection_tasks = set()
+        self.asyncio_server = None
+
+        # Statistics
+        self.start_time = time.perf_counter()
+        self.requests = collections.Counter()
+        self.errors = collections.Counter()
+        self.ai_moves = 0
+        self.queued_requests = 0
+        self.busy_rejections = 0
+        self.deadline_misses = 0
+        # Latest queue latencies (time waiting for a worker) and move request latencies, in seconds
+        self.queue_latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        self.move_latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1), the processes are started when the first task is submitted
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Starts listening on a TCP port or on a Unix socket.
+    # Parameters: (self is implicit)
+    #              host, port: Address of the TCP server (port 0 picks a free port)
+    #              unix_path: Path of the Unix socket, used instead of TCP when it is given
+    # Returns: The address the server listens on: (host, port) or the Unix socket path.
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        self.free_workers = asyncio.Semaphore(self.number_of_workers)
+        if unix_path is not None:
+            self.asyncio_server = await asyncio.start_unix_server(self.handle_connection, unix_path,
+                                                                  limit=MAX_LINE_BYTES)
+            return unix_path
+        self.asyncio_server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE_BYTES)
+        return self.asyncio_server.sockets[0].getsockname()[:2]
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Stops listening, closes the connections and stops the worker processes.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    async def close(self):
+        if self.asyncio_server is not None:
+            self.asyncio_server.close()
+            await self.asyncio_server.wait_closed()
+        for task in self.connection_tasks:
+            task.cancel()
+        await asyncio.gather(*self.connection_tasks, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Serves one client: reads its request lines, answers each one as soon as it is done, and
+    #                     drops its games when it disconnects.
+    # Parameters: (self is implicit)
+    #              reader, writer: asyncio streams of the connection
+    # Returns: None
+    async def handle_connection(self, reader, writer):
+        self.connections += 1
+        connection_task = asyncio.current_task()
+        self.connection_tasks.add(connection_task)
+        connection_sessions = set()
+        write_lock = asyncio.Lock()
+        pipelined_requests = asyncio.Semaphore(MAX_PIPELINED_REQUESTS)
+        tasks = set()
+        try:
+            while True:
+                await pipelined_requests.acquire()
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break  # Line longer than MAX_LINE_BYTES, or connection lost
+                except asyncio.CancelledError:
+                    break  # The server is closing: the requests being answered are finished
+                if not line:
+                    break
+                task = asyncio.ensure_future(self.answer_request(line, connection_sessions, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: pipelined_requests.release())
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            for session_id in connection_sessions:
+                self.sessions.pop(session_id, None)
+            self.connections -= 1
+            self.connection_tasks.discard(connection_task)
+            writer.close()
+
+        # Time Complexity: Inherits from the requests of the client
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Answers one request line of a client.
+    # Parameters: (self is implicit)
+    #              line: The request line (bytes)
+    #              connection_sessions: Set of the games of the connection
+    #              writer: asyncio stream writer of the connection
+    #              write_lock: asyncio.Lock of the writer (responses are written whole, one at a time)
+    # Returns: None
+    async def answer_request(self, line, connection_sessions, writer, write_lock):
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                raise RequestError("Invalid JSON")
+            if not isinstance(request, dict):
+                raise RequestError("A request is a JSON object")
+            request_id = request.get("id")
+            response = await self.handle_request(request, connection_sessions)
+            response["ok"] = True
+        except RequestError as error:
+            response = {"ok": False, "error": str(error)}
+        except Exception as error:
+            # Last resort: a request that breaks the server still gets an answer, the client never waits for one
+            response = {"ok": False, "error": "Internal error: %s: %s" % (type(error).__name__, error)}
+        if not response["ok"]:
+            self.errors[response["error"]] += 1
+        if request_id is not None:
+            response["id"] = request_id
+        async with write_lock:
+            try:
+                writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+                await writer.drain()
+            except ConnectionError:
+                pass  # The client is gone, its games are dropped by handle_connection()
+
+        # Time Complexity: Inherits from handle_request
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Runs a request.
+    # Parameters: (self is implicit)
+    #              request: Dictionary of the request
+    #              connection_sessions: Set of the games of the connection
+    # Returns: The dictionary of the response. Raises RequestError if the request fails.
+    async def handle_request(self, request, connection_sessions):
+        operation = request.get("op")
+        if not isinstance(operation, str):
+            raise RequestError("The op must be a string")
+        self.requests[operation] += 1
+        if operation == "new":
+            return self.new_session(request, connection_sessions)
+        if operation == "stats":
+            return self.statistics()
+        if operation == "ping":
+            return {}
+        if operation not in ("move", "undo", "state", "close"):
+            raise RequestError("Unknown op %r" % (operation,))
+
+        session_id = request.get("session")
+        if not is_integer(session_id):
+            raise RequestError("Unknown session")
+        session = self.sessions.get(session_id)
+        if session is None or session.session_id not in connection_sessions:
+            raise RequestError("Unknown session")
+        async with session.lock:
+            if operation == "move":
+                return await self.play_move(session, request)
+            if operation == "undo":
+                session.undo()
+                return {"state": session.to_dict()}
+            if operation == "close":
+                del self.sessions[session.session_id]
+                connection_sessions.discard(session.session_id)
+                return {}
+            return {"state": session.to_dict()}
+
+        # Time Complexity: Inherits from the operation
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Creates a game for the client.
+    # Parameters: (self is implicit)
+    #              request: Dictionary of the request, with the optional "size" and "difficulty"
+    #              connection_sessions: Set of the games of the connection
+    # Returns: The dictionary of the response, with the state of the game.
+    def new_session(self, request, connection_sessions):
+        board_size_n = request.get("size", 8)
+        difficulty = request.get("difficulty", "M")
+        if not is_integer(board_size_n) or board_size_n % 2 or \
+           not MIN_BOARD_SIZE <= board_size_n <= MAX_BOARD_SIZE:
+            raise RequestError("The board size must be an even number from %d to %d" % (MIN_BOARD_SIZE,
+                                                                                        MAX_BOARD_SIZE))
+        if not isinstance(difficulty, str) or difficulty not in SERVER_TIME_BUDGET_SECONDS:
+            raise RequestError("The difficulty must be E, M or H")
+        if len(self.sessions) >= self.max_sessions:
+            raise RequestError("Too many sessions")
+        session = GameSession(self.next_session_id, board_size_n, difficulty)
+        self.next_session_id += 1
+        self.sessions[session.session_id] = session
+        connection_sessions.add(session.session_id)
+        return {"state": session.to_dict()}
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(N^2), writing the board of the response
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Plays the client move and the AI answers (more than one if the client has to pass), before
+    #                     the deadline of the request. If the AI cannot answer, the plies of the request are taken
+    #                     back.
+    # Parameters: (self is implicit)
+    #              session: The GameSession
+    #              request: Dictionary of the request, with "move" and the optional "deadline_ms"
+    # Returns: The dictionary of the response: the AI moves, the statistics of the last one, and the state.
+    async def play_move(self, session, request):
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        deadline_ms = request.get("deadline_ms", 1000 * self.default_deadline_seconds)
+        if isinstance(deadline_ms, bool) or not isinstance(deadline_ms, (int, float)) or not deadline_ms > 0:
+            raise RequestError("The deadline_ms must be a positive number")
+        deadline = start_time + deadline_ms / 1000
+        move = request.get("move")
+        if not isinstance(move, list) or len(move) != 2 or not all(is_integer(value) for value in move):
+            raise RequestError("A move is [row, col]")
+        if session.position.current_player != HUMAN_PLAYER or session.is_game_over():
+            raise RequestError("It is not the client's turn")
+
+        number_of_plies = len(session.move_log)
+        session.play(tuple(move))
+        ai_moves = []
+        search_statistics = None
+        try:
+            while session.position.current_player == AI_PLAYER and not session.is_game_over():
+                ai_move, search_statistics = await self.request_ai_move(session, deadline)
+                session.play(ai_move)
+                ai_moves.append(list(ai_move))
+        except RequestError:
+            session.undo_to(number_of_plies)
+            session.position.current_player = HUMAN_PLAYER
+            raise
+        self.move_latencies.append(loop.time() - start_time)
+        return {"ai_moves": ai_moves, "search": search_statistics, "state": session.to_dict()}
+
+        # Time Complexity: Inherits from request_ai_move, for every AI move
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Searches the AI move of a game in the pool of worker processes. The request waits for a
+    #                     free worker (refused at once when max_queued_requests are already waiting), and the
+    #                     search gets the time left until the deadline (or its difficulty budget if shorter).
+    # Parameters: (self is implicit)
+    #              session: The GameSession, with the AI to move
+    #              deadline: loop.time() when the request must be answered
+    # Returns: A ((row, col) move, statistics dictionary) tuple. Raises RequestError when the server is busy or the
+    #          deadline is reached.
+    async def request_ai_move(self, session, deadline):
+        loop = asyncio.get_running_loop()
+        if self.queued_requests >= self.max_queued_requests:
+            self.busy_rejections += 1
+            raise RequestError("busy")
+        queued_time = loop.time()
+        self.queued_requests += 1
+        try:
+            await asyncio.wait_for(self.free_workers.acquire(), deadline - queued_time - DEADLINE_MARGIN_SECONDS)
+        except asyncio.TimeoutError:
+            self.deadline_misses += 1
+            raise RequestError("deadline exceeded")
+        finally:
+            self.queued_requests -= 1
+        start_time = loop.time()
+        self.queue_latencies.append(start_time - queued_time)
+
+        time_left = deadline - start_time - DEADLINE_MARGIN_SECONDS
+        if time_left <= 0:
+            self.free_workers.release()
+            self.deadline_misses += 1
+            raise RequestError("deadline exceeded")
+        position = session.position
+        future = loop.run_in_executor(self.executor, find_ai_move, session.board_size_n, position.bitboards[1],
+                                      position.bitboards[2], position.current_player, session.difficulty,
+                                      min(SERVER_TIME_BUDGET_SECONDS[session.difficulty], time_left))
+        # The worker stays busy until its task ends, even if this request gives up waiting for it
+        future.add_done_callback(lambda _: self.free_workers.release())
+        try:
+            ai_move, search_statistics = await asyncio.wait_for(asyncio.shield(future),
+                                                                deadline - loop.time())
+        except asyncio.TimeoutError:
+            self.deadline_misses += 1
+            raise RequestError("deadline exceeded")
+        self.ai_moves += 1
+        return (tuple(ai_move), search_statistics)
+
+        # Time Complexity: Inherits from find_ai_move, plus the wait for a free worker
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Statistics of the server: games, requests, AI throughput and latencies.
+    # Parameters: None (self is implicit)
+    # Returns: A dictionary that can be written as JSON.
+    def statistics(self):
+        elapsed_seconds = time.perf_counter() - self.start_time
+        statistics = {
+            "uptime_s": round(elapsed_seconds, 3),
+            "sessions": len(self.sessions),
+            "connections": self.connections,
+            "workers": self.number_of_workers,
+            "requests": sum(self.requests.values()),
+            "requests_per_s": round(sum(self.requests.values()) / elapsed_seconds, 1),
+            "ai_moves": self.ai_moves,
+            "ai_moves_per_s": round(self.ai_moves / elapsed_seconds, 1),
+            "queued_requests": self.queued_requests,
+            "busy_rejections": self.busy_rejections,
+            "deadline_misses": self.deadline_misses,
+            "errors": dict(self.errors),
+        }
+        for name, latencies in (("queue_latency", self.queue_latencies), ("move_latency", self.move_latencies)):
+            for percent in (50, 95, 99):
+                statistics["%s_p%d_ms" % (name, percent)] = \
+                    round(1000 * percentile(latencies, percent), 2) if latencies else None
+        return statistics
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(S log S), S being LATENCY_SAMPLES
+        ################################################################################################################################
+
+####################################################################################################################
+# Class description: Client of the server protocol: sends requests and matches the responses by id, so many
+#                    requests can be in flight on one connection.
+class ProtocolClient:
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_request_id = 1
+        self.pending_responses = {}
+        self.reader_task = asyncio.ensure_future(self.read_responses())
+
+    ################################################################################################################################
+    # Method description: Connects to a server.
+    # Parameters: host, port: Address of the TCP server
+    #             unix_path: Path of the Unix socket, used instead of TCP when it is given
+    # Returns: The ProtocolClient.
+    @classmethod
+    async def connect(cls, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        if unix_path is not None:
+            reader, writer = await asyncio.open_unix_connection(unix_path, limit=MAX_LINE_BYTES)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE_BYTES)
+        return cls(reader, writer)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Sends a request and waits for its response.
+    # Parameters: (self is implicit)
+    #              operation: The "op" of the request
+    #              fields: The other fields of the request
+    # Returns: The dictionary of the response.
+    async def request(self, operation, **fields):
+        request_id = self.next_request_id
+        self.next_request_id += 1
+        response_future = asyncio.get_running_loop().create_future()
+        self.pending_responses[request_id] = response_future
+        fields.update(id=request_id, op=operation)
+        self.writer.write(json.dumps(fields).encode() + b"\n")
+        await self.writer.drain()
+        return await response_future
+        ################################################################################################################################
+
+    async def read_responses(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            response_future = self.pending_responses.pop(response.get("id"), None)
+            if response_future is not None and not response_future.done():
+                response_future.set_result(response)
+        for response_future in self.pending_responses.values():
+            if not response_future.done():
+                response_future.set_exception(ConnectionError("The server closed the connection"))
+
+    async def close(self):
+        self.writer.close()
+        await self.reader_task
+        ################################################################################################################################
+
+####################################################################################################################
+# Method description: Load test: plays many games at the same time, with random client moves, spread over several
+#                     connections, and reports the throughput and the latencies (as seen by the clients and by
+#                     the server).
+# Parameters: number_of_sessions: Number of games played at the same time
+#             number_of_connections: Number of connections (the games are spread over them)
+#             difficulty: Difficulty of the games
+#             board_size_n: The number of rows and columns of the boards
+#             max_moves: Client moves per game at most (the game may end before)
+#             deadline_ms: Deadline of every move request, or None for the server default
+#             host, port, unix_path: Address of the server
+#             seed: Seed of the random client moves
+# Returns: A dictionary with the results of the clients and the statistics of the server.
+async def run_load_test(number_of_sessions, number_of_connections, difficulty="M", board_size_n=8, max_moves=30,
+                        deadline_ms=None, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, seed=2023):
+    rng = random.Random(seed)
+    clients = [await ProtocolClient.connect(host, port, unix_path) for _ in range(number_of_connections)]
+    latencies = []
+    errors = collections.Counter()
+    client_moves = [0]
+    ai_moves = [0]
+
+    async def play_session(client):
+        response = await client.request("new", size=board_size_n, difficulty=difficulty)
+        if not response["ok"]:
+            errors[response["error"]] += 1
+            return
+        state = response["state"]
+        for _ in range(max_moves):
+            if state["game_over"] or not state["legal_moves"]:
+                break
+            fields = {"session": state["session"], "move": rng.choice(state["legal_moves"])}
+            if deadline_ms is not None:
+                fields["deadline_ms"] = deadline_ms
+            start_time = time.perf_counter()
+            response = await client.request("move", **fields)
+            latencies.append(time.perf_counter() - start_time)
+            if not response["ok"]:
+                errors[response["error"]] += 1
+                # The move was taken back: another one is tried, a little later if the server is busy
+                if response["error"] == "busy":
+                    await asyncio.sleep(BUSY_RETRY_DELAY_SECONDS)
+                continue
+            client_moves[0] += 1
+            ai_moves[0] += len(response["ai_moves"])
+            state = response["state"]
+        await client.request("close", session=state["session"])
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(play_session(clients[index % number_of_connections])
+                           for index in range(number_of_sessions)))
+    elapsed_seconds = time.perf_counter() - start_time
+    server_statistics = await clients[0].request("stats")
+    for field in ("id", "ok"):
+        server_statistics.pop(field, None)
+    for client in clients:
+        await client.close()
+
+    results = {
+        "sessions": number_of_sessions,
+        "connections": number_of_connections,
+        "elapsed_s": round(elapsed_seconds, 3),
+        "client_moves": client_moves[0],
+        "ai_moves": ai_moves[0],
+        "moves_per_s": round((client_moves[0] + ai_moves[0]) / elapsed_seconds, 1),
+        "errors": dict(errors),
+    }
+    for percent in (50, 95, 99):
+        results["move_latency_p%d_ms" % percent] = round(1000 * percentile(latencies, percent), 2) \
+            if latencies else None
+    results["server"] = server_statistics
+    return results
+
+    # Time Complexity: Inherits from the AI moves of the games
+    ####################################################################################################################
+
+####################################################################################################################
+# Method description: Runs the server until it is interrupted, printing its statistics every report_interval
+#                     seconds (0 for never).
+# Parameters: server: The OthelloServer
+#             host, port, unix_path: Address to listen on
+#             report_interval: Seconds between two statistics lines
+# Returns: None
+async def serve_forever(server, host, port, unix_path, report_interval):
+    address = await server.start(host, port, unix_path)
+    print("Othello server listening on %s with %d workers" % (address, server.number_of_workers))
+    try:
+        while True:
+            await asyncio.sleep(report_interval if report_interval > 0 else 3600)
+            if report_interval > 0:
+                print(json.dumps(server.statistics()))
+    finally:
+        await server.close()
+
+####################################################################################################################
+# Method description: Runs a load test, against a server started in this process (on a free port) or against a
+#                     running one, and prints its results.
+# Parameters: arguments: Parsed command line arguments
+#             server: The OthelloServer to start, or None to connect to the address of the arguments
+# Returns: None
+async def load_test(arguments, server):
+    host, port, unix_path = arguments.host, arguments.port, arguments.unix
+    if server is not None:
+        address = await server.start(host, 0 if unix_path is None else port, unix_path)
+        if unix_path is None:
+            host, port = address
+    try:
+        results = await run_load_test(arguments.sessions, arguments.connections, arguments.difficulty,
+                                      arguments.size, arguments.max_moves, arguments.deadline_ms, host, port,
+                                      unix_path, arguments.seed)
+    finally:
+        if server is not None:
+            await server.close()
+    print(json.dumps(results, indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description="Othello game server (line-delimited JSON over TCP)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to listen on (or to connect to)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port")
+    parser.add_argument("--unix", default=None, help="Unix socket path, instead of TCP")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes of the AI")
+    parser.add_argument("--max-queued", type=int, default=DEFAULT_MAX_QUEUED_REQUESTS,
+                        help="AI requests waiting for a worker before new ones are refused as busy")
+    parser.add_argument("--deadline-ms", type=int, default=None,
+                        help="deadline of the move requests (default %d ms)" % (1000 * DEFAULT_DEADLINE_SECONDS))
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS, help="games held at most")
+    parser.add_argument("--tt-mb", type=float, default=WORKER_TRANSPOSITION_TABLE_SIZE_MB,
+                        help="transposition table of each worker in MB (0 for none)")
+    parser.add_argument("--report-interval", type=float, default=10.0,
+                        help="seconds between statistics lines of the server (0 for none)")
+    parser.add_argument("--load-test", action="store_true", help="run a load test instead of serving")
+    parser.add_argument("--connect", action="store_true",
+                        help="load test a running server instead of one started in this process")
+    parser.add_argument("--sessions", type=int, default=1000, help="games of the load test")
+    parser.add_argument("--connections", type=int, default=10, help="connections of the load test")
+    parser.add_argument("--difficulty", default="M", choices=sorted(SERVER_TIME_BUDGET_SECONDS),
+                        help="difficulty of the load test games")
+    parser.add_argument("--size", type=int, default=8, help="board size of the load test games")
+    parser.add_argument("--max-moves", type=int, default=30, help="client moves per load test game at most")
+    parser.add_argument("--seed", type=int, default=2023, help="seed of the random moves of the load test")
+    arguments = parser.parse_args()
+
+    deadline_seconds = DEFAULT_DEADLINE_SECONDS if arguments.deadline_ms is None else arguments.deadline_ms / 1000
+    server = None
+    if not (arguments.load_test and arguments.connect):
+        server = OthelloServer(arguments.workers, arguments.max_queued, deadline_seconds, arguments.max_sessions,
+                               arguments.tt_mb)
+    try:
+        if arguments.load_test:
+            asyncio.run(load_test(arguments, server))
+        else:
+            asyncio.run(serve_forever(server, arguments.host, arguments.port, arguments.unix,
+                                      arguments.report_interval))
+    except KeyboardInterrupt:
+        pass
+
+# The worker processes import this module again, so they must not start a server
+if __name__ == "__main__":
+    main()
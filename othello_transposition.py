@@ -0,0 +1,171 @@
+from array import array
+
+####################################################################################################################
+# Module description: Transposition table of the search. The same position is reached through many move orders,
+#                     so its search result (depth, bound type, score and best move) is stored under its Zobrist
+#                     key and reused. The table has a fixed number of entries stored in typed arrays, so its
+#                     memory is bounded and known in advance.
+
+# Bound types of the stored scores
+EXACT_BOUND = 0   # The score is exact
+LOWER_BOUND = 1   # The search failed high (beta cutoff): the real score is >= the stored score
+UPPER_BOUND = 2   # The search failed low: the real score is <= the stored score
+
+# Replacement policies when two positions fall in the same entry
+REPLACE_DEPTH_PREFERRED = "depth"   # Keep the deeper result, unless it is from an older search
+REPLACE_ALWAYS = "always"           # The newest result always wins
+
+# Bytes used per entry: key (8), score (4), best move (2), depth (2), bound (1) and age (1). The depth takes two
+# bytes: the search may go as deep as the number of cells of the board (1024 on 32x32).
+BYTES_PER_ENTRY = 18
+
+DEFAULT_SIZE_IN_MB = 16
+
+####################################################################################################################
+# Class description: Fixed-size transposition table indexed by the low bits of the 64-bit Zobrist key.
+class TranspositionTable:
+
+    ####################################################################################################################
+    # Method description: Creates an empty table. The number of entries is rounded down to a power of two.
+    # Parameters: (self is implicit)
+    #              size_in_entries: Number of entries (takes precedence over size_in_mb)
+    #              size_in_mb: Memory of the table in megabytes, used when size_in_entries is not given
+    #              replacement_policy: REPLACE_DEPTH_PREFERRED or REPLACE_ALWAYS
+    def __init__(self, size_in_entries=None, size_in_mb=DEFAULT_SIZE_IN_MB, replacement_policy=REPLACE_DEPTH_PREFERRED):
+        if replacement_policy not in (REPLACE_DEPTH_PREFERRED, REPLACE_ALWAYS):
+            raise ValueError("Unknown replacement policy: %s" % replacement_policy)
+        if size_in_entries is None:
+            size_in_entries = int(size_in_mb * 1024 * 1024) // BYTES_PER_ENTRY
+
+        number_of_entries = 1
+        while number_of_entries * 2 <= size_in_entries:
+            number_of_entries *= 2
+
+        self.number_of_entries = number_of_entries
+        self.index_mask = number_of_entries - 1
+        self.replacement_policy = replacement_policy
+        self.keys = array("Q", bytes(8 * number_of_entries))
+        self.scores = array("i", bytes(4 * number_of_entries))
+        self.best_moves = array("h", bytes(2 * number_of_entries))
+        self.depths = array("H", bytes(2 * number_of_entries))
+        self.bounds = array("B", bytes(number_of_entries))
+        self.ages = array("B", bytes(number_of_entries))
+        # Entries with age 0 are empty, searches are numbered from 1 to 255
+        self.current_age = 1
+        self.reset_statistics()
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(E), E being the number of entries
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Memory used by the entries, in bytes.
+    # Parameters: None (self is implicit)
+    # Returns: The number of bytes.
+    def size_in_bytes(self):
+        return self.number_of_entries * BYTES_PER_ENTRY
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Resets the probe/hit/store counters.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def reset_statistics(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.overwrites = 0
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Hit rate of the probes since the last reset of the statistics.
+    # Parameters: None (self is implicit)
+    # Returns: The fraction of probes that found their position, between 0 and 1.
+    def hit_rate(self):
+        if self.probes == 0:
+            return 0.0
+        return self.hits / self.probes
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Starts a new search (a new move of the game). Entries of previous searches are still used,
+    #                     but they are replaced first, so old results age out of the table.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def new_search(self):
+        self.current_age += 1
+        if self.current_age > 255:
+            # All the stored entries are from previous searches: renumber them to age 1 (0 keeps meaning empty)
+            for index in range(self.number_of_entries):
+                if self.ages[index]:
+                    self.ages[index] = 1
+            self.current_age = 2
+
+        # Time Complexity:
+        # Worst case = O(E), once every 255 searches
+        # Average and Best case = O(1)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Removes all the entries.
+    # Parameters: None (self is implicit)
+    # Returns: None
+    def clear(self):
+        for index in range(self.number_of_entries):
+            self.ages[index] = 0
+        self.current_age = 1
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(E)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Looks for a position in the table.
+    # Parameters: (self is implicit)
+    #              key: The 64-bit Zobrist key of the position
+    # Returns: A (depth, bound, score, best_move) tuple, or None if the position is not stored.
+    #          best_move is a square index, or -1 when there is none.
+    def probe(self, key):
+        self.probes += 1
+        index = key & self.index_mask
+        if self.ages[index] and self.keys[index] == key:
+            self.hits += 1
+            return (self.depths[index], self.bounds[index], self.scores[index], self.best_moves[index])
+        return None
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
+
+    ################################################################################################################################
+    # Method description: Stores the result of a search, following the replacement policy when the entry is used
+    #                     by another position.
+    # Parameters: (self is implicit)
+    #              key: The 64-bit Zobrist key of the position
+    #              depth: Depth of the search that gave the result
+    #              bound: EXACT_BOUND, LOWER_BOUND or UPPER_BOUND
+    #              score: The score found
+    #              best_move: Square index of the best move, or -1
+    # Returns: None
+    def store(self, key, depth, bound, score, best_move):
+        index = key & self.index_mask
+        age = self.ages[index]
+        if age and self.keys[index] != key:
+            if self.replacement_policy == REPLACE_DEPTH_PREFERRED and age == self.current_age \
+               and self.depths[index] > depth:
+                return  # A deeper result of the current search is more valuable
+            self.overwrites += 1
+        elif age and best_move < 0:
+            best_move = self.best_moves[index]  # Same position: keep its best move if the new result has none
+
+        self.stores += 1
+        self.keys[index] = key
+        self.depths[index] = depth
+        self.bounds[index] = bound
+        self.scores[index] = score
+        self.best_moves[index] = best_move
+        self.ages[index] = self.current_age
+
+        # Time Complexity:
+        # Worst, Average, and Best case = O(1)
+        ################################################################################################################################
@@ -0,0 +1,64 @@
+import random
+import pytest
+from othello_engine import Position, legal_moves_bitboard, flip_mask_bitboard, iterate_squares
+from othello_evaluation import evaluate_bitboards
+
+np = pytest.importorskip("numpy")
+import othello_batch  # noqa: E402 (needs NumPy)
+
+####################################################################################################################
+# Module description: Tests of the batched NumPy engine against the engine, on positions of random games.
+
+def random_game_positions(board_size_n, number_of_games, seed):
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(number_of_games):
+        position = Position(board_size_n)
+        while True:
+            moves = position.get_possible_moves_by_current_player()
+            if not moves:
+                position.current_player = 3 - position.current_player  # Pass
+                if not position.get_possible_moves_by_current_player():
+                    break
+                continue
+            positions.append(position.copy())
+            position.make_move(rng.choice(moves))
+            position.current_player = 3 - position.current_player
+        positions.append(position.copy())  # Game over: no legal moves for either player
+    return positions
+
+@pytest.mark.parametrize("board_size_n", [4, 6, 8])
+def test_the_batch_matches_the_engine(board_size_n):
+    positions = random_game_positions(board_size_n, 40, board_size_n)
+    geometry = positions[0].geometry
+    boards = othello_batch.boards_from_positions(positions)
+    cells = [[[cell or 0 for cell in row] for row in position.copy_board_cell_states()] for position in positions]
+    assert (othello_batch.boards_from_cells(cells, [position.current_player for position in positions]) ==
+            boards).all()
+
+    batch_moves = othello_batch.legal_moves(boards, board_size_n)
+    batch_scores = othello_batch.evaluate(boards, board_size_n)
+    batch_indexes = []
+    batch_squares = []
+    for index, position in enumerate(positions):
+        own = position.bitboards[position.current_player]
+        opponent = position.bitboards[3 - position.current_player]
+        moves = legal_moves_bitboard(own, opponent, geometry)
+        assert int(batch_moves[index]) == moves
+        assert int(batch_scores[index]) == evaluate_bitboards(own, opponent, geometry)
+        for square in iterate_squares(moves):
+            batch_indexes.append(index)
+            batch_squares.append(square)
+
+    # Every legal move of every position, flipped and played in one batch
+    move_boards = boards[batch_indexes]
+    flipped = othello_batch.flip_masks(move_boards, batch_squares, board_size_n)
+    next_boards = othello_batch.apply_moves(move_boards, batch_squares, board_size_n)
+    for batch_index, (index, square) in enumerate(zip(batch_indexes, batch_squares)):
+        position = positions[index]
+        own = position.bitboards[position.current_player]
+        opponent = position.bitboards[3 - position.current_player]
+        expected_flipped = flip_mask_bitboard(own, opponent, square, geometry)
+        assert int(flipped[batch_index]) == expected_flipped
+        assert [int(bitboard) for bitboard in next_boards[batch_index]] == \
+            [opponent & ~expected_flipped, own | expected_flipped | 1 << square]
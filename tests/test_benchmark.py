@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("numpy")
+from othello_benchmark import compare_with_baseline, percentile  # noqa: E402 (needs NumPy)
+
+####################################################################################################################
+# Module description: Tests of the regression checks of the benchmark suite.
+
+def suite_metrics(nodes_per_second, latency_p95_ms, evaluations_per_second):
+    return {"midgame.search_nodes_per_second": nodes_per_second, "midgame.search_latency_p95_ms": latency_p95_ms,
+            "midgame.evaluations_per_second": evaluations_per_second}
+
+BASELINE = suite_metrics(1000.0, 50.0, 2000.0)
+
+@pytest.mark.parametrize("metrics, regressions", [
+    (BASELINE, []),
+    # Within the 10% threshold
+    (suite_metrics(901.0, 54.9, 2000.0), []),
+    # Faster than the baseline, whatever the amount
+    (suite_metrics(5000.0, 5.0, 9000.0), []),
+    # A lower throughput or a higher latency beyond the threshold
+    (suite_metrics(899.0, 50.0, 2000.0), ["midgame.search_nodes_per_second"]),
+    (suite_metrics(1000.0, 55.1, 1700.0), ["midgame.search_latency_p95_ms", "midgame.evaluations_per_second"]),
+])
+def test_regressions_beyond_the_threshold(metrics, regressions):
+    assert compare_with_baseline(metrics, BASELINE, 0.10) == regressions
+
+def test_metrics_without_baseline_never_regress():
+    assert compare_with_baseline(BASELINE, None, 0.10) == []
+    assert compare_with_baseline({"midgame.new_metric_per_second": 1.0}, BASELINE, 0.10) == []
+    assert compare_with_baseline({"endgame.search_latency_p99_ms": 1.0}, {"endgame.search_latency_p99_ms": 0.0},
+                                 0.10) == []
+
+def test_percentiles_use_the_nearest_rank():
+    values = [5, 1, 4, 2, 3, 6, 7, 8, 9, 10]
+    assert percentile(values, 50) == 5
+    assert percentile(values, 95) == 10
+    assert percentile(values, 0) == 1
+    assert percentile([7], 99) == 7
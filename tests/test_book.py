@@ -0,0 +1,49 @@
+import pytest
+import othello_book
+import othello_search
+from othello_engine import Position
+
+####################################################################################################################
+# Module description: Tests of the opening book file: write, read back, look up, and refuse the books of another
+#                     evaluation.
+
+def test_book_round_trip(tmp_path):
+    records = othello_book.build_book(8, 1, 2)
+    path = str(tmp_path / "book.bin")
+    othello_book.write_book(path, 8, records, othello_search.evaluation_id(8))
+    book = othello_book.OpeningBook(path)
+    try:
+        assert book.number_of_records == len(records)
+        for key, record in records.items():
+            assert book.lookup(key) == record
+        assert book.lookup(12345) is None
+
+        position = Position(8)
+        move = book.find_best_move(position)
+        assert position.square_of(move) == records[position.hash_key()][0]
+        assert book.find_best_move(Position(10)) is None
+    finally:
+        book.close()
+
+def test_other_files_are_refused(tmp_path):
+    path = tmp_path / "not_a_book.bin"
+    path.write_bytes(b"not a book at all")
+    try:
+        othello_book.OpeningBook(str(path))
+    except ValueError:
+        return
+    raise AssertionError("The file was opened as a book")
+
+def test_books_of_another_evaluation_are_refused(tmp_path):
+    path = str(tmp_path / "book.bin")
+    othello_book.write_book(path, 8, othello_book.build_book(8, 0, 1), othello_search.evaluation_id(8) ^ 1)
+    with pytest.raises(ValueError):
+        othello_book.OpeningBook(path)
+    assert othello_book.get_opening_book(path) is None
+    assert othello_book.get_opening_book(str(tmp_path / "missing.bin")) is None
+
+    othello_book.write_book(path, 8, othello_book.build_book(8, 0, 1), othello_search.HEURISTIC_EVALUATION_ID)
+    book = othello_book.OpeningBook(path, pattern_evaluation=False)
+    book.close()
+    if othello_search.evaluation_id(8) != othello_search.HEURISTIC_EVALUATION_ID:
+        assert othello_book.get_opening_book(path) is None
@@ -0,0 +1,95 @@
+import random
+import threading
+from othello_engine import Position, popcount, iterate_squares, legal_moves_bitboard, flip_mask_bitboard
+from othello_endgame import EndgameSolver
+from othello_search import SearchEngine, INFINITE_SCORE
+
+####################################################################################################################
+# Module description: Tests of the endgame solver against a plain negamax (no move ordering, no parity, no special
+#                     routines for the last cells) on random endgame positions.
+
+def random_endgame_position(rng, number_of_empty_cells):
+    while True:
+        position = Position(8)
+        while position.geometry.num_squares - sum(position.count_disks().values()) > number_of_empty_cells:
+            moves = position.get_possible_moves_by_current_player()
+            if not moves:
+                position.current_player = 3 - position.current_player  # Pass
+                if not position.get_possible_moves_by_current_player():
+                    break
+                continue
+            position.make_move(rng.choice(moves))
+            position.current_player = 3 - position.current_player
+        else:
+            if position.get_possible_moves_by_current_player():
+                return position
+
+def plain_negamax(own, opponent, alpha, beta, geometry, passed=False):
+    moves = legal_moves_bitboard(own, opponent, geometry)
+    if not moves:
+        if passed:
+            return popcount(own) - popcount(opponent)
+        return -plain_negamax(opponent, own, -beta, -alpha, geometry, True)
+    best_score = -INFINITE_SCORE
+    for square in iterate_squares(moves):
+        flipped = flip_mask_bitboard(own, opponent, square, geometry)
+        score = -plain_negamax(opponent ^ flipped, own | flipped | 1 << square, -beta, -alpha, geometry)
+        best_score = max(best_score, score)
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            break
+    return best_score
+
+def move_score(position, move, alpha, beta):
+    player = position.current_player
+    own = position.bitboards[player]
+    opponent = position.bitboards[3 - player]
+    square = position.square_of(move)
+    flipped = flip_mask_bitboard(own, opponent, square, position.geometry)
+    return -plain_negamax(opponent ^ flipped, own | flipped | 1 << square, -beta, -alpha, position.geometry)
+
+def sign(score):
+    return (score > 0) - (score < 0)
+
+def test_exact_scores_match_a_plain_negamax():
+    rng = random.Random(3)
+    solver = EndgameSolver()
+    for number_of_empty_cells in (10, 10, 11, 12):
+        position = random_endgame_position(rng, number_of_empty_cells)
+        player = position.current_player
+        own = position.bitboards[player]
+        opponent = position.bitboards[3 - player]
+        expected_score = plain_negamax(own, opponent, -INFINITE_SCORE, INFINITE_SCORE, position.geometry)
+        assert solver.solve(position) == expected_score
+        move = solver.find_best_move(position)
+        assert solver.completed and solver.exact
+        assert solver.best_score == expected_score
+        assert move_score(position, move, -INFINITE_SCORE, INFINITE_SCORE) == expected_score
+
+def test_win_loss_draw_scores_match_a_plain_negamax():
+    rng = random.Random(4)
+    solver = EndgameSolver()
+    for number_of_empty_cells in (13, 14, 14):
+        position = random_endgame_position(rng, number_of_empty_cells)
+        player = position.current_player
+        expected_score = sign(plain_negamax(position.bitboards[player], position.bitboards[3 - player], -1, 1,
+                                            position.geometry))
+        assert solver.solve(position, exact=False) == expected_score
+        move = solver.find_best_move(position)
+        assert solver.completed and not solver.exact
+        assert solver.best_score == expected_score
+        assert sign(move_score(position, move, -1, 1)) == expected_score
+
+def test_a_solver_stopped_before_any_root_move_gives_no_move():
+    position = random_endgame_position(random.Random(5), 14)
+    stop_event = threading.Event()
+    stop_event.set()
+    solver = EndgameSolver()
+    assert solver.find_best_move(position, stop_event=stop_event) is None
+    assert not solver.completed and solver.best_score == 0
+
+    # The search engine then searches the move instead of playing an unproven one
+    search_engine = SearchEngine(endgame_solver=solver)
+    move = search_engine.find_best_move(position, stop_event=stop_event)
+    assert move in position.get_possible_moves_by_current_player()
+    assert search_engine.statistics.source == "search"
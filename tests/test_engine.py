@@ -0,0 +1,111 @@
+import random
+from array import array
+import pytest
+import othello_patterns
+from othello_engine import Position, MailboxPosition, LegalMoveCache, get_board_geometry, legal_moves_bitboard, \
+    iterate_squares
+from othello_perft import KNOWN_PERFT_8X8, perft_bitboards, perft_position
+
+####################################################################################################################
+# Module description: Tests of the move generation (perft), of the incremental make/undo of the positions and of
+#                     the legal move cache of the game.
+
+def play_random_game(position, rng, on_move):
+    while True:
+        moves = position.get_possible_moves_by_current_player()
+        if not moves:
+            position.current_player = 3 - position.current_player  # Pass
+            if not position.get_possible_moves_by_current_player():
+                return
+            continue
+        on_move(position)
+        position.make_move(rng.choice(moves))
+        position.current_player = 3 - position.current_player
+
+def snapshot(position):
+    return (dict(position.bitboards), position.current_player, dict(position.num_disks_dictionary),
+            position.zobrist_hash, None if position.pattern_indices is None else list(position.pattern_indices))
+
+@pytest.mark.parametrize("depth", range(7))
+def test_perft_of_the_starting_position(depth):
+    position = Position(8)
+    player = position.current_player
+    assert perft_bitboards(position.bitboards[player], position.bitboards[3 - player], depth,
+                           get_board_geometry(8)) == KNOWN_PERFT_8X8[depth]
+
+@pytest.mark.parametrize("position_class", [Position, MailboxPosition])
+def test_perft_with_make_and_undo(position_class):
+    position = position_class(8)
+    assert perft_position(position, 5) == KNOWN_PERFT_8X8[5]
+    assert position.copy_board_cell_states() == position_class(8).copy_board_cell_states()
+
+def test_undo_restores_bitboards_hash_and_pattern_indices():
+    number_of_entries = othello_patterns.table_layout()[1]
+    pattern_evaluator = othello_patterns.PatternEvaluator(
+        8, [array("h", bytes(2 * number_of_entries))] * othello_patterns.NUMBER_OF_PHASES)
+    rng = random.Random(1)
+    for _ in range(20):
+        position = Position(8)
+        position.attach_pattern_evaluator(pattern_evaluator)
+        snapshots = []
+        play_random_game(position, rng, lambda position: snapshots.append(snapshot(position)))
+        assert position.zobrist_hash == position.compute_zobrist_hash()
+        assert position.pattern_indices == pattern_evaluator.compute_indices(position.bitboards[1],
+                                                                             position.bitboards[2])
+        while snapshots:
+            position.undo_last_move()
+            assert snapshot(position) == snapshots.pop()
+
+def test_mailbox_undo_restores_cells_and_frontier():
+    rng = random.Random(2)
+    for _ in range(20):
+        position = MailboxPosition(8)
+        snapshots = []
+        play_random_game(position, rng, lambda position: snapshots.append(
+            (position.copy_board_cell_states(), position.current_player, dict(position.num_disks_dictionary),
+             set(position.frontier))))
+        assert position.frontier == position.compute_frontier()
+        while snapshots:
+            position.undo_last_move()
+            assert (position.copy_board_cell_states(), position.current_player, position.num_disks_dictionary,
+                    position.frontier) == snapshots.pop()
+
+def test_the_legal_move_cache_follows_make_undo_and_passes():
+    rng = random.Random(3)
+    position = Position(8)
+    cache = LegalMoveCache(position)
+
+    def check_cache():
+        geometry = position.geometry
+        for player in (1, 2):
+            expected_moves = legal_moves_bitboard(position.bitboards[player], position.bitboards[3 - player], geometry)
+            assert cache.moves_mask(player) == expected_moves
+            assert cache.moves(player) == [position.move_of(square) for square in iterate_squares(expected_moves)]
+            assert cache.player_can_move(player) == (expected_moves != 0)
+            for square in range(geometry.num_squares):
+                assert cache.is_legal(position.move_of(square), player) == bool(expected_moves >> square & 1)
+        assert not cache.is_legal((-1, 0), 1) and not cache.is_legal((), 1)
+        assert cache.game_is_over() == (not position.player_can_move(1) and not position.player_can_move(2))
+
+    for _ in range(10):
+        position.reset()
+        check_cache()
+        plies = 0
+        while not cache.game_is_over():
+            if not cache.player_can_move(position.current_player):
+                position.current_player = 3 - position.current_player  # Pass: the disks and the cache do not change
+                refreshes = cache.refreshes
+                check_cache()
+                assert cache.refreshes == refreshes
+                continue
+            position.make_move(rng.choice(cache.moves(position.current_player)))
+            position.current_player = 3 - position.current_player
+            plies += 1
+            check_cache()
+            if rng.random() < 0.3:
+                # Undo a few plies and play on from there
+                for _ in range(min(plies, rng.randint(1, 3))):
+                    position.undo_last_move()
+                    plies -= 1
+                    check_cache()
+        check_cache()
@@ -0,0 +1,50 @@
+import random
+import pytest
+from othello_engine import Position, get_board_geometry
+from othello_evaluation import evaluate_bitboards
+
+####################################################################################################################
+# Module description: Tests of the heuristic evaluation: it does not depend on the colour of the players or on the
+#                     orientation of the board.
+
+def random_bitboards(rng, board_size_n):
+    own = opponent = 0
+    for square in range(board_size_n * board_size_n):
+        cell = rng.randrange(3)
+        if cell == 1:
+            own |= 1 << square
+        elif cell == 2:
+            opponent |= 1 << square
+    return own, opponent
+
+def transform_bitboard(bitboard, board_size_n, transformation):
+    last = board_size_n - 1
+    transformed = 0
+    for square in range(board_size_n * board_size_n):
+        if bitboard >> square & 1:
+            row, col = divmod(square, board_size_n)
+            if transformation & 1:
+                row, col = col, row  # Reflection over the main diagonal
+            if transformation & 2:
+                row = last - row
+            if transformation & 4:
+                col = last - col
+            transformed |= 1 << (row * board_size_n + col)
+    return transformed
+
+@pytest.mark.parametrize("board_size_n", [4, 6, 8, 10, 16])
+def test_the_evaluation_is_symmetric(board_size_n):
+    geometry = get_board_geometry(board_size_n)
+    rng = random.Random(board_size_n)
+    for _ in range(50):
+        own, opponent = random_bitboards(rng, board_size_n)
+        score = evaluate_bitboards(own, opponent, geometry)
+        assert evaluate_bitboards(opponent, own, geometry) == -score
+        for transformation in range(1, 8):
+            assert evaluate_bitboards(transform_bitboard(own, board_size_n, transformation),
+                                      transform_bitboard(opponent, board_size_n, transformation), geometry) == score
+
+def test_the_starting_position_is_even():
+    for board_size_n in (4, 8, 12):
+        position = Position(board_size_n)
+        assert evaluate_bitboards(position.bitboards[1], position.bitboards[2], position.geometry) == 0
@@ -0,0 +1,93 @@
+import random
+import pytest
+from othello_engine import Position
+from othello_history import MoveLog, parse_transcript, replay_transcript, move_text
+
+####################################################################################################################
+# Module description: Tests of the move log: transcripts and undo/redo of the game.
+
+def play_logged_game(board_size_n, rng, max_plies=None):
+    position = Position(board_size_n)
+    move_log = MoveLog()
+    # Bitboards of the position before every ply
+    bitboards_before = []
+    while max_plies is None or len(move_log) < max_plies:
+        if not position.current_player_can_move():
+            position.current_player = 3 - position.current_player  # Pass
+            if not position.current_player_can_move():
+                break
+        bitboards_before.append(dict(position.bitboards))
+        position.make_move(rng.choice(position.get_possible_moves_by_current_player()))
+        move_log.record_last_move(position)
+        position.current_player = 3 - position.current_player
+    return position, move_log, bitboards_before
+
+def record_fields(move_log):
+    return [(record.square, record.player, record.flipped) for record in move_log.records]
+
+@pytest.mark.parametrize("board_size_n", [6, 8, 10])
+def test_a_transcript_replays_the_same_game(board_size_n):
+    rng = random.Random(board_size_n)
+    for _ in range(10):
+        position, move_log, _ = play_logged_game(board_size_n, rng)
+        transcript = move_log.to_transcript(board_size_n)
+        assert transcript == "%d:%s" % (board_size_n, "".join(
+            move_text(position.move_of(record.square)) for record in move_log.records))
+        assert parse_transcript(transcript) == (board_size_n, [position.move_of(record.square)
+                                                               for record in move_log.records])
+        replayed_log = MoveLog()
+        replayed_position = replay_transcript(transcript, replayed_log)
+        assert replayed_position.bitboards == position.bitboards
+        assert record_fields(replayed_log) == record_fields(move_log)
+
+def test_invalid_transcripts_are_refused():
+    for transcript in ("f5d6", "x:f5", "8:f5z", "8:f5d6d6"):
+        with pytest.raises(ValueError):
+            replay_transcript(transcript)
+
+def test_undo_and_redo_over_a_pass():
+    # A game where the human player (1) has to pass, so the AI (2) plays two plies in a row
+    rng = random.Random(0)
+    while True:
+        position, move_log, bitboards_before = play_logged_game(8, rng)
+        players = [record.player for record in move_log.records]
+        passes = [ply for ply in range(2, len(players)) if players[ply - 2:ply + 1] == [1, 2, 2]]
+        if passes:
+            break
+    # The log is taken back to just after the two AI plies
+    last_ply = passes[0]
+    while len(move_log) > last_ply + 1:
+        move_log.pop()
+        position.undo_last_move()
+    bitboards_after = dict(position.bitboards)
+
+    # Undo, as the game does: the AI plies after the last human move, and the human move
+    undone_records = []
+    while move_log.last_record().player == 2:
+        undone_records.append(move_log.pop())
+        position.undo_last_move()
+    undone_records.append(move_log.pop())
+    position.undo_last_move()
+    undone_records.reverse()
+    move_log.push_undone_group(undone_records)
+    assert [record.player for record in undone_records] == [1, 2, 2]
+    assert position.bitboards == bitboards_before[last_ply - 2]
+    assert position.current_player == 1
+    assert move_log.can_redo() and len(move_log) == last_ply - 2
+
+    # Redo: the three plies are played again
+    for record in move_log.pop_undone_group():
+        position.current_player = record.player
+        position.apply_move(record.square, record.flipped)
+        move_log.append(record)
+    assert position.bitboards == bitboards_after
+    assert not move_log.can_redo() and len(move_log) == last_ply + 1
+    assert position.zobrist_hash == position.compute_zobrist_hash()
+
+    # After an undo, a new human move makes the undone plies impossible to redo
+    move_log.push_undone_group([move_log.pop() for _ in range(3)][::-1])
+    for _ in range(3):
+        position.undo_last_move()
+    position.make_move(position.get_possible_moves_by_current_player()[0])
+    move_log.record_last_move(position)
+    assert not move_log.can_redo()
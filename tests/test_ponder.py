@@ -0,0 +1,77 @@
+import time
+from othello_engine import Position
+from othello_ponder import Ponderer, PONDER_MAX_REPLIES
+from othello_search import SearchEngine
+from othello_transposition import TranspositionTable
+
+####################################################################################################################
+# Module description: Tests of the pondering: the answers to the predicted replies are searched in the background
+#                     and given back by position.
+
+def wait_for_pondering(ponderer, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while ponderer.is_pondering() and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    assert not ponderer.is_pondering()
+
+def played(position, move):
+    next_position = position.copy()
+    next_position.make_move(move)
+    next_position.current_player = 3 - next_position.current_player
+    return next_position
+
+def pondered_position():
+    position = Position(8)
+    for move in [(2, 3), (2, 2), (3, 2), (4, 2)]:
+        position = played(position, move)
+    return position
+
+def test_a_predicted_reply_gets_its_pondered_answer():
+    position = pondered_position()
+    ponderer = Ponderer(SearchEngine(TranspositionTable(size_in_mb=1)))
+    ponderer.start(position, 0.05)
+    wait_for_pondering(ponderer)
+    predicted_replies = ponderer.predict_replies(position)[:PONDER_MAX_REPLIES]
+    assert ponderer.replies_pondered == PONDER_MAX_REPLIES
+
+    next_position = played(position, predicted_replies[0])
+    assert set(ponderer.answers) == {Ponderer.position_key(played(position, reply)) for reply in predicted_replies}
+    assert Ponderer.position_key(next_position) == (next_position.bitboards[1], next_position.bitboards[2], 2)
+    # The same disks with the other player to move are another position
+    next_position.current_player = 1
+    assert ponderer.take_answer(next_position) is None
+    next_position.current_player = 2
+
+    move, statistics = ponderer.take_answer(next_position)
+    assert move in next_position.get_possible_moves_by_current_player()
+    assert statistics.source == "ponder" and statistics.best_move == move
+    assert ponderer.hits == 1
+    # An answer is given once
+    assert ponderer.take_answer(next_position) is None
+
+def test_an_unpredicted_reply_is_searched():
+    position = pondered_position()
+    search_engine = SearchEngine(TranspositionTable(size_in_mb=1))
+    ponderer = Ponderer(search_engine)
+    ponderer.start(position, 0.05)
+    wait_for_pondering(ponderer)
+    predicted_replies = ponderer.predict_replies(position)[:PONDER_MAX_REPLIES]
+    other_replies = [move for move in position.get_possible_moves_by_current_player() if move not in predicted_replies]
+    assert other_replies
+
+    # As the game does: no pondered answer, so the AI searches the move
+    next_position = played(position, other_replies[0])
+    assert ponderer.take_answer(next_position) is None
+    assert ponderer.hits == 0
+    move = search_engine.find_best_move(next_position, 3)
+    assert move in next_position.get_possible_moves_by_current_player()
+    assert search_engine.statistics.source == "search"
+
+def test_stopped_searches_give_no_answer():
+    position = pondered_position()
+    ponderer = Ponderer(SearchEngine(TranspositionTable(size_in_mb=1)))
+    ponderer.start(position, 60.0)
+    time.sleep(0.05)
+    ponderer.stop()
+    assert not ponderer.is_pondering()
+    assert ponderer.answers == {} and ponderer.replies_pondered == 0
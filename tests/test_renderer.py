@@ -0,0 +1,57 @@
+import random
+from othello_engine import Position, popcount
+from othello_renderer import BoardRenderer
+
+####################################################################################################################
+# Module description: Tests of the diff-based board rendering, on a stand-in for the game2dboard Board that
+#                     records the cells written.
+
+class RecordingRow(list):
+
+    def __init__(self, values, writes):
+        list.__init__(self, values)
+        self.writes = writes
+
+    def __setitem__(self, col, value):
+        self.writes.append(col)
+        list.__setitem__(self, col, value)
+
+class RecordingBoard:
+
+    def __init__(self, board_size_n):
+        self.writes = []
+        self.rows = [RecordingRow([None] * board_size_n, self.writes) for _ in range(board_size_n)]
+
+    def __getitem__(self, row):
+        return self.rows[row]
+
+def test_only_the_changed_cells_are_painted():
+    rng = random.Random(4)
+    position = Position(8)
+    board = RecordingBoard(8)
+    renderer = BoardRenderer(board, 8)
+    assert renderer.render(position) == 4
+    assert renderer.render(position) == 0
+
+    for _ in range(30):
+        moves = position.get_possible_moves_by_current_player()
+        if not moves:
+            break
+        position.make_move(rng.choice(moves))
+        flipped = position.move_history[-1][1]
+        del board.writes[:]
+        cells_painted = renderer.cells_painted
+        # The move square and the flipped disks, nothing else
+        assert renderer.render(position) == len(board.writes) == 1 + popcount(flipped)
+        assert [list(row) for row in board.rows] == position.copy_board_cell_states()
+        assert renderer.cells_painted == cells_painted + renderer.last_cells_painted
+        position.current_player = 3 - position.current_player
+
+    # An undo of several moves paints the cells they changed, once each
+    before = dict(position.bitboards)
+    for _ in range(4):
+        position.undo_last_move()
+    changed_cells = popcount((before[1] ^ position.bitboards[1]) | (before[2] ^ position.bitboards[2]))
+    del board.writes[:]
+    assert renderer.render(position) == len(board.writes) == changed_cells
+    assert [list(row) for row in board.rows] == position.copy_board_cell_states()
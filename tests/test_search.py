@@ -0,0 +1,193 @@
+import io
+import json
+import random
+import threading
+import time
+import pytest
+from othello_engine import Position, legal_moves_bitboard, flip_mask_bitboard, iterate_squares
+from othello_parallel import ParallelSearchEngine
+from othello_search import SearchEngine, SearchLog, MoveAnalysis, INFINITE_SCORE, WIN_SCORE, evaluate_position, \
+    final_score
+from othello_transposition import TranspositionTable, EXACT_BOUND, LOWER_BOUND, UPPER_BOUND
+
+####################################################################################################################
+# Module description: Tests of the Hard search: alpha-beta scores against minimax, time budget and
+#                     cancellation, root-parallel search, transposition table bounds,
+#                     the multi-PV analysis and the search log.
+
+def random_position(seed, plies):
+    rng = random.Random(seed)
+    position = Position(8)
+    for _ in range(plies):
+        moves = position.get_possible_moves_by_current_player()
+        if not moves:
+            break
+        position.make_move(rng.choice(moves))
+        position.current_player = 3 - position.current_player
+    return position
+
+def minimax(position, depth):
+    player = position.current_player
+    geometry = position.geometry
+    own = position.bitboards[player]
+    opponent = position.bitboards[3 - player]
+    if depth <= 0:
+        if not geometry.full_mask & ~(own | opponent):
+            return final_score(position, player)
+        return evaluate_position(position, player)
+    moves = legal_moves_bitboard(own, opponent, geometry)
+    if not moves:
+        if not legal_moves_bitboard(opponent, own, geometry):
+            return final_score(position, player)
+        position.current_player = 3 - player
+        score = -minimax(position, depth)
+        position.current_player = player
+        return score
+    best_score = -INFINITE_SCORE
+    for square in iterate_squares(moves):
+        position.apply_move(square, flip_mask_bitboard(own, opponent, square, geometry))
+        position.current_player = 3 - player
+        best_score = max(best_score, -minimax(position, depth - 1))
+        position.undo_last_move()
+    return best_score
+
+def test_alpha_beta_gives_the_minimax_score():
+    for seed in range(6):
+        position = random_position(seed, 8 + 4 * seed)
+        search_engine = SearchEngine()
+        move = search_engine.find_best_move(position, max_depth=4)
+        assert search_engine.depth_reached == 4
+        search_engine.prepare_position(position)
+        assert search_engine.best_score == minimax(position, 4)
+        position.make_move(move)
+        position.current_player = 3 - position.current_player
+        assert -minimax(position, 3) == search_engine.best_score
+
+def test_the_time_budget_stops_the_iterative_deepening():
+    position = random_position(1, 10)
+    search_engine = SearchEngine()
+    start_time = time.perf_counter()
+    move = search_engine.find_best_move(position, max_depth=60, time_limit=0.3)
+    assert time.perf_counter() - start_time < 1.0
+    assert move in position.get_possible_moves_by_current_player()
+    assert 1 <= search_engine.depth_reached < 60
+    assert [iteration[0] for iteration in search_engine.iterations] == list(range(1, search_engine.depth_reached + 1))
+
+def test_the_stop_event_stops_the_search():
+    position = random_position(2, 10)
+    search_engine = SearchEngine()
+    stop_event = threading.Event()
+    timer = threading.Timer(0.3, stop_event.set)
+    timer.start()
+    start_time = time.perf_counter()
+    move = search_engine.find_best_move(position, max_depth=60, stop_event=stop_event)
+    assert time.perf_counter() - start_time < 1.0
+    assert move in position.get_possible_moves_by_current_player()
+    assert search_engine.depth_reached < 60
+
+@pytest.fixture(scope="module")
+def parallel_search_engine():
+    search_engine = ParallelSearchEngine(number_of_workers=2, transposition_table_size_mb=0)
+    yield search_engine
+    search_engine.close()
+
+@pytest.mark.parametrize("seed", range(4))
+def test_parallel_search_gives_the_sequential_best_score(parallel_search_engine, seed):
+    position = random_position(seed, 6 + 4 * seed)
+    search_engine = SearchEngine()
+    search_engine.find_best_move(position, max_depth=4)
+    move = parallel_search_engine.find_best_move(position, max_depth=4)
+    assert parallel_search_engine.depth_reached == 4
+    assert parallel_search_engine.best_score == search_engine.best_score
+    assert [analysis.score for analysis in parallel_search_engine.analysis
+            if analysis.move == move] == [search_engine.best_score]
+
+def test_a_fail_low_below_a_table_lower_bound_is_not_stored_as_exact():
+    for seed in range(5):
+        position = random_position(seed, 12)
+        search_engine = SearchEngine()
+        search_engine.prepare_position(position)
+        score = search_engine.negamax(position, 3, -INFINITE_SCORE, INFINITE_SCORE)
+
+        # A lower bound above the score (from a deeper search) narrows alpha, so the search fails low of it
+        transposition_table = TranspositionTable(size_in_entries=1 << 16)
+        transposition_table.store(position.hash_key(), 3, LOWER_BOUND, score + 50, -1)
+        search_engine = SearchEngine(transposition_table)
+        search_engine.prepare_position(position)
+        assert search_engine.negamax(position, 3, -INFINITE_SCORE, INFINITE_SCORE) <= score + 50
+        assert transposition_table.probe(position.hash_key())[1] == UPPER_BOUND
+
+def test_the_search_log_writes_one_json_line_per_move(tmp_path):
+    log_path = str(tmp_path / "search.jsonl")
+    search_engine = SearchEngine()
+    for move_number in (1, 2):
+        search_log = SearchLog(log_path)  # Appended to, like the game does from one game to the next
+        search_engine.find_best_move(random_position(move_number, 10), max_depth=3)
+        search_log.write(search_engine.statistics, move_number=move_number, difficulty="H")
+        search_log.close()
+    with open(log_path) as log_file:
+        lines = log_file.read().splitlines()
+    assert len(lines) == 2
+    record = json.loads(lines[1])
+    assert list(record) == ["move_number", "difficulty", "source", "best_move", "score", "depth_reached", "nodes",
+                            "leaf_evaluations", "cutoffs", "transposition_hits", "search_time", "nodes_per_second",
+                            "iterations", "branching_factors"]
+    assert record["move_number"] == 2 and record["source"] == "search"
+    assert record["best_move"] == list(search_engine.statistics.best_move)
+    assert record["nodes"] == search_engine.nodes_searched
+    assert [iteration["depth"] for iteration in record["iterations"]] == [1, 2, 3]
+    assert sum(iteration["nodes"] for iteration in record["iterations"]) == record["nodes"]
+    assert len(record["branching_factors"]) == 2
+
+    # A stream given by the caller is left open
+    stream = io.StringIO()
+    search_log = SearchLog(stream)
+    search_log.write(search_engine.statistics)
+    search_log.close()
+    assert json.loads(stream.getvalue())["depth_reached"] == 3
+
+def test_the_analysis_gives_exact_scores_to_the_best_moves():
+    for seed in range(4):
+        position = random_position(seed, 8 + 6 * seed)
+        search_engine = SearchEngine(TranspositionTable(size_in_mb=1))
+        analysis = search_engine.analyze(position, 3, max_depth=4)
+        legal_moves = position.get_possible_moves_by_current_player()
+        assert sorted(move_analysis.move for move_analysis in analysis) == sorted(legal_moves)
+        assert [move_analysis.score for move_analysis in analysis] == \
+            sorted((move_analysis.score for move_analysis in analysis), reverse=True)
+
+        # Every move searched alone with a full window, at the same depth
+        reference_engine = SearchEngine()
+        reference_engine.prepare_position(position)
+        for rank, move_analysis in enumerate(analysis):
+            score = reference_engine.search_move(position, position.square_of(move_analysis.move), 4,
+                                                 -INFINITE_SCORE, INFINITE_SCORE)
+            assert move_analysis.depth == 4
+            if rank < min(3, len(analysis)):
+                assert move_analysis.bound == EXACT_BOUND and move_analysis.score == score
+            elif move_analysis.bound == UPPER_BOUND:
+                assert score <= move_analysis.score <= analysis[2].score
+            else:
+                assert move_analysis.score == score
+            variation_position = position.copy()
+            assert move_analysis.principal_variation[0] == move_analysis.move
+            for move in move_analysis.principal_variation:
+                if not variation_position.current_player_can_move():
+                    variation_position.current_player = 3 - variation_position.current_player  # Pass
+                assert variation_position.make_move(move)
+                variation_position.current_player = 3 - variation_position.current_player
+
+def test_the_analysis_is_written_as_json():
+    position = random_position(1, 10)
+    analysis = SearchEngine(TranspositionTable(size_in_mb=1)).analyze(position, 2, max_depth=3)
+    records = json.loads(json.dumps([move_analysis.to_dict() for move_analysis in analysis]))
+    assert [record["move"] for record in records] == [list(move_analysis.move) for move_analysis in analysis]
+    assert records[0]["bound"] == "exact" and records[0]["depth"] == 3
+    assert records[0]["principal_variation"][0] == records[0]["move"]
+    assert all(record["bound"] in ("exact", "upper") for record in records)
+
+    assert MoveAnalysis((2, 3), 35, EXACT_BOUND, 6, [(2, 3)]).score_text() == "+35"
+    assert MoveAnalysis((2, 3), -12, UPPER_BOUND, 6, [(2, 3)]).score_text() == "<=-12"
+    assert MoveAnalysis((2, 3), WIN_SCORE + 6, EXACT_BOUND, 12, [(2, 3)]).score_text() == "W+6"
+    assert MoveAnalysis((2, 3), -WIN_SCORE - 4, EXACT_BOUND, 12, [(2, 3)]).to_dict() == {
+        "move": [2, 3], "score": -WIN_SCORE - 4, "bound": "exact", "depth": 12, "principal_variation": [[2, 3]]}
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import pytest
+import othello_server
+
+####################################################################################################################
+# Module description: Tests of the game server protocol: every request line gets an answer, malformed ones an error.
+
+async def send_requests(requests):
+    server = othello_server.OthelloServer(number_of_workers=1, transposition_table_size_mb=0)
+    host, port = await server.start(port=0)
+    client = await othello_server.ProtocolClient.connect(host, port)
+    try:
+        responses = []
+        for fields in requests:
+            fields = dict(fields)
+            operation = fields.pop("op")
+            responses.append(await asyncio.wait_for(client.request(operation, **fields), 10))
+        return responses
+    finally:
+        await client.close()
+        await server.close()
+
+async def send_lines(lines):
+    server = othello_server.OthelloServer(number_of_workers=1, transposition_table_size_mb=0)
+    host, port = await server.start(port=0)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        responses = []
+        for line in lines:
+            writer.write(line)
+            await writer.drain()
+            responses.append(json.loads(await asyncio.wait_for(reader.readline(), 10)))
+        return responses
+    finally:
+        writer.close()
+        await server.close()
+
+@pytest.mark.parametrize("request_fields, error", [
+    ({"op": "new", "difficulty": ["H"]}, "The difficulty must be E, M or H"),
+    ({"op": "new", "size": "8"}, "The board size must be an even number from 4 to 32"),
+    ({"op": "new", "size": True}, "The board size must be an even number from 4 to 32"),
+    ({"op": "state", "session": [1]}, "Unknown session"),
+    ({"op": "state", "session": {"id": 1}}, "Unknown session"),
+    ({"op": "move", "session": 1, "move": [2, 3], "deadline_ms": "soon"}, "The deadline_ms must be a positive number"),
+    ({"op": "move", "session": 1, "move": "d3"}, "A move is [row, col]"),
+    ({"op": "move", "session": 1, "move": [0, 0]}, "Move [0, 0] is not legal"),
+    ({"op": ["new"]}, "The op must be a string"),
+    ({"op": "jump"}, "Unknown op 'jump'"),
+])
+def test_malformed_requests_get_an_error(request_fields, error):
+    new_response, response = asyncio.run(send_requests([{"op": "new", "difficulty": "E"}, request_fields]))
+    assert new_response["ok"]
+    assert response == {"ok": False, "error": error, "id": 2}
+
+def test_a_game_is_played():
+    new_response, move_response, state_response = asyncio.run(send_requests([
+        {"op": "new", "difficulty": "E"}, {"op": "move", "session": 1, "move": [2, 3]},
+        {"op": "state", "session": 1}]))
+    assert new_response["state"]["disks"] == [2, 2]
+    assert move_response["ok"] and len(move_response["ai_moves"]) == 1
+    assert state_response["state"]["transcript"].startswith("8:d3")
+
+def test_lines_that_are_not_json_get_an_error():
+    responses = asyncio.run(send_lines([b"{\"op\": \"new\"\n", b"\xff\n", b"[1, 2]\n"]))
+    assert responses == [{"ok": False, "error": "Invalid JSON"}, {"ok": False, "error": "Invalid JSON"},
+                         {"ok": False, "error": "A request is a JSON object"}]
+
+def test_other_errors_are_not_reported_as_invalid_json(monkeypatch):
+    async def failing_request(server, request, connection_sessions):
+        raise ValueError("math domain error")
+    monkeypatch.setattr(othello_server.OthelloServer, "handle_request", failing_request)
+    response, = asyncio.run(send_lines([b'{"op": "new", "id": 7}\n']))
+    assert response == {"ok": False, "error": "Internal error: ValueError: math domain error", "id": 7}
@@ -0,0 +1,51 @@
+import pytest
+from othello_transposition import TranspositionTable, REPLACE_ALWAYS, EXACT_BOUND, LOWER_BOUND, UPPER_BOUND
+
+####################################################################################################################
+# Module description: Tests of the transposition table: store and probe, replacement policies and ageing.
+
+def test_probe_gives_the_stored_entry():
+    table = TranspositionTable(size_in_entries=1024)
+    assert table.probe(12345) is None
+    table.store(12345, 6, EXACT_BOUND, -17, 42)
+    assert table.probe(12345) == (6, EXACT_BOUND, -17, 42)
+    # Another key of the same slot is not mistaken for it
+    assert table.probe(12345 + table.number_of_entries) is None
+
+def test_depth_preferred_keeps_the_deeper_entry():
+    table = TranspositionTable(size_in_entries=1024)
+    key = 7
+    other_key = key + table.number_of_entries  # Same slot
+    table.store(key, 8, LOWER_BOUND, 30, 1)
+    table.store(other_key, 3, UPPER_BOUND, -5, 2)
+    assert table.probe(key) == (8, LOWER_BOUND, 30, 1)
+    assert table.probe(other_key) is None
+    table.store(other_key, 9, UPPER_BOUND, -5, 2)
+    assert table.probe(other_key) == (9, UPPER_BOUND, -5, 2)
+
+def test_entries_of_an_older_search_are_replaced():
+    table = TranspositionTable(size_in_entries=1024)
+    key = 7
+    other_key = key + table.number_of_entries
+    table.store(key, 8, EXACT_BOUND, 30, 1)
+    table.new_search()
+    table.store(other_key, 2, EXACT_BOUND, 4, 3)
+    assert table.probe(other_key) == (2, EXACT_BOUND, 4, 3)
+
+def test_always_policy_replaces():
+    table = TranspositionTable(size_in_entries=1024, replacement_policy=REPLACE_ALWAYS)
+    key = 7
+    other_key = key + table.number_of_entries
+    table.store(key, 8, EXACT_BOUND, 30, 1)
+    table.store(other_key, 1, EXACT_BOUND, 4, 3)
+    assert table.probe(other_key) == (1, EXACT_BOUND, 4, 3)
+
+def test_deep_searches_are_stored():
+    # The game searches as deep as the number of cells (1024 on 32x32)
+    table = TranspositionTable(size_in_entries=16)
+    table.store(99, 1024, EXACT_BOUND, 0, 1023)
+    assert table.probe(99) == (1024, EXACT_BOUND, 0, 1023)
+
+def test_unknown_policy_is_refused():
+    with pytest.raises(ValueError):
+        TranspositionTable(size_in_entries=16, replacement_policy="random")